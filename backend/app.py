@@ -1,19 +1,37 @@
 import os
+import time
 import uvicorn
 import logging
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 import json
-import glob
-from typing import List, Dict, Optional
-import pandas as pd
+import asyncio
+import threading
+from contextlib import nullcontext
+from typing import Any, List, Dict, Optional, Tuple
 
 # 导入项目配置
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from preprocess.config import *
-from sentiment_analysis.model import FinBertSentimentAnalyzer
+from preprocess.catalog import ReportCatalog
+from preprocess.segmentation import segment_sections, sentences_from_spans, get_sentence_tokenizer
+from sentiment_analysis.cache import SentenceResultCache, ExplanationCache
+from sentiment_analysis.result_store import (ResultStore, ColumnarResult, JsonSectionIndex, META_FILENAME, LABELS,
+                                             SORT_KEYS, query_sentences)
+from sentiment_analysis.summary_index import SummaryIndex
+from sentiment_analysis.served_models import scan_finetuned_models, served_models, model_results_dir, create_analyzer
+from sentiment_analysis.fingerprint import build_fingerprint, plan_reanalysis, is_unchanged
+from sentiment_analysis.pretokenize import TokenizedSentences, load_tokenized_inputs
+from sentiment_analysis.metrics import REGISTRY, CONTENT_TYPE, RESPONSE_SERIALIZE_SECONDS
+from sentiment_analysis.profiling import ProfileSession, profile_requested
+from backend.inference_queue import MicroBatchScheduler
+from backend.model_loader import BackgroundModelLoader
+from backend.model_registry import ModelRegistry
+from backend.jobs import AnalysisJob, AnalysisJobManager
+from backend.report_cache import ReportResultCache
 
 # 配置日志
 logging.basicConfig(
@@ -42,13 +60,296 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 初始化情感分析模型
+# 默认的情感分析模型，后台加载并预热完成后才赋值
 analyzer = None
 
+# 句子级结果缓存
+sentence_cache = None
+
+# 句子解释（逐token归因）缓存
+explanation_cache = None
+
+# 单文本分析和句子解释的微批调度器
+text_scheduler = None
+explain_scheduler = None
+
+# 后台报告分析任务管理器
+job_manager = None
+
+# 报告情感摘要索引
+summary_index = None
+
+# 处理后报告的目录清单，股票代码和报告列表接口共用
+catalog = ReportCatalog(PROCESSED_DATA_DIR, RESULTS_DIR, CATALOG_MANIFEST_PATH,
+                        refresh_interval=CATALOG_REFRESH_INTERVAL)
+
+# 报告分析结果存储（JSON或列式格式）
+result_store = ResultStore(RESULTS_DIR, RESULT_STORAGE_FORMAT)
+
+# 已解析报告结果的进程内缓存，报告和章节接口共用
+report_cache = ReportResultCache(max_entries=REPORT_CACHE_MAX_ENTRIES,
+                                 max_bytes=REPORT_CACHE_MAX_MB * 1024 * 1024)
+
+# 已打开的列式结果（元数据 + 内存映射的标签/概率数组）和JSON结果的章节索引，供章节句子查询使用
+columnar_cache = ReportResultCache(max_entries=REPORT_CACHE_MAX_ENTRIES)
+
+# 接口延迟和进行中的请求数（流式接口的延迟为返回响应头的时间）
+HTTP_REQUEST_SECONDS = REGISTRY.histogram('finbert_http_request_seconds', '接口请求耗时（秒）',
+                                          ['method', 'endpoint', 'status'])
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.gauge('finbert_http_requests_in_flight', '正在处理的请求数')
+
+
+# 微调模型目录的扫描结果，与报告目录清单一样按目录mtime失效，两次检查之间至少间隔 CATALOG_REFRESH_INTERVAL 秒；
+# incomplete 为还没有 config.json 的子目录（模型正在保存，写入文件不改变上层目录的mtime），每次检查时单独复查
+_finetuned_models = {'key': None, 'checked_at': None, 'models': {}, 'incomplete': []}
+_finetuned_models_lock = threading.Lock()
+
+
+def _finetuned_model_dirs() -> Dict[str, str]:
+    """FINETUNED_MODELS_DIR 下含 config.json 的模型目录（目录名到路径），目录未变化时不重新列目录"""
+    with _finetuned_models_lock:
+        cached = _finetuned_models
+        now = time.monotonic()
+        if cached['checked_at'] is not None and now - cached['checked_at'] < CATALOG_REFRESH_INTERVAL:
+            return cached['models']
+        cached['checked_at'] = now
+        
+        try:
+            key = (FINETUNED_MODELS_DIR, os.stat(FINETUNED_MODELS_DIR).st_mtime_ns)
+        except OSError:
+            key = (FINETUNED_MODELS_DIR, None)
+        if key != cached['key']:
+            models, incomplete = scan_finetuned_models(FINETUNED_MODELS_DIR) if key[1] is not None else ({}, [])
+            cached.update(key=key, models=models, incomplete=incomplete)
+        elif cached['incomplete']:
+            for name in list(cached['incomplete']):
+                path = os.path.join(FINETUNED_MODELS_DIR, name)
+                if os.path.exists(os.path.join(path, 'config.json')):
+                    cached['models'] = {**cached['models'], name: path}
+                    cached['incomplete'].remove(name)
+        return cached['models']
+
+
+def _served_models() -> Dict[str, str]:
+    """可选择的模型：名称到模型名或本地目录的映射（微调模型目录按目录名加入，配置中的同名项优先）"""
+    return served_models(_finetuned_model_dirs())
+
+
+def _create_analyzer(name: str):
+    """
+    加载名称对应的模型并做一次预热推理（在加载线程或后台任务线程中执行）
+
+    模型按 create_analyzer 创建（与命令行分析使用同一套解析），torch和transformers在其中才导入，
+    API进程启动时不加载。
+    """
+    spec = _served_models()[name]
+    start = time.perf_counter()
+    try:
+        model = create_analyzer(spec, cache=sentence_cache, backend=INFERENCE_BACKEND)
+        # 预热推理不经过句子缓存，每次加载都会真正执行一次前向推理
+        model.analyze_text(MODEL_WARMUP_TEXT)
+    except Exception as e:
+        logger.error(f"模型 {name} 加载失败: {str(e)}")
+        raise
+    logger.info(f"模型 {name} 加载并预热完成，耗时 {time.perf_counter() - start:.1f}s")
+    return model
+
+
+def _load_analyzer():
+    """
+    在后台加载线程中加载默认模型
+
+    分句数据同样在这里解析（本地没有时下载到 NLTK_DATA_DIR），请求中不再查找或下载资源。
+    """
+    get_sentence_tokenizer()
+    return _create_analyzer(DEFAULT_SERVED_MODEL)
+
+
+# 默认模型的后台加载状态，健康检查的就绪状态以此为准
+model_loader = BackgroundModelLoader(_load_analyzer)
+
+# 按请求选择的其他模型，按需加载，总内存超出预算时卸载最久未使用的模型
+model_registry = ModelRegistry(_create_analyzer, memory_budget=MODEL_MEMORY_BUDGET_MB * 1024 * 1024)
+
+# 非默认模型的结果存储和摘要索引，首次使用时打开
+_model_results = {}
+_model_results_lock = threading.Lock()
+
+
+def _cache_stats() -> Dict[str, Dict]:
+    caches = {'report': report_cache, 'columnar': columnar_cache, 'sentence': sentence_cache,
+              'explanation': explanation_cache}
+    return {name: cache.stats() for name, cache in caches.items() if cache is not None}
+
+
+# 缓存、后台任务和微批调度器已有的统计，采集时读取
+REGISTRY.callback('finbert_cache_hits_total', '缓存命中次数', 'counter', ['cache'],
+                  lambda: [((name,), stats['hits']) for name, stats in _cache_stats().items()])
+REGISTRY.callback('finbert_cache_misses_total', '缓存未命中次数', 'counter', ['cache'],
+                  lambda: [((name,), stats['misses']) for name, stats in _cache_stats().items()])
+REGISTRY.callback('finbert_cache_hit_ratio', '缓存命中率', 'gauge', ['cache'],
+                  lambda: [((name,), stats['hit_rate']) for name, stats in _cache_stats().items()])
+REGISTRY.callback('finbert_cache_entries', '缓存条目数', 'gauge', ['cache'],
+                  lambda: [((name,), stats['entries']) for name, stats in _cache_stats().items()])
+REGISTRY.callback('finbert_analysis_jobs', '报告分析任务数（queued和running即进行中的分析）', 'gauge', ['status'],
+                  lambda: [((status,), count) for status, count in job_manager.stats().items()
+                           if status != 'max_workers'] if job_manager is not None else [])
+REGISTRY.callback('finbert_model_memory_bytes', '已加载模型的估计内存占用（字节）', 'gauge', ['model'],
+                  lambda: [((name,), info['memory_bytes'])
+                           for name, info in model_registry.stats()['models'].items()])
+REGISTRY.callback('finbert_model_evictions_total', '因超出内存预算卸载模型的次数', 'counter', [],
+                  lambda: [((), model_registry.evictions)])
+REGISTRY.callback('finbert_text_queue_depth', '单文本分析等待组批的请求数', 'gauge', [],
+                  lambda: [((), text_scheduler.stats()['queued'])] if text_scheduler is not None else [])
+REGISTRY.callback('finbert_explain_queue_depth', '句子解释等待组批的请求数', 'gauge', [],
+                  lambda: [((), explain_scheduler.stats()['queued'])] if explain_scheduler is not None else [])
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """记录每个接口（按路由模板区分）的请求耗时和进行中的请求数"""
+    start = time.perf_counter()
+    status = 500
+    with HTTP_REQUESTS_IN_FLIGHT.track_inprogress():
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            route = request.scope.get('route')
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, method=request.method,
+                                         endpoint=getattr(route, 'path', 'unmatched'), status=str(status))
+
+
+def _json_response(data, endpoint: str, profile_dir: Optional[str] = None) -> JSONResponse:
+    """编码JSON响应并记录编码耗时，有性能剖析结果时通过响应头 X-Profile-Dir 返回其目录"""
+    with RESPONSE_SERIALIZE_SECONDS.time(endpoint=endpoint):
+        response = JSONResponse(content=data)
+    if profile_dir is not None:
+        response.headers['X-Profile-Dir'] = profile_dir
+    return response
+
+
+def _profiling_requested(request: Request, profile: bool) -> bool:
+    """请求是否开启性能剖析（查询参数 profile=true 或请求头 X-Profile: 1）"""
+    return PROFILING_ENABLED and (profile or profile_requested(request.headers.get('X-Profile')))
+
+
+def _profile_session(name: str, torch_trace: bool = True) -> ProfileSession:
+    """
+    创建性能剖析会话：采样所有线程的调用栈，torch.profiler 只记录进入会话的线程，
+    因此需要在执行推理的线程中进入
+    """
+    return ProfileSession(name, PROFILE_DIR, keep=PROFILE_MAX_SESSIONS,
+                          interval=PROFILE_SAMPLE_INTERVAL_MS / 1000, torch_trace=torch_trace)
+
+
+def _analyze_text_batch(items: List[Tuple[Any, str]]) -> List[Dict]:
+    """微批调度器的批量推理：一批中的 (模型, 文本) 请求按模型分组推理，按原顺序返回结果"""
+    groups = {}
+    for i, (model, _) in enumerate(items):
+        groups.setdefault(id(model), (model, []))[1].append(i)
+    results = [None] * len(items)
+    for model, indices in groups.values():
+        for i, result in zip(indices, model.analyze_batch([items[i][1] for i in indices])):
+            results[i] = result
+    return results
+
+
+def _explain_batch(items: List[Tuple[Any, List[str], Optional[str]]]) -> List[List[Dict]]:
+    """
+    解释调度器的批量推理：一批中的 (模型, 句子列表, 目标类别) 请求按模型和目标类别分组，
+    每组的全部句子合成一次遮挡推理，按原顺序返回每个请求的结果列表
+    """
+    groups = {}
+    for i, (model, _, target) in enumerate(items):
+        groups.setdefault((id(model), target), (model, target, []))[2].append(i)
+    results = [None] * len(items)
+    for model, target, indices in groups.values():
+        texts = [text for i in indices for text in items[i][1]]
+        explanations = model.explain_batch(texts, target=target, max_length=EXPLANATION_MAX_LENGTH,
+                                           cache=explanation_cache)
+        start = 0
+        for i in indices:
+            results[i] = explanations[start:start + len(items[i][1])]
+            start += len(items[i][1])
+    return results
+
+
+def _on_model_ready(model):
+    """默认模型就绪后登记为常驻模型并启动单文本分析和句子解释的微批调度器，再开放需要模型的接口"""
+    global analyzer, text_scheduler, explain_scheduler
+    
+    model_registry.add(DEFAULT_SERVED_MODEL, model, pinned=True)
+    text_scheduler = MicroBatchScheduler(
+        _analyze_text_batch,
+        max_batch_size=INFERENCE_MAX_BATCH_SIZE,
+        max_wait_ms=INFERENCE_MAX_WAIT_MS,
+        name="analyze-text"
+    )
+    text_scheduler.start()
+    # 解释的推理量是单句分析的数十倍，单独排队，不拖慢单文本分析
+    explain_scheduler = MicroBatchScheduler(
+        _explain_batch,
+        max_batch_size=INFERENCE_MAX_BATCH_SIZE,
+        max_wait_ms=INFERENCE_MAX_WAIT_MS,
+        name="explain"
+    )
+    explain_scheduler.start()
+    analyzer = model
+
+
+def _require_analyzer():
+    """需要模型的接口在模型就绪前返回503（加载中，附带Retry-After）或500（加载失败）"""
+    if analyzer is not None:
+        return
+    if model_loader.state == 'failed':
+        raise HTTPException(status_code=500, detail=f"模型加载失败，无法进行分析: {model_loader.error}")
+    raise HTTPException(status_code=503, detail="模型正在加载，请稍后重试",
+                        headers={"Retry-After": str(MODEL_LOADING_RETRY_AFTER)})
+
+
+def _check_model(model: Optional[str]) -> str:
+    """校验请求选择的模型（None为默认模型），返回模型名称，不支持的模型返回400"""
+    name = model or DEFAULT_SERVED_MODEL
+    if name != DEFAULT_SERVED_MODEL and name not in _served_models():
+        raise HTTPException(status_code=400,
+                            detail=f"不支持的模型: {name}，可选: {', '.join(_served_models())}")
+    return name
+
+
+def _get_analyzer(model: str = DEFAULT_SERVED_MODEL):
+    """返回模型名称对应的分析器，非默认模型未加载时在当前线程中加载（可能卸载其他模型）"""
+    if model == DEFAULT_SERVED_MODEL:
+        return analyzer
+    return model_registry.get(model)
+
+
+def _results_for(model: str = DEFAULT_SERVED_MODEL) -> Tuple[ResultStore, Optional[SummaryIndex], str]:
+    """模型的结果存储、摘要索引和结果目录，默认模型使用 RESULTS_DIR，其他模型使用 RESULTS_DIR/models/<名称>/"""
+    if model == DEFAULT_SERVED_MODEL:
+        return result_store, summary_index, RESULTS_DIR
+    with _model_results_lock:
+        entry = _model_results.get(model)
+        if entry is None:
+            results_dir = model_results_dir(model, RESULTS_DIR)
+            os.makedirs(results_dir, exist_ok=True)
+            index = SummaryIndex(os.path.join(results_dir, SUMMARY_INDEX_FILENAME))
+            if index.created:
+                index.rebuild(results_dir)
+            entry = _model_results[model] = (ResultStore(results_dir, RESULT_STORAGE_FORMAT), index, results_dir)
+        return entry
+
+
 @app.on_event("startup")
 async def startup_event():
-    """应用启动时加载模型和检查目录"""
-    global analyzer
+    """
+    应用启动时检查目录、刷新目录清单并打开索引和缓存，模型在后台加载
+    
+    启动事件不等待模型，目录清单和已有结果的接口立即可用；模型加载和预热完成后
+    /api/health/ready 才返回就绪。
+    """
+    global sentence_cache, explanation_cache, job_manager, summary_index
     
     # 检查必要的目录结构
     required_dirs = [PROCESSED_DATA_DIR, RESULTS_DIR]
@@ -59,32 +360,111 @@ async def startup_event():
         else:
             logger.info(f"目录已存在: {directory}")
     
-    # 加载模型
+    # 按目录mtime增量刷新报告目录清单（没有持久化清单时完整扫描）
+    catalog.refresh()
+    logger.info(f"报告目录清单: {len(catalog.reports())} 个报告")
+    
+    # 打开摘要索引，首次创建时从已有结果重建
+    summary_index = SummaryIndex(os.path.join(RESULTS_DIR, SUMMARY_INDEX_FILENAME))
+    if summary_index.created:
+        count = summary_index.rebuild(RESULTS_DIR)
+        logger.info(f"摘要索引已从结果目录重建，共 {count} 个报告")
+    
+    # 打开句子结果缓存
     try:
-        analyzer = FinBertSentimentAnalyzer(model_name="ProsusAI/finbert")
-        logger.info("FinBERT模型加载成功")
+        sentence_cache = SentenceResultCache(SENTENCE_CACHE_PATH, SENTENCE_CACHE_MAX_ENTRIES)
     except Exception as e:
-        logger.error(f"模型加载失败: {str(e)}")
+        logger.error(f"句子缓存打开失败，将不使用缓存: {str(e)}")
+    try:
+        explanation_cache = ExplanationCache(EXPLANATION_CACHE_PATH, EXPLANATION_CACHE_MAX_ENTRIES)
+    except Exception as e:
+        logger.error(f"句子解释缓存打开失败，将不使用缓存: {str(e)}")
+    
+    # 启动后台分析任务线程池（模型就绪前不会提交任务）
+    job_manager = AnalysisJobManager(_run_analysis_job, max_workers=ANALYSIS_JOB_WORKERS)
+    
+    # 在后台加载模型
+    model_loader.start(on_ready=_on_model_ready)
+    logger.info("模型在后台加载，加载完成前需要模型的接口返回503")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """应用关闭时停止推理调度器和后台任务"""
+    if text_scheduler is not None:
+        await text_scheduler.stop()
+    if explain_scheduler is not None:
+        await explain_scheduler.stop()
+    if job_manager is not None:
+        job_manager.shutdown()
 
 
 @app.get("/api/health")
 async def health_check():
-    """健康检查端点"""
-    return {"status": "ok", "model_loaded": analyzer is not None}
+    """健康检查端点：live 表示进程在服务请求，ready 表示模型已加载并预热、可以推理"""
+    return {
+        "status": "ok",
+        "live": True,
+        "ready": analyzer is not None,
+        "model_loaded": analyzer is not None,
+        "model": model_loader.stats(),
+        "sentence_cache": sentence_cache.stats() if sentence_cache is not None else None,
+        "text_scheduler": text_scheduler.stats() if text_scheduler is not None else None,
+        "explain_scheduler": explain_scheduler.stats() if explain_scheduler is not None else None,
+        "jobs": job_manager.stats() if job_manager is not None else None
+    }
+
+
+@app.get("/api/health/live")
+async def liveness_check():
+    """存活探针：进程能处理请求即返回200，不依赖模型"""
+    return {"status": "ok"}
+
+
+@app.get("/api/health/ready")
+async def readiness_check():
+    """就绪探针：模型加载并预热完成时返回200，否则返回503（附带加载状态）"""
+    if analyzer is None:
+        return JSONResponse(status_code=503, content={"status": "not_ready", "model": model_loader.stats()},
+                            headers={"Retry-After": str(MODEL_LOADING_RETRY_AFTER)})
+    return {"status": "ready", "model": model_loader.stats()}
+
 
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """获取缓存命中率和占用"""
+    return {
+        "report_cache": report_cache.stats(),
+        "columnar_cache": columnar_cache.stats(),
+        "sentence_cache": sentence_cache.stats() if sentence_cache is not None else None,
+        "explanation_cache": explanation_cache.stats() if explanation_cache is not None else None
+    }
+
+
+@app.get("/api/models")
+async def list_models():
+    """可选择的模型、默认模型、已加载模型的内存占用和内存预算"""
+    return {
+        "default": DEFAULT_SERVED_MODEL,
+        "models": sorted(_served_models()),
+        "registry": model_registry.stats()
+    }
+
+
+@app.get("/api/metrics")
+async def get_metrics():
+    """Prometheus文本格式的性能指标：推理各阶段、结果读写、响应编码、缓存、任务和接口延迟"""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
 
 @app.get("/api/tickers")
 async def get_tickers():
     """获取所有可用的股票代码"""
     try:
-        # 扫描processed目录寻找所有公司文件夹
-        company_dirs = glob.glob(os.path.join(PROCESSED_DATA_DIR, "*"))
-        company_dirs = [d for d in company_dirs if os.path.isdir(d)]
-        
-        tickers = [os.path.basename(d) for d in company_dirs]
+        catalog.refresh()
+        tickers = catalog.tickers()
         logger.info(f"找到 {len(tickers)} 个股票代码")
         
-        return {"tickers": sorted(tickers)}
+        return {"tickers": tickers}
     except Exception as e:
         logger.error(f"获取股票代码时出错: {str(e)}")
         raise HTTPException(status_code=500, detail=f"获取股票代码时出错: {str(e)}")
@@ -94,40 +474,19 @@ async def get_tickers():
 async def get_reports(ticker: Optional[str] = None):
     """获取所有可用的报告列表"""
     try:
+        catalog.refresh()
         reports = []
         
-        # 扫描processed目录寻找所有公司文件夹
-        company_dirs = glob.glob(os.path.join(PROCESSED_DATA_DIR, "*"))
-        company_dirs = [d for d in company_dirs if os.path.isdir(d)]
-        
-        # 如果指定了股票代码，只处理对应公司
-        if ticker:
-            company_dirs = [d for d in company_dirs if os.path.basename(d) == ticker]
-        
-        for company_dir in company_dirs:
-            ticker_name = os.path.basename(company_dir)
-            
-            # 获取该公司的所有年份目录
-            year_dirs = glob.glob(os.path.join(company_dir, "*"))
-            year_dirs = [d for d in year_dirs if os.path.isdir(d)]
-            
-            for year_dir in year_dirs:
-                year_value = os.path.basename(year_dir)
-                
-                # 确定可用的章节
-                sections = []
-                for item_name in ["Item_1", "Item_1A", "Item_7", "Item_7A"]:
-                    item_file = os.path.join(year_dir, f"{item_name}.txt")
-                    if os.path.exists(item_file) and os.path.getsize(item_file) > 0:
-                        sections.append(item_name)
-                
-                # 只有当至少有一个章节可用时才添加报告
-                if sections:
-                    reports.append({
-                        "ticker": ticker_name,
-                        "date": year_value,
-                        "sections": sections
-                    })
+        for report in catalog.reports(ticker):
+            # 只有当至少有一个非空章节时才添加报告
+            sections = [name for name, size in report['sections'].items() if size > 0]
+            if sections:
+                reports.append({
+                    "ticker": report['ticker'],
+                    "date": report['date'],
+                    "sections": sections,
+                    "analyzed": report['analyzed']
+                })
         
         logger.info(f"找到 {len(reports)} 个报告")
         return {"reports": reports}
@@ -136,85 +495,243 @@ async def get_reports(ticker: Optional[str] = None):
         raise HTTPException(status_code=500, detail=f"获取报告列表时出错: {str(e)}")
 
 
+def _load_sections_content(ticker: str, date: str) -> Dict[str, str]:
+    """读取报告各章节的处理后文本，未找到时抛出404"""
+    report_key = f"{ticker}_{date}"
+    processed_dir = os.path.join(PROCESSED_DATA_DIR, ticker, date)
+    
+    if not os.path.exists(processed_dir):
+        raise HTTPException(status_code=404, detail=f"未找到处理后的报告: {report_key}")
+    
+    # 读取所有章节文件
+    sections_content = {}
+    for item_name in ["Item_1", "Item_1A", "Item_7", "Item_7A"]:
+        item_file = os.path.join(processed_dir, f"{item_name}.txt")
+        if os.path.exists(item_file) and os.path.getsize(item_file) > 0:
+            try:
+                with open(item_file, 'r', encoding='utf-8', errors='replace') as f:
+                    content = f.read()
+                    if content and len(content.strip()) > 10:  # 过滤空文件
+                        sections_content[item_name] = content
+            except Exception as e:
+                logger.error(f"读取文件 {item_file} 出错: {str(e)}")
+    
+    if not sections_content:
+        raise HTTPException(status_code=404, detail=f"未找到有效的章节内容: {report_key}")
+    
+    return sections_content
+
+
+def _load_section_inputs(ticker: str, date: str, sections_content: Dict[str, str], model: str = DEFAULT_SERVED_MODEL
+                         ) -> Tuple[Dict[str, List[Tuple[int, int]]], Dict[str, TokenizedSentences]]:
+    """
+    读取预处理阶段保存的分句结果和当前模型分词器的预分词结果
+    
+    分句结果缺失或与章节文本不对应的章节现场分句；没有对应预分词结果的章节在分析时分词。
+    
+    Returns:
+        (章节名到句子起止位置列表的映射, 章节名到预分词句子的映射)
+    """
+    report_dir = os.path.join(PROCESSED_DATA_DIR, ticker, date)
+    segments = segment_sections(sections_content, report_dir)
+    sentences = {name: sentences_from_spans(text, segments[name]) for name, text in sections_content.items()}
+    return segments, load_tokenized_inputs(report_dir, _get_analyzer(model).tokenizer_key, sentences)
+
+
+def _load_stored_result(ticker: str, date: str, model: str = DEFAULT_SERVED_MODEL) -> Optional[Dict]:
+    """读取模型已保存的报告分析结果（优先使用进程内缓存），没有结果时返回None"""
+    store, _, _ = _results_for(model)
+    result_file = store.result_path(f"{ticker}_{date}")
+    if result_file is None:
+        return None
+    return report_cache.get(result_file, loader=store.load_path)
+
+
+def _save_analysis_result(result: Dict, model: str = DEFAULT_SERVED_MODEL):
+    """
+    原子地保存报告分析结果到模型的结果目录，并更新报告结果缓存和摘要索引
+    
+    目录清单中的 analyzed 只反映默认模型的结果。
+    """
+    store, index, results_dir = _results_for(model)
+    result_file = store.save(f"{result['ticker']}_{result['date']}", result)
+    report_cache.put(result_file, result)
+    if model == DEFAULT_SERVED_MODEL:
+        catalog.mark_analyzed(result['ticker'], result['date'])
+    if index is not None and index.upsert_result(result):
+        index.export_csv(os.path.join(results_dir, "sentiment_summary.csv"))
+
+
+def _plan_section_analysis(ticker: str, date: str, sections_content: Dict[str, str], force: bool = False,
+                           model: str = DEFAULT_SERVED_MODEL
+                           ) -> Tuple[Dict, Optional[Dict], Dict[str, Dict], Dict[str, str]]:
+    """
+    按章节文件的内容指纹和模型标识确定需要重新分析的章节
+    
+    Returns:
+        (本次输入的指纹, 上次结果（与本次输入完全对应时，否则为None）,
+         沿用上次结果的章节, 需要重新分析的章节内容)
+    """
+    fingerprint = build_fingerprint(_get_analyzer(model).model_id, 'sections', sections_content)
+    
+    previous = None
+    if not force:
+        try:
+            previous = _load_stored_result(ticker, date, model)
+        except (ValueError, KeyError) as e:
+            logger.warning(f"读取报告 {ticker}_{date} 的上次分析结果出错，将全部重新分析: {str(e)}")
+    if previous is None or not isinstance(previous.get('sections'), dict):
+        previous = {}
+    
+    previous_fingerprint = previous.get('fingerprint')
+    if is_unchanged(previous_fingerprint, fingerprint) and not force:
+        return fingerprint, previous, {}, {}
+    
+    reuse, rerun = plan_reanalysis(previous_fingerprint, fingerprint, force)
+    # 上次没有有效句子的章节不在结果中，沿用时同样省略
+    reused_sections = {name: previous['sections'][name] for name in reuse if name in previous['sections']}
+    return fingerprint, None, reused_sections, {name: sections_content[name] for name in rerun}
+
+
+def _build_report_result(ticker: str, date: str, sections_content: Dict[str, str],
+                         section_results: Dict[str, Dict], fingerprint: Dict) -> Dict:
+    """按原章节顺序组装报告结果并计算整体摘要"""
+    ordered = {name: section_results[name] for name in sections_content if name in section_results}
+    return {
+        'ticker': ticker,
+        'date': date,
+        'summary': analyzer.summarize_sections(ordered),
+        'sections': ordered,
+        'fingerprint': fingerprint
+    }
+
+
+def _run_analysis_job(job: AnalysisJob) -> Dict:
+    """在后台任务线程中分析报告并保存结果，提交时要求性能剖析的任务在剖析会话中执行"""
+    if not job.params.get('profile'):
+        return _analyze_report_job(job)
+    with _profile_session(f"report_{job.key}") as session:
+        result = _analyze_report_job(job)
+    job.profile_dir = session.directory
+    return result
+
+
+def _analyze_report_job(job: AnalysisJob) -> Dict:
+    """分析报告并保存结果，内容未变化的章节沿用上次的结果；每个章节完成后发布到任务，供流式接口推送"""
+    ticker = job.params['ticker']
+    date = job.params['date']
+    force = job.params.get('force', False)
+    model = job.params.get('model', DEFAULT_SERVED_MODEL)
+    report_key = f"{ticker}_{date}"
+    logger.info(f"开始实时分析报告: {report_key}，模型 {model} (任务 {job.job_id})")
+    
+    # 加载报告文本
+    sections_content = _load_sections_content(ticker, date)
+    
+    fingerprint, unchanged, reused_sections, changed_content = _plan_section_analysis(
+        ticker, date, sections_content, force, model)
+    if unchanged is not None:
+        logger.info(f"报告 {report_key} 的章节内容和模型均未变化，沿用已有结果")
+        for section_name, section_result in unchanged['sections'].items():
+            job.publish_section(section_name, section_result)
+        return unchanged
+    
+    # 内容未变化的章节直接发布上次的结果，其余章节逐个分析，按句子汇报进度
+    section_results = dict(reused_sections)
+    for section_name, section_result in reused_sections.items():
+        job.publish_section(section_name, section_result)
+    segments, tokens = _load_section_inputs(ticker, date, changed_content, model)
+    for section_name, section_result in _get_analyzer(model).iter_report_sections(
+            changed_content, progress_callback=job.update_progress, segments=segments, tokens=tokens):
+        section_results[section_name] = section_result
+        job.publish_section(section_name, section_result)
+    
+    result = _build_report_result(ticker, date, sections_content, section_results, fingerprint)
+    
+    # 保存结果
+    _save_analysis_result(result, model)
+    
+    logger.info(f"分析完成并保存: {report_key}（模型 {model}，沿用 {len(reused_sections)} 个章节，"
+                f"重新分析 {len(changed_content)} 个章节）")
+    return result
+
+
+def _submit_analysis(ticker: str, date: str, force: bool = False, profile: bool = False,
+                     model: str = DEFAULT_SERVED_MODEL) -> Tuple[AnalysisJob, bool]:
+    """
+    提交报告分析任务，同一报告、模型和force设置已有任务在进行时复用该任务（复用时不会另行剖析）
+    
+    force 计入去重键：增量分析进行中时提交的强制重新分析不会复用增量任务的结果。
+    非默认模型未加载时在任务线程中加载。
+    """
+    _require_analyzer()
+    if job_manager is None:
+        raise HTTPException(status_code=500, detail="任务管理器未初始化，无法进行实时分析")
+    
+    params = {'profile': True} if profile else {}
+    key = f"{ticker}_{date}" if model == DEFAULT_SERVED_MODEL else f"{ticker}_{date}@{model}"
+    if force:
+        key += "#force"
+    job, created = job_manager.submit(key, ticker=ticker, date=date, force=force, model=model, **params)
+    if not created:
+        logger.info(f"复用进行中的分析任务: {key} (任务 {job.job_id})")
+    return job, created
+
+
+def _stored_report_response(ticker: str, date: str, model: str = DEFAULT_SERVED_MODEL) -> Optional[JSONResponse]:
+    """已保存的报告结果的响应，没有结果或结果格式不符合要求（需要重新分析）时返回None"""
+    report_key = f"{ticker}_{date}"
+    try:
+        data = _load_stored_result(ticker, date, model)
+        if data is None:
+            return None
+        logger.info(f"加载报告数据: {report_key}")
+        # 检查数据结构是否符合API要求
+        if 'sections' not in data:
+            logger.warning(f"报告数据格式不符合要求，将重新分析: {report_key}")
+            return None
+        return _json_response(data, 'report')
+    except (ValueError, KeyError) as e:
+        logger.error(f"报告 {report_key} 的分析结果格式错误，将重新分析: {str(e)}")
+        return None
+
+
 @app.get("/api/report/{ticker}/{date}")
-async def get_report_data(ticker: str, date: str, analyze: bool = False):
+async def get_report_data(request: Request, ticker: str, date: str, analyze: bool = False, force: bool = False,
+                          profile: bool = False, model: Optional[str] = None):
     """
     获取特定报告的详细数据
     
     Args:
         ticker: 股票代码
         date: 报告日期
-        analyze: 是否强制重新分析 (默认False)
+        analyze: 是否重新分析 (默认False)，只重新分析内容或模型发生变化的章节
+        force: 重新分析时忽略上次的结果，全部章节重新推理 (默认False)
+        profile: 对本次请求做性能剖析 (默认False，也可使用请求头 X-Profile: 1)，
+                 剖析结果目录通过响应头 X-Profile-Dir 返回
+        model: 使用的模型名称（见 /api/models，默认为 DEFAULT_SERVED_MODEL），各模型的结果分别保存
     """
+    profile = _profiling_requested(request, profile)
+    model = _check_model(model)
     try:
         report_key = f"{ticker}_{date}"
         logger.info(f"获取报告数据: {report_key}")
         
-        # 检查分析结果是否已存在
-        result_file = os.path.join(RESULTS_DIR, f"{report_key}_analysis.json")
-        
-        if os.path.exists(result_file) and not analyze:
-            # 读取已有的分析结果
-            try:
-                with open(result_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    logger.info(f"从文件加载报告数据: {report_key}")
-                    # 检查数据结构是否符合API要求
-                    if 'sections' not in data:
-                        logger.warning(f"报告数据格式不符合要求，将重新分析: {report_key}")
-                        analyze = True
-                    else:
-                        return data
-            except json.JSONDecodeError:
-                logger.error(f"分析结果文件 {result_file} 格式错误，将重新分析")
-                analyze = True
-        
-        # 如果结果不存在或需要重新分析
-        if analyzer is None:
-            raise HTTPException(status_code=500, detail="模型未加载，无法进行实时分析")
-        
-        logger.info(f"开始实时分析报告: {report_key}")
-        
-        # 加载报告文本
-        processed_dir = os.path.join(PROCESSED_DATA_DIR, ticker, date)
-        
-        if not os.path.exists(processed_dir):
-            raise HTTPException(status_code=404, detail=f"未找到处理后的报告: {report_key}")
-        
-        # 读取所有章节文件
-        sections_content = {}
-        for item_name in ["Item_1", "Item_1A", "Item_7", "Item_7A"]:
-            item_file = os.path.join(processed_dir, f"{item_name}.txt")
-            if os.path.exists(item_file) and os.path.getsize(item_file) > 0:
-                try:
-                    with open(item_file, 'r', encoding='utf-8', errors='replace') as f:
-                        content = f.read()
-                        if content and len(content.strip()) > 10:  # 过滤空文件
-                            sections_content[item_name] = content
-                except Exception as e:
-                    logger.error(f"读取文件 {item_file} 出错: {str(e)}")
+        # 读取已有的分析结果（优先使用进程内缓存），不涉及推理，剖析时只采样调用栈
+        if not analyze and not force:
+            session = _profile_session(f"report_{report_key}", torch_trace=False) if profile else None
+            with session or nullcontext():
+                response = _stored_report_response(ticker, date, model)
+            if response is not None:
+                if session is not None and session.directory is not None:
+                    response.headers['X-Profile-Dir'] = session.directory
+                return response
         
-        if not sections_content:
-            raise HTTPException(status_code=404, detail=f"未找到有效的章节内容: {report_key}")
-        
-        # 使用新增的章节分析方法
-        analysis_result = analyzer.analyze_report_sections(sections_content)
-        
-        # 添加报告基本信息
-        result = {
-            'ticker': ticker,
-            'date': date,
-            'summary': analysis_result['summary'],
-            'sections': analysis_result['sections']
-        }
-        
-        # 保存结果
-        os.makedirs(RESULTS_DIR, exist_ok=True)
-        with open(result_file, 'w', encoding='utf-8') as f:
-            json.dump(result, f, ensure_ascii=False, indent=2)
-        
-        logger.info(f"分析完成并保存: {report_key}")
-        return result
+        # 如果结果不存在或需要重新分析：提交后台任务并等待，
+        # 同一报告的并发请求共享同一个任务；shield避免单个请求取消时连带取消共享任务
+        job, _ = _submit_analysis(ticker, date, force, profile, model)
+        result = await asyncio.shield(asyncio.wrap_future(job.future))
+        return _json_response(result, 'report', job.profile_dir if profile else None)
         
     except Exception as e:
         if isinstance(e, HTTPException):
@@ -223,83 +740,234 @@ async def get_report_data(ticker: str, date: str, analyze: bool = False):
         raise HTTPException(status_code=500, detail=f"获取报告数据时出错: {str(e)}")
 
 
+@app.post("/api/report/{ticker}/{date}/analyze", status_code=202)
+async def submit_report_analysis(request: Request, ticker: str, date: str, force: bool = False,
+                                 profile: bool = False, model: Optional[str] = None):
+    """
+    提交后台分析任务，立即返回任务ID
+    
+    同一报告已有任务在排队或运行时不会重复分析，直接返回该任务（created为False）。
+    默认只重新分析内容或模型发生变化的章节，force为True时全部重新推理。
+    要求性能剖析时，任务完成后剖析结果目录见任务状态中的 profile_dir。
+    model 选择模型（默认为 DEFAULT_SERVED_MODEL），结果保存在该模型的结果目录。
+    """
+    model = _check_model(model)
+    if not os.path.isdir(os.path.join(PROCESSED_DATA_DIR, ticker, date)):
+        raise HTTPException(status_code=404, detail=f"未找到处理后的报告: {ticker}_{date}")
+    
+    job, created = _submit_analysis(ticker, date, force, _profiling_requested(request, profile), model)
+    return {**job.to_dict(), "created": created}
+
+
+@app.get("/api/jobs")
+async def list_jobs():
+    """获取后台分析任务列表"""
+    if job_manager is None:
+        return {"jobs": []}
+    return {"jobs": [job.to_dict() for job in job_manager.list_jobs()]}
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """查询后台分析任务的状态和进度"""
+    job = job_manager.get(job_id) if job_manager is not None else None
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"未找到任务: {job_id}")
+    return job.to_dict()
+
+
+def _format_stream_event(event: str, payload: Dict, stream_format: str) -> str:
+    """把事件编码为NDJSON行或Server-Sent Events消息"""
+    if stream_format == "sse":
+        return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+    return json.dumps({"event": event, **payload}, ensure_ascii=False) + "\n"
+
+
+@app.get("/api/report/{ticker}/{date}/stream")
+async def stream_report_data(ticker: str, date: str, analyze: bool = False, force: bool = False,
+                             format: str = "ndjson", model: Optional[str] = None):
+    """
+    流式获取报告分析结果，每完成一个章节就推送该章节的句子结果
+    
+    事件依次为 start（章节列表）、section（每个章节一条）、summary（整体摘要），
+    出错时推送 error 事件。实时分析由后台任务执行并在结束时保存结果，同一报告的并发请求共享该任务。
+    
+    Args:
+        ticker: 股票代码
+        date: 报告日期
+        analyze: 是否重新分析 (默认False)，内容未变化的章节直接推送上次的结果
+        force: 重新分析时忽略上次的结果，全部章节重新推理 (默认False)
+        format: 输出格式，'ndjson'（默认）或 'sse'
+        model: 使用的模型名称（默认为 DEFAULT_SERVED_MODEL）
+    """
+    if format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail=f"不支持的流格式: {format}")
+    model = _check_model(model)
+    
+    report_key = f"{ticker}_{date}"
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    
+    # 已有分析结果时直接按章节推送
+    if not analyze and not force:
+        try:
+            data = _load_stored_result(ticker, date, model)
+            if data is not None and 'sections' in data:
+                def stored_stream():
+                    yield _format_stream_event("start", {"ticker": ticker, "date": date,
+                                                         "sections": list(data['sections'])}, format)
+                    for section_name, section_result in data['sections'].items():
+                        yield _format_stream_event("section", {"section": section_name, "data": section_result}, format)
+                    yield _format_stream_event("summary", {"ticker": ticker, "date": date,
+                                                           "summary": data.get('summary', {})}, format)
+                return StreamingResponse(stored_stream(), media_type=media_type)
+        except (ValueError, KeyError) as e:
+            logger.error(f"报告 {report_key} 的分析结果格式错误，将重新分析: {str(e)}")
+    
+    sections_content = _load_sections_content(ticker, date)
+    
+    # 分析通过后台任务执行（与报告接口和提交分析接口共享同一个任务，不会重复分析或并发写入同一报告），
+    # 流式接口订阅任务发布的章节结果
+    job, created = _submit_analysis(ticker, date, force, model=model)
+    logger.info(f"开始流式分析报告: {report_key}（任务 {job.job_id}，{'新建' if created else '复用'}）")
+    
+    # 同步生成器由StreamingResponse放到线程池中迭代，不阻塞事件循环；
+    # 客户端断开只结束订阅，任务继续运行并保存结果
+    def analysis_stream():
+        yield _format_stream_event("start", {"ticker": ticker, "date": date,
+                                             "sections": list(sections_content)}, format)
+        sent = 0
+        finished = False
+        while not finished:
+            sections, finished = job.wait_sections(sent)
+            for section_name, section_result in sections:
+                yield _format_stream_event("section", {"section": section_name, "data": section_result}, format)
+            sent += len(sections)
+        
+        if job.status == 'failed':
+            logger.error(f"流式分析报告 {report_key} 时出错: {job.error}")
+            yield _format_stream_event("error", {"detail": f"分析报告时出错: {job.error}"}, format)
+            return
+        result = job.future.result()
+        yield _format_stream_event("summary", {"ticker": ticker, "date": date,
+                                               "summary": result['summary']}, format)
+    
+    return StreamingResponse(analysis_stream(), media_type=media_type)
+
+
 @app.get("/api/summary")
-async def get_summary(ticker: Optional[str] = None):
-    """获取所有报告的情感分析摘要"""
+async def get_summary(ticker: Optional[str] = None, model: Optional[str] = None):
+    """获取所有报告的情感分析摘要（从模型的摘要索引中查询，默认为 DEFAULT_SERVED_MODEL）"""
+    model = _check_model(model)
     try:
-        # 直接从分析结果生成摘要
-        summary_data = []
-        
-        # 查找所有分析结果
-        result_files = glob.glob(os.path.join(RESULTS_DIR, "*_analysis.json"))
-        
-        for result_file in result_files:
-            try:
-                with open(result_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
-                if not isinstance(data, dict) or 'ticker' not in data or 'date' not in data:
-                    continue
-                
-                # 如果指定了ticker，跳过不匹配的
-                if ticker and data['ticker'] != ticker:
-                    continue
-                
-                # 计算主要情感
-                if 'summary' in data:
-                    summary = data['summary']
-                    
-                    # 确定主要情感
-                    main_sentiment = "neutral"
-                    if summary.get('positive_ratio', 0) > summary.get('neutral_ratio', 0) and summary.get('positive_ratio', 0) > summary.get('negative_ratio', 0):
-                        main_sentiment = "positive"
-                    elif summary.get('negative_ratio', 0) > summary.get('neutral_ratio', 0) and summary.get('negative_ratio', 0) > summary.get('positive_ratio', 0):
-                        main_sentiment = "negative"
-                    
-                    summary_data.append({
-                        'ticker': data['ticker'],
-                        'date': data['date'],
-                        'main_sentiment': main_sentiment,
-                        'positive_ratio': summary.get('positive_ratio', 0),
-                        'neutral_ratio': summary.get('neutral_ratio', 0),
-                        'negative_ratio': summary.get('negative_ratio', 0),
-                        'positive_count': summary.get('positive_count', 0),
-                        'neutral_count': summary.get('neutral_count', 0),
-                        'negative_count': summary.get('negative_count', 0)
-                    })
-            except Exception as e:
-                logger.error(f"处理结果文件 {result_file} 时出错: {str(e)}")
+        _, index, _ = _results_for(model)
+        if index is None:
+            raise HTTPException(status_code=500, detail="摘要索引未初始化")
         
-        # 保存摘要
-        if summary_data:
-            summary_file = os.path.join(RESULTS_DIR, "sentiment_summary.csv")
-            df = pd.DataFrame(summary_data)
-            df.to_csv(summary_file, index=False, encoding='utf-8')
+        summary_data = index.query(ticker)
         
         logger.info(f"返回 {len(summary_data)} 条摘要数据")
         return {"summary": summary_data}
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"获取摘要数据时出错: {str(e)}")
         raise HTTPException(status_code=500, detail=f"获取摘要数据时出错: {str(e)}")
 
 
 @app.get("/api/report/{ticker}/{date}/section/{section}")
-async def get_section_data(ticker: str, date: str, section: str):
-    """获取特定章节的详细数据"""
+async def get_section_data(ticker: str, date: str, section: str, offset: int = 0, limit: Optional[int] = None,
+                           label: Optional[str] = None, min_confidence: Optional[float] = None,
+                           sort_by: Optional[str] = None, order: str = "desc", model: Optional[str] = None):
+    """
+    获取特定章节的详细数据，句子支持分页、筛选和排序
+    
+    列式格式的结果只读取该章节的标签/概率数组完成筛选排序，并只解码当前页的句子文本；
+    JSON格式的结果使用随结果保存的章节索引，同样只读取当前页的句子。
+    
+    Args:
+        ticker: 股票代码
+        date: 报告日期
+        section: 章节名
+        offset: 跳过的句子数
+        limit: 返回的句子数上限，None表示全部
+        label: 只返回该标签的句子
+        min_confidence: 预测标签置信度的下限
+        sort_by: 按某一类别的概率（positive/neutral/negative）或置信度（confidence）排序，默认保持原文顺序
+        order: 排序方向，'desc'（默认）或 'asc'
+        model: 使用的模型名称（默认为 DEFAULT_SERVED_MODEL）
+    """
+    model = _check_model(model)
+    if offset < 0 or (limit is not None and limit < 1):
+        raise HTTPException(status_code=400, detail="offset不能为负数，limit必须为正整数")
+    if label is not None and label not in LABELS:
+        raise HTTPException(status_code=400, detail=f"不支持的标签: {label}，可选: {', '.join(LABELS)}")
+    if sort_by is not None and sort_by not in SORT_KEYS:
+        raise HTTPException(status_code=400, detail=f"不支持的排序键: {sort_by}，可选: {', '.join(SORT_KEYS)}")
+    if order not in ("desc", "asc"):
+        raise HTTPException(status_code=400, detail=f"不支持的排序方向: {order}")
+    
     try:
         report_key = f"{ticker}_{date}"
         logger.info(f"获取章节数据: {report_key}/{section}")
+        end = offset + limit if limit is not None else None
         
-        # 从完整报告中提取章节数据
-        report_data = await get_report_data(ticker, date)
+        # 还没有分析结果时先完成分析（结果随后按配置的格式保存）
+        store, _, _ = _results_for(model)
+        result_file = store.result_path(report_key)
+        if result_file is None:
+            job, _ = _submit_analysis(ticker, date, model=model)
+            await asyncio.shield(asyncio.wrap_future(job.future))
+            result_file = store.result_path(report_key)
         
-        if section not in report_data.get("sections", {}):
-            raise HTTPException(status_code=404, detail=f"未找到章节: {section}")
+        if result_file is not None and os.path.basename(result_file) == META_FILENAME:
+            # 列式格式：用标签/概率数组筛选排序，只解码当前页
+            result = columnar_cache.get(result_file, loader=lambda path: ColumnarResult(os.path.dirname(path)))
+            section_meta = result.meta.get('sections', {}).get(section)
+            rows = result.query_rows(section, label=label, min_confidence=min_confidence,
+                                     sort_by=sort_by, descending=order == "desc")
+            if section_meta is None or rows is None:
+                raise HTTPException(status_code=404, detail=f"未找到章节: {section}")
+            total = len(rows)
+            section_data = {k: v for k, v in section_meta.items() if k != 'sentences'}
+            section_data['sentences'] = result.records(rows[offset:end])
+        else:
+            # JSON格式：用章节索引的标签/概率数组筛选排序，只读取并解析当前页句子在文件中的字节范围
+            page = None
+            index = columnar_cache.get(result_file, loader=JsonSectionIndex.open) if result_file is not None else None
+            if index is not None:
+                section_meta = index.section_meta(section)
+                rows = index.query_rows(section, label=label, min_confidence=min_confidence,
+                                        sort_by=sort_by, descending=order == "desc")
+                if section_meta is None or rows is None:
+                    raise HTTPException(status_code=404, detail=f"未找到章节: {section}")
+                page = index.records(rows[offset:end])
+            elif result_file is not None:
+                # 没有索引（早于章节索引保存或自定义标签的结果）时不缓存，下次重新检查
+                columnar_cache.invalidate(result_file)
+            
+            if page is not None:
+                total = len(rows)
+                section_data = dict(section_meta)
+                section_data['sentences'] = page
+            else:
+                # 没有可用的索引：从完整报告中提取章节数据后筛选
+                report_data = _load_stored_result(ticker, date, model) or {}
+                if section not in report_data.get("sections", {}):
+                    raise HTTPException(status_code=404, detail=f"未找到章节: {section}")
+                section_data = dict(report_data["sections"][section])
+                sentences = query_sentences(section_data.get('sentences', []), label=label,
+                                            min_confidence=min_confidence, sort_by=sort_by,
+                                            descending=order == "desc")
+                total = len(sentences)
+                section_data['sentences'] = sentences[offset:end]
         
         return {
             "section": section,
-            "data": report_data["sections"][section]
+            "data": section_data,
+            "total": total,
+            "offset": offset,
+            "limit": limit
         }
     except HTTPException:
         raise
@@ -308,21 +976,41 @@ async def get_section_data(ticker: str, date: str, section: str):
         raise HTTPException(status_code=500, detail=f"获取章节数据时出错: {str(e)}")
 
 
+def _analyze_text_profiled(model, text: str) -> Tuple[Dict, Optional[str]]:
+    """在剖析会话中单独推理一个文本（不经过微批调度器，trace只包含本次请求）"""
+    with _profile_session("analyze_text") as session:
+        result = model.analyze_batch([text])[0]
+    return result, session.directory
+
+
 @app.get("/api/analyze-text")
-async def analyze_text(text: str):
-    """分析单个文本的情感"""
+async def analyze_text(request: Request, text: str, profile: bool = False, model: Optional[str] = None):
+    """
+    分析单个文本的情感（profile=true 或请求头 X-Profile: 1 时对本次请求做性能剖析）
+    
+    model 选择模型（默认为 DEFAULT_SERVED_MODEL），未加载的模型先在线程池中加载。
+    """
     try:
         if not text or len(text.strip()) < 5:
             raise HTTPException(status_code=400, detail="文本过短，请提供更长的文本")
             
-        if analyzer is None:
-            raise HTTPException(status_code=500, detail="模型未加载，无法进行分析")
+        model = _check_model(model)
+        _require_analyzer()
+        if text_scheduler is None:
+            raise HTTPException(status_code=500, detail="推理调度器未启动，无法进行分析")
+        
+        loop = asyncio.get_running_loop()
+        selected = analyzer if model == DEFAULT_SERVED_MODEL else await loop.run_in_executor(None, _get_analyzer, model)
             
-        # 进行情感分析
-        result = analyzer.analyze_text(text)
+        if _profiling_requested(request, profile):
+            result, profile_dir = await loop.run_in_executor(None, _analyze_text_profiled, selected, text)
+            return _json_response(result, 'analyze_text', profile_dir)
+        
+        # 提交到微批调度器，与并发请求（包括其他模型的请求）合并推理
+        result = await text_scheduler.submit((selected, text))
         
         logger.info(f"分析单个文本: '{text[:50]}...'")
-        return result
+        return _json_response(result, 'analyze_text')
     except HTTPException:
         raise
     except Exception as e:
@@ -330,6 +1018,89 @@ async def analyze_text(text: str):
         raise HTTPException(status_code=500, detail=f"分析文本时出错: {str(e)}")
 
 
+async def _explain_texts(texts: List[str], target: Optional[str], model: str) -> List[Dict]:
+    """通过解释调度器计算句子的逐token归因（与并发的解释请求合并推理）"""
+    _require_analyzer()
+    if explain_scheduler is None:
+        raise HTTPException(status_code=500, detail="推理调度器未启动，无法进行分析")
+    selected = analyzer
+    if model != DEFAULT_SERVED_MODEL:
+        selected = await asyncio.get_running_loop().run_in_executor(None, _get_analyzer, model)
+    # 可解释的类别取决于模型的标签映射
+    if target is not None and target not in selected.label2id:
+        raise HTTPException(status_code=400,
+                            detail=f"模型 {model} 不支持的类别: {target}，可选: {', '.join(map(str, selected.label2id))}")
+    return await explain_scheduler.submit((selected, texts, target))
+
+
+@app.get("/api/explain")
+async def explain_text(text: str, target: Optional[str] = None, model: Optional[str] = None):
+    """
+    解释单个句子的情感：返回逐token的遮挡归因（正值表示该token支持目标类别）
+
+    Args:
+        text: 要解释的句子
+        target: 解释的类别（模型的标签名），默认为预测类别
+        model: 使用的模型名称（默认为 DEFAULT_SERVED_MODEL）
+    """
+    try:
+        if not text or len(text.strip()) < 5:
+            raise HTTPException(status_code=400, detail="文本过短，请提供更长的文本")
+        model = _check_model(model)
+        
+        result = (await _explain_texts([text], target, model))[0]
+        
+        logger.info(f"解释单个文本: '{text[:50]}...'")
+        return _json_response(result, 'explain')
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"解释文本时出错: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"解释文本时出错: {str(e)}")
+
+
+@app.get("/api/report/{ticker}/{date}/section/{section}/explain")
+async def explain_section(ticker: str, date: str, section: str, top_k: int = 10, target: str = "negative",
+                          model: Optional[str] = None):
+    """
+    批量解释章节中目标类别概率最高的 top_k 个句子（默认最负面的句子），一次推理完成
+
+    Args:
+        ticker: 股票代码
+        date: 报告日期
+        section: 章节名
+        top_k: 解释的句子数（不超过 EXPLANATION_MAX_TOP_K）
+        target: 选句和解释的类别（negative/neutral/positive）
+        model: 使用的模型名称（默认为 DEFAULT_SERVED_MODEL）
+    """
+    if top_k < 1 or top_k > EXPLANATION_MAX_TOP_K:
+        raise HTTPException(status_code=400, detail=f"top_k必须在1到{EXPLANATION_MAX_TOP_K}之间")
+    if target not in LABELS:
+        raise HTTPException(status_code=400, detail=f"不支持的类别: {target}，可选: {', '.join(LABELS)}")
+    
+    # 复用章节查询：按目标类别概率降序取前 top_k 个句子（列式格式只解码这些句子的文本）
+    page = await get_section_data(ticker, date, section, limit=top_k, sort_by=target, model=model)
+    sentences = page['data'].get('sentences', [])
+    
+    try:
+        explanations = []
+        if sentences:
+            explanations = await _explain_texts([row['text'] for row in sentences], target, _check_model(model))
+        
+        logger.info(f"解释章节句子: {ticker}_{date}/{section}，{len(explanations)} 个句子")
+        return _json_response({
+            "section": section,
+            "target": target,
+            "total": page['total'],
+            "explanations": explanations
+        }, 'explain_section')
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"解释章节句子时出错: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"解释章节句子时出错: {str(e)}")
+
+
 # 如果直接运行此文件
 if __name__ == "__main__":
     uvicorn.run("app:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,130 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+
+class MicroBatchScheduler:
+    """把并发的单条推理请求合并成批，在独立的工作线程中执行模型推理"""
+
+    def __init__(self, batch_fn: Callable[[List[Any]], List[Any]], max_batch_size: int = 32,
+                 max_wait_ms: float = 10.0, name: str = "inference"):
+        """
+        初始化微批调度器
+
+        Args:
+            batch_fn: 批量推理函数，输入请求列表，返回等长的结果列表
+            max_batch_size: 每批最多合并的请求数
+            max_wait_ms: 收到第一条请求后最多等待凑批的毫秒数
+            name: 工作线程名前缀
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        # 单线程执行推理，避免阻塞事件循环，也避免多个批次争抢CPU
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+
+        self.batches = 0
+        self.items = 0
+
+    def start(self):
+        """在当前事件循环中启动调度任务"""
+        if self._task is not None and not self._task.done():
+            return
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """停止调度任务，尚未处理的请求以异常结束"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, future = self._queue.get_nowait()
+                if not future.done():
+                    future.set_exception(RuntimeError("推理调度器已停止"))
+
+        self._executor.shutdown(wait=False)
+
+    async def submit(self, item: Any) -> Any:
+        """
+        提交单条请求并等待其结果
+
+        Args:
+            item: 单条推理输入
+
+        Returns:
+            该请求对应的推理结果
+        """
+        if self._task is None:
+            self.start()
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect_batch(self) -> List:
+        """取出第一条请求后，在等待时间内尽量凑满一批"""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            # 已在队列中的请求直接取出，不再等待
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self):
+        """调度主循环"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect_batch()
+            # 跳过调用方已取消的请求
+            batch = [(item, future) for item, future in batch if not future.cancelled()]
+            if not batch:
+                continue
+
+            items = [item for item, _ in batch]
+            try:
+                results = await loop.run_in_executor(self._executor, self.batch_fn, items)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.items += len(items)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def stats(self) -> Dict:
+        """返回调度统计"""
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'avg_batch_size': self.items / self.batches if self.batches > 0 else 0,
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0
+        }
@@ -0,0 +1,180 @@
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class AnalysisJob:
+    """一次后台报告分析任务"""
+
+    def __init__(self, key: str, params: Dict[str, Any]):
+        self.job_id = uuid.uuid4().hex
+        self.key = key
+        self.params = params
+        self.status = 'queued'
+        self.done = 0
+        self.total = 0
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.profile_dir: Optional[str] = None
+        self.future: Optional[Future] = None
+        # 已完成的章节结果（按完成顺序），流式接口订阅
+        self.sections: List[Tuple[str, Dict]] = []
+        self._condition = threading.Condition()
+
+    def update_progress(self, done: int, total: int):
+        """更新进度（已完成句子数 / 句子总数）"""
+        self.done = done
+        self.total = total
+
+    def publish_section(self, name: str, result: Dict):
+        """发布一个已完成章节的结果，唤醒等待的订阅者"""
+        with self._condition:
+            self.sections.append((name, result))
+            self._condition.notify_all()
+
+    def wait_sections(self, start: int, timeout: Optional[float] = None) -> Tuple[List[Tuple[str, Dict]], bool]:
+        """
+        等待第 start 个之后的章节结果或任务结束
+
+        Args:
+            start: 订阅者已收到的章节数
+            timeout: 最长等待秒数，None表示一直等待
+
+        Returns:
+            (新完成的章节列表, 任务是否已结束)；任务结束时返回的列表包含剩余的全部章节
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: len(self.sections) > start or self.finished, timeout)
+            return self.sections[start:], self.finished
+
+    def _notify_finished(self):
+        with self._condition:
+            self._condition.notify_all()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ('completed', 'failed')
+
+    def to_dict(self) -> Dict:
+        """任务状态的可序列化表示"""
+        return {
+            'job_id': self.job_id,
+            'key': self.key,
+            'params': self.params,
+            'status': self.status,
+            'progress': {
+                'done': self.done,
+                'total': self.total,
+                'ratio': self.done / self.total if self.total > 0 else 0
+            },
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'profile_dir': self.profile_dir
+        }
+
+
+class AnalysisJobManager:
+    """
+    有界线程池执行的后台分析任务队列
+
+    相同键（同一份报告）的任务在运行期间只会执行一次，
+    重复提交会直接返回正在排队或运行中的任务（single-flight）。
+    """
+
+    def __init__(self, run_fn: Callable[[AnalysisJob], Any], max_workers: int = 2, max_finished_jobs: int = 200):
+        """
+        初始化任务管理器
+
+        Args:
+            run_fn: 执行任务的函数，接收任务对象，返回任务结果
+            max_workers: 同时运行的任务数
+            max_finished_jobs: 保留的已结束任务数量，超出后丢弃最早的任务记录
+        """
+        self.run_fn = run_fn
+        self.max_workers = max_workers
+        self.max_finished_jobs = max_finished_jobs
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis-job")
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, AnalysisJob]" = OrderedDict()
+        self._active: Dict[str, AnalysisJob] = {}
+
+    def submit(self, key: str, **params) -> Tuple[AnalysisJob, bool]:
+        """
+        提交任务
+
+        Args:
+            key: 去重键，键相同且尚未结束的任务会被复用
+            **params: 传给执行函数的任务参数
+
+        Returns:
+            (任务对象, 是否新建了任务)
+        """
+        with self._lock:
+            existing = self._active.get(key)
+            if existing is not None:
+                return existing, False
+
+            job = AnalysisJob(key, params)
+            self._jobs[job.job_id] = job
+            self._active[key] = job
+            job.future = self._executor.submit(self._run, job)
+            return job, True
+
+    def _run(self, job: AnalysisJob) -> Any:
+        """在工作线程中执行任务"""
+        job.status = 'running'
+        job.started_at = time.time()
+        try:
+            result = self.run_fn(job)
+            job.status = 'completed'
+            return result
+        except Exception as e:
+            job.error = getattr(e, 'detail', None) or str(e)
+            job.status = 'failed'
+            raise
+        finally:
+            job.finished_at = time.time()
+            job._notify_finished()
+            with self._lock:
+                if self._active.get(job.key) is job:
+                    del self._active[job.key]
+                self._prune()
+
+    def _prune(self):
+        """丢弃超出保留数量的最早已结束任务（调用方需持有锁）"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[AnalysisJob]:
+        """按任务ID查询任务"""
+        return self._jobs.get(job_id)
+
+    def list_jobs(self) -> List[AnalysisJob]:
+        """返回所有保留的任务，最新的在前"""
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def stats(self) -> Dict:
+        """返回任务统计"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return {
+            'queued': sum(1 for job in jobs if job.status == 'queued'),
+            'running': sum(1 for job in jobs if job.status == 'running'),
+            'completed': sum(1 for job in jobs if job.status == 'completed'),
+            'failed': sum(1 for job in jobs if job.status == 'failed'),
+            'max_workers': self.max_workers
+        }
+
+    def shutdown(self):
+        """停止接收新任务，不等待正在运行的任务"""
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,75 @@
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class BackgroundModelLoader:
+    """
+    在独立线程中加载模型，服务在加载期间照常接受请求
+
+    状态依次为 pending（未开始）、loading（加载中）、ready（加载和预热完成）或 failed（加载失败）。
+    """
+
+    def __init__(self, load_fn: Callable[[], Any], name: str = "model-loader"):
+        """
+        Args:
+            load_fn: 加载（并预热）模型的函数，返回模型对象，在加载线程中执行
+            name: 加载线程名前缀
+        """
+        self.load_fn = load_fn
+        self.name = name
+        self.state = 'pending'
+        self.model = None
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, on_ready: Optional[Callable[[Any], None]] = None):
+        """
+        在当前事件循环中开始后台加载
+
+        Args:
+            on_ready: 加载成功后在事件循环中调用，参数为模型对象（用于启动依赖模型的组件）
+        """
+        if self._task is not None:
+            return
+        self.state = 'loading'
+        self.started_at = time.time()
+        self._task = asyncio.get_running_loop().create_task(self._run(on_ready))
+
+    async def _run(self, on_ready: Optional[Callable[[Any], None]]):
+        # 加载结束后线程即退出，不占用默认线程池
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=self.name)
+        try:
+            model = await asyncio.get_running_loop().run_in_executor(executor, self.load_fn)
+            if on_ready is not None:
+                on_ready(model)
+            self.model = model
+            self.state = 'ready'
+        except Exception as e:
+            self.error = str(e)
+            self.state = 'failed'
+        finally:
+            self.finished_at = time.time()
+            executor.shutdown(wait=False)
+
+    async def wait(self) -> Any:
+        """等待加载结束，返回模型对象（加载失败时为None）"""
+        if self._task is not None:
+            await asyncio.shield(self._task)
+        return self.model
+
+    @property
+    def ready(self) -> bool:
+        return self.state == 'ready'
+
+    def stats(self) -> Dict:
+        """加载状态、错误信息和耗时（秒）"""
+        end = self.finished_at if self.finished_at is not None else time.time()
+        return {
+            'state': self.state,
+            'error': self.error,
+            'elapsed_s': round(end - self.started_at, 3) if self.started_at is not None else None
+        }
@@ -0,0 +1,143 @@
+import gc
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+
+class _LoadedModel:
+    """已加载的模型及其估计内存占用"""
+
+    def __init__(self, model: Any, size: int, pinned: bool):
+        self.model = model
+        self.size = size
+        self.pinned = pinned
+        self.loaded_at = time.time()
+        self.last_used = self.loaded_at
+
+
+class ModelRegistry:
+    """
+    按名称按需加载模型，已加载模型的总内存受预算限制
+
+    模型首次使用时加载，同一模型的并发请求只加载一次。加载后估计的内存占用总和超过预算时，
+    按最久未使用的顺序卸载模型（常驻模型除外）；已卸载模型的内存在正在使用它的请求结束后释放。
+    曾经加载过的模型再次加载前，先按上次的占用腾出空间。
+    """
+
+    def __init__(self, load_fn: Callable[[str], Any], memory_budget: int,
+                 size_fn: Callable[[Any], int] = lambda model: model.memory_bytes()):
+        """
+        Args:
+            load_fn: 按名称加载模型的函数，在调用 get 的线程中执行
+            memory_budget: 已加载模型的内存预算（字节）
+            size_fn: 估计模型内存占用（字节）的函数
+        """
+        self.load_fn = load_fn
+        self.memory_budget = memory_budget
+        self.size_fn = size_fn
+        self._lock = threading.Lock()
+        self._models: 'OrderedDict[str, _LoadedModel]' = OrderedDict()
+        self._loading: Dict[str, Future] = {}
+        # 上次加载时的内存占用，再次加载前据此腾出空间
+        self._known_sizes: Dict[str, int] = {}
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+        self.failures = 0
+
+    def add(self, name: str, model: Any, pinned: bool = False):
+        """登记已在别处加载好的模型（如启动时预热的默认模型），pinned 为 True 时不会被卸载"""
+        size = self.size_fn(model)
+        with self._lock:
+            self._models[name] = _LoadedModel(model, size, pinned)
+            self._known_sizes[name] = size
+            evicted = self._evict(keep=name)
+        if evicted:
+            gc.collect()
+
+    def get(self, name: str) -> Any:
+        """
+        返回已加载的模型，没有时加载（其他线程正在加载同一模型时等待其结果）
+
+        Raises:
+            load_fn 抛出的异常（加载失败不会缓存，下次调用重新加载）
+        """
+        with self._lock:
+            entry = self._models.get(name)
+            if entry is not None:
+                self._models.move_to_end(name)
+                entry.last_used = time.time()
+                self.hits += 1
+                return entry.model
+            future = self._loading.get(name)
+            owner = future is None
+            if owner:
+                future = self._loading[name] = Future()
+                evicted = self._evict(reserve=self._known_sizes.get(name, 0))
+        if not owner:
+            return future.result()
+        if evicted:
+            gc.collect()
+
+        try:
+            model = self.load_fn(name)
+            size = self.size_fn(model)
+        except BaseException as e:
+            with self._lock:
+                del self._loading[name]
+                self.failures += 1
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._models[name] = _LoadedModel(model, size, pinned=False)
+            self._known_sizes[name] = size
+            del self._loading[name]
+            self.loads += 1
+            evicted = self._evict(keep=name)
+        future.set_result(model)
+        if evicted:
+            gc.collect()
+        return model
+
+    def _evict(self, keep: Optional[str] = None, reserve: int = 0) -> int:
+        """按最久未使用的顺序卸载模型，直到总占用加上 reserve 不超过预算（需持有锁），返回卸载数"""
+        total = sum(entry.size for entry in self._models.values()) + reserve
+        evicted = 0
+        for name in list(self._models):
+            if total <= self.memory_budget:
+                break
+            entry = self._models[name]
+            if entry.pinned or name == keep:
+                continue
+            del self._models[name]
+            total -= entry.size
+            evicted += 1
+        self.evictions += evicted
+        return evicted
+
+    def stats(self) -> Dict:
+        """已加载模型的占用、预算和加载/命中/卸载次数"""
+        with self._lock:
+            models = {
+                name: {
+                    'memory_bytes': entry.size,
+                    'memory_mb': round(entry.size / (1024 * 1024), 1),
+                    'pinned': entry.pinned,
+                    'loaded_at': entry.loaded_at,
+                    'last_used': entry.last_used
+                }
+                for name, entry in self._models.items()
+            }
+            return {
+                'models': models,
+                'loading': sorted(self._loading),
+                'memory_mb': round(sum(entry.size for entry in self._models.values()) / (1024 * 1024), 1),
+                'budget_mb': round(self.memory_budget / (1024 * 1024), 1),
+                'hits': self.hits,
+                'loads': self.loads,
+                'evictions': self.evictions,
+                'failures': self.failures
+            }
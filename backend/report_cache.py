@@ -0,0 +1,136 @@
+import os
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+
+class _CacheEntry:
+    """缓存条目：解析后的数据及其对应文件的mtime/大小"""
+
+    __slots__ = ('data', 'mtime_ns', 'size')
+
+    def __init__(self, data: Any, mtime_ns: int, size: int):
+        self.data = data
+        self.mtime_ns = mtime_ns
+        self.size = size
+
+
+def _load_json(path: str) -> Any:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class ReportResultCache:
+    """
+    进程内已解析报告结果的LRU缓存
+
+    以文件路径为键，读取时用文件的mtime和大小校验，文件被改写后自动重新解析。
+    容量按条目数和文件字节数（近似反映解析后数据的内存占用）双重限制。
+    返回的数据在多个请求间共享，调用方不应修改。
+    """
+
+    def __init__(self, max_entries: int = 64, max_bytes: int = 256 * 1024 * 1024):
+        """
+        初始化报告结果缓存
+
+        Args:
+            max_entries: 最多缓存的报告数
+            max_bytes: 缓存报告对应文件的总字节数上限
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._bytes = 0
+
+    def get(self, path: str, loader: Callable[[str], Any] = _load_json) -> Optional[Any]:
+        """
+        获取文件的解析结果，缓存失效或未命中时读取并解析文件
+
+        Args:
+            path: 结果文件路径
+            loader: 解析函数，默认按JSON解析
+
+        Returns:
+            解析后的数据，文件不存在时返回None
+        """
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self.invalidate(path)
+            return None
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry.data
+            self.misses += 1
+
+        data = loader(path)
+        self._store(path, data, stat)
+        return data
+
+    def put(self, path: str, data: Any):
+        """
+        写入新保存文件的解析结果（文件需已写入磁盘）
+
+        Args:
+            path: 结果文件路径
+            data: 与文件内容一致的数据
+        """
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self.invalidate(path)
+            return
+        self._store(path, data, stat)
+
+    def _store(self, path: str, data: Any, stat: os.stat_result):
+        """保存条目并按容量淘汰最久未使用的条目"""
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old is not None:
+                self._bytes -= old.size
+
+            # 单个超出总容量的文件不缓存
+            if stat.st_size > self.max_bytes:
+                return
+
+            self._entries[path] = _CacheEntry(data, stat.st_mtime_ns, stat.st_size)
+            self._bytes += stat.st_size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+
+    def invalidate(self, path: str):
+        """使指定文件的缓存失效"""
+        with self._lock:
+            entry = self._entries.pop(path, None)
+            if entry is not None:
+                self._bytes -= entry.size
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        """返回缓存命中率和占用"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total > 0 else 0,
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'bytes': self._bytes,
+            'max_bytes': self.max_bytes
+        }
@@ -0,0 +1,97 @@
+"""
+Item章节提取基准测试
+
+在合成的大体积10-K文本上比较原来的多次扫描提取（每个章节一次 finditer，
+每个候选再搜索一次下一个标题，最后一次出现覆盖之前的结果）与
+preprocess/sections.py 中的单次扫描提取，输出耗时以及是否选中了正文中的章节。
+
+用法:
+    python benchmarks/bench_items.py --paragraphs 200 --filings 5 --repeat 3
+"""
+import os
+import re
+import sys
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.synthetic import make_filing_text
+from preprocess.sections import locate_items
+
+
+def legacy_extract_items(text):
+    """原来的章节提取实现，返回章节名到 (起始位置, 内容) 的映射"""
+    items = {}
+    item_patterns = {
+        'Item_1': r'Item\s+1[\.\-\s:]*Business(?:\s+Overview)?',
+        'Item_1A': r'Item\s+1A[\.\-\s:]*Risk\s+Factors',
+        'Item_7': r'Item\s+7[\.\-\s:]*Management[\'’]?s\s+Discussion(?:\s+and\s+Analysis)?',
+        'Item_7A': r'Item\s+7A[\.\-\s:]*Quantitative\s+and\s+Qualitative(?:\s+Disclosures)?'
+    }
+    item_positions = []
+    for item_key, pattern in item_patterns.items():
+        for match in re.finditer(pattern, text, re.IGNORECASE):
+            item_positions.append((match.start(), match.group(0), item_key))
+    item_positions.sort(key=lambda x: x[0])
+    for i, (pos, title, item_key) in enumerate(item_positions):
+        end_pos = item_positions[i + 1][0] if i < len(item_positions) - 1 else len(text)
+        content = text[pos:end_pos].strip()
+        next_item = re.search(r'Item\s+\d+[A-Z]?[\.\-\s:]', content[len(title):], re.IGNORECASE)
+        if next_item:
+            content = content[:len(title) + next_item.start()]
+        items[item_key] = (pos, content)
+    return items
+
+
+def single_pass_extract_items(text):
+    """单次扫描的章节提取，返回章节名到 (起始位置, 内容) 的映射"""
+    return {key: (section.start, text[section.start:section.end]) for key, section in locate_items(text).items()}
+
+
+def best_time(func, text, repeat):
+    """多次运行取最短耗时"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Item章节提取基准测试")
+    parser.add_argument("--paragraphs", type=int, default=200, help="每个章节的段落数（控制文本大小）")
+    parser.add_argument("--filings", type=int, default=5, help="合成报告数量")
+    parser.add_argument("--repeat", type=int, default=3, help="每份报告重复运行次数（取最短耗时）")
+    args = parser.parse_args()
+
+    implementations = {'legacy': legacy_extract_items, 'single_pass': single_pass_extract_items}
+    totals = {name: 0.0 for name in implementations}
+    correct = {name: 0 for name in implementations}
+    expected = 0
+    total_chars = 0
+
+    for seed in range(args.filings):
+        text, truth = make_filing_text(args.paragraphs, seed)
+        total_chars += len(text)
+        expected += len(truth)
+        line = [f"报告 {seed}: {len(text) / 1e6:.1f}M 字符"]
+        for name, func in implementations.items():
+            elapsed, items = best_time(func, text, args.repeat)
+            totals[name] += elapsed
+            hits = sum(1 for key, start in truth.items() if key in items and items[key][0] == start)
+            correct[name] += hits
+            line.append(f"{name} {elapsed * 1000:.1f}ms 正文命中 {hits}/{len(truth)}")
+        print(", ".join(line))
+
+    print(f"\n共 {args.filings} 份报告，{total_chars / 1e6:.1f}M 字符")
+    for name in implementations:
+        print(f"{name:>12}: 总耗时 {totals[name] * 1000:.1f}ms，"
+              f"吞吐 {total_chars / 1e6 / totals[name]:.1f}M 字符/秒，正文命中 {correct[name]}/{expected}")
+    print(f"加速比: {totals['legacy'] / totals['single_pass']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+比较两次基准测试的结果
+
+按阶段输出p50/p95延迟、吞吐和峰值RSS的变化，延迟或吞吐变差超过阈值的阶段标记为回退，
+存在回退时以非零状态码退出，可在CI中使用。
+
+用法:
+    python benchmarks/compare.py benchmarks/results/旧.json benchmarks/results/新.json --threshold 10
+"""
+import sys
+import json
+import argparse
+from typing import Dict, Optional
+
+
+def load_results(path: str) -> Dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def relative_change(old: Optional[float], new: Optional[float]) -> Optional[float]:
+    """相对变化（百分比），缺少数值时返回None"""
+    if old is None or new is None or old == 0:
+        return None
+    return (new - old) / old * 100
+
+
+def compare_stages(old: Dict, new: Dict, threshold: float) -> Dict[str, Dict]:
+    """
+    比较两次结果中共有的阶段
+
+    Args:
+        old: 基准结果
+        new: 对比结果
+        threshold: 判定为回退的变差百分比
+
+    Returns:
+        阶段名到各指标变化的映射，regression 表示该阶段是否回退
+    """
+    comparison = {}
+    for name, new_stage in new['stages'].items():
+        old_stage = old['stages'].get(name)
+        if old_stage is None:
+            continue
+        changes = {key: relative_change(old_stage.get(key), new_stage.get(key))
+                   for key in ('p50_ms', 'p95_ms', 'throughput', 'peak_rss_mb')}
+        # 延迟变大、吞吐变小为变差
+        regression = ((changes['p50_ms'] or 0) > threshold or (changes['p95_ms'] or 0) > threshold
+                      or -(changes['throughput'] or 0) > threshold)
+        comparison[name] = {'old': old_stage, 'new': new_stage, 'changes': changes, 'regression': regression}
+    return comparison
+
+
+def _format_change(value: Optional[float]) -> str:
+    return '-' if value is None else f"{value:+.1f}%"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="比较两次基准测试的结果")
+    parser.add_argument("old", type=str, help="基准结果文件")
+    parser.add_argument("new", type=str, help="对比结果文件")
+    parser.add_argument("--threshold", type=float, default=10.0, help="判定为回退的变差百分比")
+    args = parser.parse_args()
+
+    old = load_results(args.old)
+    new = load_results(args.new)
+    print(f"基准: {old['git'].get('commit')} ({old['started']})")
+    print(f"对比: {new['git'].get('commit')} ({new['started']})")
+    if old.get('config') != new.get('config'):
+        print("注意: 两次运行的参数不同，结果可能不可比")
+    if old.get('environment') != new.get('environment'):
+        print("注意: 两次运行的环境不同，结果可能不可比")
+
+    comparison = compare_stages(old, new, args.threshold)
+    print(f"\n{'阶段':<30}{'p50(ms)':>22}{'p95(ms)':>22}{'吞吐':>12}{'峰值RSS':>10}")
+    for name, entry in comparison.items():
+        o, n, c = entry['old'], entry['new'], entry['changes']
+        flag = '  回退' if entry['regression'] else ''
+        print(f"{name:<30}"
+              f"{o['p50_ms']:>9.2f}→{n['p50_ms']:<8.2f}{_format_change(c['p50_ms']):>4}"
+              f"{o['p95_ms']:>9.2f}→{n['p95_ms']:<8.2f}{_format_change(c['p95_ms']):>4}"
+              f"{_format_change(c['throughput']):>12}{_format_change(c['peak_rss_mb']):>10}{flag}")
+
+    regressions = [name for name, entry in comparison.items() if entry['regression']]
+    if regressions:
+        print(f"\n{len(regressions)} 个阶段回退超过 {args.threshold:.0f}%: {', '.join(regressions)}")
+        sys.exit(1)
+    print(f"\n没有阶段回退超过 {args.threshold:.0f}%")
+
+
+if __name__ == "__main__":
+    main()
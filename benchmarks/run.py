@@ -0,0 +1,452 @@
+"""
+离线端到端基准测试
+
+生成合成的 full-submission.txt 和小型随机BERT模型，不需要联网，依次测量：
+    clean          clean_10k_report（流式读取 + HTML文本提取）
+    extract_items  章节定位与提取
+    segmentation   章节分句
+    analyze_batch  固定批大小和token预算下的批量推理
+    report_cold    /api/report 冷路径（每次请求前清空进程内缓存，从结果文件读取）
+    report_warm    /api/report 热路径（命中进程内缓存）
+    summary        /api/summary
+    api_import     在新进程中导入API模块的耗时（冷启动到可以接受请求，模型在后台加载，不计入）
+
+每个阶段输出请求数、p50/p95/p99延迟、吞吐（句子/秒或字符/秒）和峰值RSS，
+结果保存为JSON，可用 benchmarks/compare.py 比较两次提交的结果。
+
+用法:
+    python benchmarks/run.py --filings 4 --paragraphs 40 --exhibit-mb 5
+    python benchmarks/compare.py benchmarks/results/旧.json benchmarks/results/新.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import subprocess
+import importlib.util
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+# 基准测试不访问网络（模型和分词器都在本地生成）
+os.environ.setdefault('HF_HUB_OFFLINE', '1')
+os.environ.setdefault('TRANSFORMERS_OFFLINE', '1')
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+import numpy as np
+
+from benchmarks.synthetic import write_submission
+from benchmarks.tiny_model import build_tiny_model
+
+# 默认结果目录
+RESULTS_DIR = os.path.join(ROOT_DIR, 'benchmarks', 'results')
+
+# 结果文件格式版本
+RESULTS_FORMAT_VERSION = 1
+
+
+def reset_peak_rss():
+    """重置进程的峰值RSS（仅Linux支持，其他平台峰值从进程启动开始累计）"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def peak_rss_mb() -> Optional[float]:
+    """进程的峰值RSS（MB）"""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS上单位为字节，Linux上为KB
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class Stage:
+    """
+    记录一个阶段的每次调用耗时和处理量
+
+    用法:
+        with Stage('clean', unit='chars') as stage:
+            for path in paths:
+                with stage.call() as call:
+                    text = clean(path)
+                    call.units = len(text)
+    """
+
+    def __init__(self, name: str, unit: str = 'calls'):
+        self.name = name
+        self.unit = unit
+        self.latencies = []
+        self.units = 0
+        self.elapsed = 0.0
+        self.peak_rss_mb = None
+
+    def __enter__(self):
+        reset_peak_rss()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.peak_rss_mb = peak_rss_mb()
+        return False
+
+    def call(self):
+        return _Call(self)
+
+    def record(self, seconds: float, units: int = 1):
+        self.latencies.append(seconds)
+        self.units += units
+        self.elapsed += seconds
+
+    def to_dict(self) -> Dict:
+        """阶段统计：延迟分位数（毫秒）、吞吐和峰值RSS"""
+        latencies = np.array(self.latencies) * 1000 if self.latencies else np.zeros(1)
+        return {
+            'calls': len(self.latencies),
+            'unit': self.unit,
+            'units': self.units,
+            'total_s': round(self.elapsed, 6),
+            'throughput': round(self.units / self.elapsed, 3) if self.elapsed > 0 else None,
+            'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+            'p95_ms': round(float(np.percentile(latencies, 95)), 3),
+            'p99_ms': round(float(np.percentile(latencies, 99)), 3),
+            'mean_ms': round(float(latencies.mean()), 3),
+            'peak_rss_mb': round(self.peak_rss_mb, 1) if self.peak_rss_mb is not None else None
+        }
+
+
+class _Call:
+    """单次调用的计时，units 为本次处理量（句子数、字符数等）"""
+
+    def __init__(self, stage: Stage):
+        self.stage = stage
+        self.units = 1
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.stage.record(time.perf_counter() - self.start, self.units)
+        return False
+
+
+def load_clean_module():
+    """加载预处理脚本 preprocess/clean_10-K.py（文件名含连字符，不能直接import）"""
+    preprocess_dir = os.path.join(ROOT_DIR, 'preprocess')
+    if preprocess_dir not in sys.path:
+        sys.path.insert(0, preprocess_dir)
+    spec = importlib.util.spec_from_file_location('clean_10k', os.path.join(preprocess_dir, 'clean_10-K.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def use_offline_sentence_tokenizer() -> str:
+    """
+    本地有Punkt模型时直接使用；没有时换成未训练的Punkt分句器，避免分句时下载模型
+
+    Returns:
+        使用的分句器：'punkt' 或 'punkt-untrained'（结果中记录，不同分句器的耗时不可比）
+    """
+    import nltk
+    from nltk.tokenize.punkt import PunktSentenceTokenizer
+
+    try:
+        from nltk.tokenize import PunktTokenizer  # noqa: F401
+        resource = 'tokenizers/punkt_tab'
+    except ImportError:
+        resource = 'tokenizers/punkt'
+    try:
+        nltk.data.find(resource)
+        return 'punkt'
+    except LookupError:
+        pass
+
+    tokenizer = PunktSentenceTokenizer()
+    # 清理脚本以 segmentation 的名字导入同一个文件，两个模块对象都要替换
+    for name in ('preprocess.segmentation', 'segmentation'):
+        module = sys.modules.get(name)
+        if module is not None:
+            module.get_sentence_tokenizer = lambda language='english': tokenizer
+    return 'punkt-untrained'
+
+
+def git_revision() -> Dict:
+    """当前提交和工作区是否有未提交的修改"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT_DIR, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT_DIR,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return {'commit': commit, 'dirty': dirty}
+    except (OSError, subprocess.CalledProcessError):
+        return {'commit': None, 'dirty': None}
+
+
+def environment_info() -> Dict:
+    """运行环境：Python、主要依赖的版本和CPU数"""
+    import torch
+    import transformers
+
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'torch': torch.__version__,
+        'torch_threads': torch.get_num_threads(),
+        'transformers': transformers.__version__
+    }
+
+
+def run_preprocess(clean, filings: List[Dict], parser: str, stages: Dict[str, Stage]) -> List[Dict]:
+    """清理、章节提取、分句并保存到处理后目录，返回每份报告的章节和句子"""
+    from preprocess.sections import locate_items
+    from preprocess.segmentation import segment_text, sentences_from_spans
+
+    texts = []
+    with Stage('clean', unit='chars') as stage:
+        for filing in filings:
+            with stage.call() as call:
+                text = clean.clean_10k_report(filing['path'], parser)
+                call.units = len(text)
+            texts.append(text)
+    stages['clean'] = stage
+
+    located = []
+    with Stage('extract_items', unit='chars') as stage:
+        for text in texts:
+            with stage.call() as call:
+                sections = locate_items(text)
+                call.units = len(text)
+            located.append(sections)
+    stages['extract_items'] = stage
+
+    reports = []
+    with Stage('segmentation', unit='sentences') as stage:
+        for filing, text, sections in zip(filings, texts, located):
+            items = {key: text[section.start:section.end] for key, section in sections.items()}
+            segments = {}
+            for key, item_text in items.items():
+                with stage.call() as call:
+                    segments[key] = segment_text(item_text)
+                    call.units = len(segments[key])
+            reports.append({
+                **filing,
+                'text': text,
+                'sections': sections,
+                'items': items,
+                'sentences': {key: sentences_from_spans(items[key], spans) for key, spans in segments.items()}
+            })
+    stages['segmentation'] = stage
+
+    for report in reports:
+        clean.save_cleaned_text(report['ticker'], report['year'], report['text'], report['items'], report['sections'])
+    return reports
+
+
+def run_inference(analyzer, reports: List[Dict], batch_sizes: List[int], token_budgets: List[int],
+                  chunk_size: int, stages: Dict[str, Stage]):
+    """按固定批大小和token预算批量推理全部句子（每次调用 chunk_size 个句子）"""
+    sentences = [sentence for report in reports for section in report['sentences'].values() for sentence in section]
+    chunks = [sentences[i:i + chunk_size] for i in range(0, len(sentences), chunk_size)]
+    # 预热：首次推理包含线程池和内存分配的初始化
+    analyzer.analyze_batch(sentences[:chunk_size], batch_size=8, max_tokens=0)
+
+    settings = [(f'analyze_batch[batch_size={size}]', size, 0) for size in batch_sizes]
+    settings += [(f'analyze_batch[max_tokens={budget}]', 8, budget) for budget in token_budgets]
+    for name, batch_size, max_tokens in settings:
+        with Stage(name, unit='sentences') as stage:
+            for chunk in chunks:
+                with stage.call() as call:
+                    analyzer.analyze_batch(chunk, batch_size=batch_size, max_tokens=max_tokens)
+                    call.units = len(chunk)
+        stages[name] = stage
+
+
+def run_api(analyzer, reports: List[Dict], processed_dir: str, results_dir: str, requests: int,
+            stages: Dict[str, Stage]):
+    """分析并保存报告结果，再测量报告接口的冷、热路径和摘要接口"""
+    from fastapi.testclient import TestClient
+    import backend.app as appmod
+    from preprocess.config import RESULT_STORAGE_FORMAT, SUMMARY_INDEX_FILENAME
+    from preprocess.catalog import ReportCatalog
+    from sentiment_analysis.result_store import ResultStore
+    from sentiment_analysis.summary_index import SummaryIndex
+
+    # 指向基准测试的数据目录；不进入TestClient上下文，启动事件（加载FinBERT）不会执行
+    appmod.PROCESSED_DATA_DIR = processed_dir
+    appmod.RESULTS_DIR = results_dir
+    appmod.catalog = ReportCatalog(processed_dir, results_dir)
+    appmod.result_store = ResultStore(results_dir, RESULT_STORAGE_FORMAT)
+    appmod.summary_index = SummaryIndex(os.path.join(results_dir, SUMMARY_INDEX_FILENAME))
+    appmod.analyzer = analyzer
+    appmod.report_cache.clear()
+    appmod.columnar_cache.clear()
+
+    with Stage('analyze_report', unit='sentences') as stage:
+        for report in reports:
+            date = str(report['year'])
+            sections = appmod._load_sections_content(report['ticker'], date)
+            fingerprint, _, _, _ = appmod._plan_section_analysis(report['ticker'], date, sections, force=True)
+            with stage.call() as call:
+                segments, tokens = appmod._load_section_inputs(report['ticker'], date, sections)
+                analysis = analyzer.analyze_report_sections(sections, segments=segments, tokens=tokens)
+                call.units = sum(len(spans) for spans in segments.values())
+            appmod._save_analysis_result(appmod._build_report_result(
+                report['ticker'], date, sections, analysis['sections'], fingerprint))
+    stages['analyze_report'] = stage
+
+    client = TestClient(appmod.app)
+    urls = [f"/api/report/{report['ticker']}/{report['year']}" for report in reports]
+
+    def measure(name: str, url_for: Callable[[int], str], before: Optional[Callable[[], None]] = None):
+        with Stage(name, unit='requests') as stage:
+            for i in range(requests):
+                if before is not None:
+                    before()
+                with stage.call():
+                    response = client.get(url_for(i))
+                response.raise_for_status()
+        stages[name] = stage
+
+    def clear_caches():
+        appmod.report_cache.clear()
+        appmod.columnar_cache.clear()
+
+    measure('report_cold', lambda i: urls[i % len(urls)], before=clear_caches)
+    for url in urls:
+        client.get(url).raise_for_status()
+    measure('report_warm', lambda i: urls[i % len(urls)])
+    measure('summary', lambda i: '/api/summary')
+
+
+def run_startup(runs: int, stages: Dict[str, Stage]):
+    """在子进程中测量导入 backend.app 的耗时（含解释器启动）和子进程的峰值RSS"""
+    code = "import backend.app; from benchmarks.run import peak_rss_mb; print(peak_rss_mb())"
+    env = {**os.environ, 'PYTHONPATH': ROOT_DIR}
+    peaks = []
+    with Stage('api_import', unit='imports') as stage:
+        for _ in range(runs):
+            with stage.call():
+                output = subprocess.run([sys.executable, '-c', code], env=env, check=True,
+                                        capture_output=True, text=True).stdout
+            peaks.append(float(output.split()[-1]))
+    stage.peak_rss_mb = max(peaks) if peaks else None
+    stages['api_import'] = stage
+
+
+def parse_int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(',') if item.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="离线端到端基准测试（合成10-K + 小型随机BERT）")
+    parser.add_argument("--filings", type=int, default=4, help="合成报告数量")
+    parser.add_argument("--paragraphs", type=int, default=40, help="每个章节的段落数（控制报告大小）")
+    parser.add_argument("--exhibit-mb", type=float, default=0, help="每份报告附带的二进制文档大小（MB）")
+    parser.add_argument("--parser", type=str, default='lxml', help="HTML解析器：lxml 或 html.parser")
+    parser.add_argument("--batch-sizes", type=parse_int_list, default=[1, 8, 32], help="固定批大小，逗号分隔")
+    parser.add_argument("--token-budgets", type=parse_int_list, default=[2048, 8192], help="每批token预算，逗号分隔")
+    parser.add_argument("--chunk", type=int, default=256, help="每次 analyze_batch 调用的句子数")
+    parser.add_argument("--requests", type=int, default=50, help="每个接口的请求次数")
+    parser.add_argument("--startup-runs", type=int, default=3, help="测量API模块导入耗时的次数")
+    parser.add_argument("--backend", type=str, default='torch', help="推理后端：torch、torch-int8、onnx")
+    parser.add_argument("--hidden-size", type=int, default=64, help="小模型的隐藏层维度")
+    parser.add_argument("--layers", type=int, default=2, help="小模型的层数")
+    parser.add_argument("--workdir", type=str, default=None, help="工作目录（默认使用临时目录，结束后删除）")
+    parser.add_argument("--output", type=str, default=None, help="结果文件路径（默认 benchmarks/results/<提交>-<时间>.json）")
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='finbert-bench-')
+    os.makedirs(workdir, exist_ok=True)
+    processed_dir = os.path.join(workdir, 'processed')
+    results_dir = os.path.join(workdir, 'results')
+    os.makedirs(results_dir, exist_ok=True)
+    revision = git_revision()
+    started = datetime.now()
+
+    # 日志文件写入工作目录，只保留警告以上的日志，避免日志输出计入耗时
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        clean = load_clean_module()
+        clean.config.PROCESSED_DATA_DIR = processed_dir
+        import backend.app  # noqa: F401  导入时配置日志
+        logging.getLogger().setLevel(logging.WARNING)
+        sentence_tokenizer = use_offline_sentence_tokenizer()
+
+        print(f"生成 {args.filings} 份合成报告...")
+        filings = []
+        for seed in range(args.filings):
+            ticker = f"SYN{seed}"
+            filing_dir = os.path.join(workdir, 'raw', 'sec-edgar-filings', ticker, '10-K', f"0000000000-23-{seed:06d}")
+            os.makedirs(filing_dir, exist_ok=True)
+            path = os.path.join(filing_dir, 'full-submission.txt')
+            size = write_submission(path, args.paragraphs, args.exhibit_mb, seed=seed)
+            filings.append({'ticker': ticker, 'year': 2023, 'path': path, 'chars': size})
+
+        model_dir = build_tiny_model(os.path.join(workdir, 'tiny-bert'), args.hidden_size, args.layers)
+        from sentiment_analysis.model import FinBertSentimentAnalyzer
+        analyzer = FinBertSentimentAnalyzer(model_name=model_dir, device='cpu', backend=args.backend)
+
+        stages = {}
+        reports = run_preprocess(clean, filings, args.parser, stages)
+        run_inference(analyzer, reports, args.batch_sizes, args.token_budgets, args.chunk, stages)
+        run_api(analyzer, reports, processed_dir, results_dir, args.requests, stages)
+        run_startup(args.startup_runs, stages)
+    finally:
+        os.chdir(cwd)
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {
+        'version': RESULTS_FORMAT_VERSION,
+        'started': started.isoformat(timespec='seconds'),
+        'git': revision,
+        'environment': environment_info(),
+        'config': {**vars(args), 'sentence_tokenizer': sentence_tokenizer},
+        'data': {
+            'filings': len(filings),
+            'submission_chars': sum(filing['chars'] for filing in filings),
+            'sentences': sum(len(s) for report in reports for s in report['sentences'].values())
+        },
+        'stages': {name: stage.to_dict() for name, stage in stages.items()}
+    }
+
+    output = args.output
+    if output is None:
+        commit = (revision['commit'] or 'unknown')[:12] + ('-dirty' if revision['dirty'] else '')
+        output = os.path.join(RESULTS_DIR, f"{commit}-{started.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+    print(f"\n{'阶段':<30}{'次数':>8}{'p50(ms)':>12}{'p95(ms)':>12}{'p99(ms)':>12}{'吞吐':>22}{'峰值RSS(MB)':>14}")
+    for name, stage in results['stages'].items():
+        throughput = f"{stage['throughput']:.1f} {stage['unit']}/s" if stage['throughput'] else '-'
+        print(f"{name:<30}{stage['calls']:>8}{stage['p50_ms']:>12.2f}{stage['p95_ms']:>12.2f}"
+              f"{stage['p99_ms']:>12.2f}{throughput:>22}{stage['peak_rss_mb'] or 0:>14.1f}")
+    print(f"\n结果已保存: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+合成10-K数据生成器，供基准测试使用
+
+make_filing_text 生成的文本模仿清理后的10-K全文：开头是目录（每个Item的标题和页码），
+随后是 Items 1–15 的正文，部分章节中带有指向其他章节的交叉引用。
+write_submission 生成同样结构的EDGAR完整提交文件（SEC头部 + 10-K HTML主文档 + 附件）。
+"""
+import html
+import random
+from typing import Dict, Tuple
+
+# 10-K中的全部Item及其标题
+ITEMS = [
+    ('1', 'Business'),
+    ('1A', 'Risk Factors'),
+    ('1B', 'Unresolved Staff Comments'),
+    ('1C', 'Cybersecurity'),
+    ('2', 'Properties'),
+    ('3', 'Legal Proceedings'),
+    ('4', 'Mine Safety Disclosures'),
+    ('5', 'Market for Registrant’s Common Equity, Related Stockholder Matters and Issuer Purchases of Equity Securities'),
+    ('6', '[Reserved]'),
+    ('7', 'Management’s Discussion and Analysis of Financial Condition and Results of Operations'),
+    ('7A', 'Quantitative and Qualitative Disclosures About Market Risk'),
+    ('8', 'Financial Statements and Supplementary Data'),
+    ('9', 'Changes in and Disagreements with Accountants on Accounting and Financial Disclosure'),
+    ('9A', 'Controls and Procedures'),
+    ('9B', 'Other Information'),
+    ('9C', 'Disclosure Regarding Foreign Jurisdictions that Prevent Inspections'),
+    ('10', 'Directors, Executive Officers and Corporate Governance'),
+    ('11', 'Executive Compensation'),
+    ('12', 'Security Ownership of Certain Beneficial Owners and Management and Related Stockholder Matters'),
+    ('13', 'Certain Relationships and Related Transactions, and Director Independence'),
+    ('14', 'Principal Accountant Fees and Services'),
+    ('15', 'Exhibits and Financial Statement Schedules'),
+]
+
+# 与提取结果对应的章节名
+ITEM_KEYS = {'1': 'Item_1', '1A': 'Item_1A', '7': 'Item_7', '7A': 'Item_7A'}
+
+# 正文中的交叉引用（在哪个章节中引用哪个章节）
+CROSS_REFERENCES = {
+    '1': '7',
+    '8': '7',
+    '9A': '1A',
+}
+
+# 合成文本使用的单词（基准测试的小模型词表也由它们构成）
+WORDS = (
+    "revenue growth risk market customers products services demand supply operations results "
+    "increased decreased significant financial net income fiscal year company competition regulation "
+    "margin costs expenses cash flow liquidity capital investments segment outlook uncertainty"
+).split()
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(8, 30))]
+    return ' '.join(words).capitalize() + '.'
+
+
+def _paragraph(rng: random.Random) -> str:
+    return ' '.join(_sentence(rng) for _ in range(rng.randint(2, 6)))
+
+
+def make_filing_text(paragraphs_per_item: int = 40, seed: int = 0) -> Tuple[str, Dict[str, int]]:
+    """
+    生成一份清理后的10-K全文
+
+    Args:
+        paragraphs_per_item: 每个章节的段落数，控制文本大小（200时约300万字符）
+        seed: 随机种子
+
+    Returns:
+        (全文, 需要提取的章节名到正文标题起始位置的映射)
+    """
+    rng = random.Random(seed)
+    parts = ['ANNUAL REPORT PURSUANT TO SECTION 13 OR 15(d) OF THE SECURITIES EXCHANGE ACT OF 1934',
+             'TABLE OF CONTENTS']
+    for page, (number, title) in enumerate(ITEMS, start=3):
+        parts.append(f'Item {number}.\n{title}\n{page * 7}')
+
+    text = '\n'.join(parts) + '\n'
+    truth = {}
+    for number, title in ITEMS:
+        start = len(text)
+        body = [f'Item {number}. {title}']
+        for i in range(paragraphs_per_item):
+            body.append(_paragraph(rng))
+            if number in CROSS_REFERENCES and i == paragraphs_per_item // 2:
+                referenced = CROSS_REFERENCES[number]
+                body.append(f'For more information, see Part II, Item {referenced}. '
+                            f'{dict(ITEMS)[referenced]} of this report.')
+        if number in ITEM_KEYS:
+            truth[ITEM_KEYS[number]] = start
+        text += '\n'.join(body)
+        text += '\n'
+    return text, truth
+
+
+def _uuencoded_lines(rng: random.Random, size: int):
+    """生成约size字节的uuencode风格内容（模拟附件中的图片等二进制文档）"""
+    alphabet = ''.join(chr(c) for c in range(33, 97))
+    line = 'M' + ''.join(rng.choice(alphabet) for _ in range(60)) + '\n'
+    for _ in range(max(0, size // len(line))):
+        yield line
+
+
+def write_submission(path: str, paragraphs_per_item: int = 40, exhibit_mb: float = 0, seed: int = 0,
+                     period: str = '20231231', company: str = 'SYNTHETIC CORP') -> int:
+    """
+    生成一份EDGAR完整提交文件（full-submission.txt）
+
+    主文档是10-K的HTML：目录表格、Items 1–15 的正文（含交叉引用）、样式和脚本；
+    其后是一个附件文档和可选的uuencode二进制文档。
+
+    Args:
+        path: 输出文件路径
+        paragraphs_per_item: 每个章节的段落数
+        exhibit_mb: 附加的二进制文档大小（MB）
+        seed: 随机种子
+        period: 报告期（YYYYMMDD）
+        company: 公司名称
+
+    Returns:
+        写入的字符数
+    """
+    rng = random.Random(seed)
+    titles = dict(ITEMS)
+    written = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        def write(text):
+            nonlocal written
+            written += len(text)
+            f.write(text)
+
+        write(f"<SEC-DOCUMENT>0000000000-{period[2:4]}-{seed:06d}.txt : {period}\n<SEC-HEADER>\n"
+              f"CONFORMED SUBMISSION TYPE:\t10-K\nCONFORMED PERIOD OF REPORT:\t{period}\n"
+              f"COMPANY CONFORMED NAME:\t\t\t{company}\n</SEC-HEADER>\n")
+
+        # 主文档
+        write("<DOCUMENT>\n<TYPE>10-K\n<SEQUENCE>1\n<FILENAME>form10-k.htm\n<TEXT>\n")
+        write('<html><head><title>10-K</title><style>p { margin: 0 }</style>'
+              '<script>var page = "<p>not text</p>";</script></head><body>\n')
+        write('<p>TABLE OF CONTENTS</p><table>\n')
+        for page, (number, title) in enumerate(ITEMS, start=3):
+            write(f'<tr><td>Item {number}.</td><td>{html.escape(title)}</td><td>{page * 7}</td></tr>\n')
+        write('</table>\n')
+        for number, title in ITEMS:
+            write(f'<div><p style="font-weight:bold">Item {number}. {html.escape(title)}</p></div>\n')
+            for i in range(paragraphs_per_item):
+                write(f'<div><p><font>{_paragraph(rng)}</font> <span>{_sentence(rng)}&#160;&amp; '
+                      f'{_sentence(rng)}</span></p></div>\n')
+                if number in CROSS_REFERENCES and i == paragraphs_per_item // 2:
+                    referenced = CROSS_REFERENCES[number]
+                    write(f'<p>For more information, see Part II, Item {referenced}. '
+                          f'{html.escape(titles[referenced])} of this report.</p>\n')
+                if rng.random() < 0.05:
+                    write('<table><tr><td>Revenue</td><td>$</td><td>1,234</td></tr>'
+                          '<tr><td>Net income</td><td>$</td><td>567</td></tr></table>\n')
+                    write('<p>12</p>\n')
+        write('</body></html>\n</TEXT>\n</DOCUMENT>\n')
+
+        # 附件和二进制文档
+        write("<DOCUMENT>\n<TYPE>EX-21\n<SEQUENCE>2\n<FILENAME>ex21.htm\n<TEXT>\n"
+              "<html><body><p>Subsidiaries of the registrant.</p></body></html>\n</TEXT>\n</DOCUMENT>\n")
+        if exhibit_mb > 0:
+            write("<DOCUMENT>\n<TYPE>GRAPHIC\n<SEQUENCE>3\n<FILENAME>chart.jpg\n<TEXT>\nbegin 644 chart.jpg\n")
+            for line in _uuencoded_lines(rng, int(exhibit_mb * 1024 * 1024)):
+                write(line)
+            write("end\n</TEXT>\n</DOCUMENT>\n")
+        write("</SEC-DOCUMENT>\n")
+    return written
@@ -92,6 +92,76 @@ export const fetchReportDetails = async (ticker: string, date: string, analyze:
   return response.data;
 };
 
+// 流式报告事件
+export type ReportStreamEvent =
+  | { event: 'start'; ticker: string; date: string; sections: string[] }
+  | { event: 'section'; section: string; data: ReportSection }
+  | { event: 'summary'; ticker: string; date: string; summary: ReportSummary }
+  | { event: 'error'; detail: string };
+
+// 流式获取报告分析结果（NDJSON），每完成一个章节回调一次，不受axios超时限制
+export const streamReportDetails = async (
+  ticker: string,
+  date: string,
+  onEvent: (event: ReportStreamEvent) => void,
+  analyze: boolean = false
+): Promise<void> => {
+  const url = `${API_BASE_URL}/api/report/${ticker}/${date}/stream${analyze ? '?analyze=true' : ''}`;
+  const response = await fetch(url);
+  if (!response.ok || !response.body) {
+    throw new Error(`流式获取报告失败: ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    const lines = buffer.split('\n');
+    buffer = lines.pop() ?? '';
+    for (const line of lines) {
+      if (line.trim()) {
+        onEvent(JSON.parse(line) as ReportStreamEvent);
+      }
+    }
+  }
+
+  if (buffer.trim()) {
+    onEvent(JSON.parse(buffer) as ReportStreamEvent);
+  }
+};
+
+// 章节句子查询参数（服务端分页、筛选、排序）
+export interface SectionQuery {
+  offset?: number;
+  limit?: number;
+  label?: 'positive' | 'neutral' | 'negative';
+  min_confidence?: number;
+  sort_by?: 'positive' | 'neutral' | 'negative' | 'confidence';
+  order?: 'desc' | 'asc';
+}
+
+export interface SectionPage {
+  section: string;
+  data: ReportSection;
+  total: number;
+  offset: number;
+  limit: number | null;
+}
+
+export const fetchSectionSentences = async (
+  ticker: string,
+  date: string,
+  section: string,
+  query: SectionQuery = {}
+): Promise<SectionPage> => {
+  const response = await api.get(`/api/report/${ticker}/${date}/section/${section}`, { params: query });
+  return response.data;
+};
+
 export const fetchSummary = async (ticker?: string): Promise<SummaryItem[]> => {
   const url = ticker ? `/api/summary?ticker=${ticker}` : '/api/summary';
   const response = await api.get(url);
@@ -103,4 +173,39 @@ export const analyzeText = async (text: string): Promise<SectionSentence> => {
   return response.data;
 };
 
+// 逐token遮挡归因（attribution 为正表示该token支持目标类别）
+export interface TokenAttribution {
+  token: string;
+  start: number | null;
+  end: number | null;
+  attribution: number;
+}
+
+export interface SentenceExplanation extends SectionSentence {
+  target: 'positive' | 'neutral' | 'negative';
+  method: string;
+  tokens: TokenAttribution[];
+}
+
+export const explainSentence = async (
+  text: string,
+  target?: SentenceExplanation['target']
+): Promise<SentenceExplanation> => {
+  const response = await api.get('/api/explain', { params: { text, target } });
+  return response.data;
+};
+
+export const explainSection = async (
+  ticker: string,
+  date: string,
+  section: string,
+  topK: number = 10,
+  target: SentenceExplanation['target'] = 'negative'
+): Promise<SentenceExplanation[]> => {
+  const response = await api.get(`/api/report/${ticker}/${date}/section/${section}/explain`, {
+    params: { top_k: topK, target }
+  });
+  return response.data.explanations;
+};
+
 export default api;
\ No newline at end of file
@@ -0,0 +1,266 @@
+import os
+import json
+import time
+import threading
+from typing import Dict, List, Optional
+
+# 报告目录中的章节文件
+ITEM_NAMES = ["Item_1", "Item_1A", "Item_7", "Item_7A"]
+
+# 结果目录中分析结果文件（JSON格式）和结果目录（列式格式）的后缀
+RESULT_FILE_SUFFIX = '_analysis.json'
+RESULT_DIR_SUFFIX = '_analysis'
+
+# 清单格式版本，格式变化时旧清单会被丢弃并完整重新扫描
+MANIFEST_VERSION = 1
+
+
+def _mtime_ns(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _list_subdirs(path: str) -> List[str]:
+    try:
+        with os.scandir(path) as entries:
+            return sorted(entry.name for entry in entries if entry.is_dir())
+    except FileNotFoundError:
+        return []
+
+
+def touch_report_dir(report_dir: str):
+    """
+    更新报告目录的mtime
+
+    原地覆盖已有文件不会改变目录的mtime，写完报告文件后调用，
+    使目录清单在下次刷新时重新扫描该目录。
+    """
+    os.utime(report_dir, None)
+
+
+class ReportCatalog:
+    """
+    处理后报告的目录清单
+
+    记录每个股票代码、年份的可用章节、文件大小以及是否已有分析结果。
+    清单持久化为JSON文件并在内存中保留一份，刷新时只重新扫描mtime发生变化的目录：
+    processed目录的mtime变化说明增删了股票代码，股票代码目录的mtime变化说明增删了年份，
+    年份目录的mtime变化说明其中的文件被改写（clean_10-K.py 写完文件后会更新年份目录的mtime）。
+    """
+
+    def __init__(self, processed_dir: str, results_dir: str, manifest_path: Optional[str] = None,
+                 refresh_interval: float = 0):
+        """
+        初始化目录清单，存在持久化清单时从中加载
+
+        Args:
+            processed_dir: 处理后数据目录
+            results_dir: 分析结果目录
+            manifest_path: 持久化清单文件路径，None则只保存在内存中
+            refresh_interval: 两次刷新之间的最短间隔（秒），0表示每次都检查目录mtime
+        """
+        self.processed_dir = processed_dir
+        self.results_dir = results_dir
+        self.manifest_path = manifest_path
+        self.refresh_interval = refresh_interval
+
+        self._lock = threading.Lock()
+        self._last_refresh = None
+        self._manifest = self._empty_manifest()
+        self._load_manifest()
+
+    def _empty_manifest(self) -> Dict:
+        return {
+            'version': MANIFEST_VERSION,
+            'processed_dir': self.processed_dir,
+            'processed_mtime_ns': None,
+            'results_mtime_ns': None,
+            'analyzed': [],
+            'tickers': {}
+        }
+
+    def _load_manifest(self):
+        """加载持久化清单，清单不存在、损坏或不属于当前目录时忽略"""
+        if not self.manifest_path or not os.path.exists(self.manifest_path):
+            return
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except Exception as e:
+            print(f"读取目录清单 {self.manifest_path} 出错: {e}")
+            return
+        if manifest.get('version') == MANIFEST_VERSION and manifest.get('processed_dir') == self.processed_dir:
+            self._manifest = manifest
+
+    def _save_manifest(self):
+        """原子地写入持久化清单（调用方需持有锁）"""
+        if not self.manifest_path:
+            return
+        try:
+            directory = os.path.dirname(self.manifest_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._manifest, f, ensure_ascii=False)
+            os.replace(tmp_path, self.manifest_path)
+        except Exception as e:
+            print(f"保存目录清单 {self.manifest_path} 出错: {e}")
+
+    def _scan_report_dir(self, report_dir: str, mtime_ns: int) -> Dict:
+        """扫描单个年份目录中的章节文件"""
+        sections = {}
+        for item_name in ITEM_NAMES:
+            try:
+                sections[item_name] = os.path.getsize(os.path.join(report_dir, f"{item_name}.txt"))
+            except FileNotFoundError:
+                continue
+        sentences_file = os.path.join(report_dir, "sentences.txt")
+        return {
+            'mtime_ns': mtime_ns,
+            'sections': sections,
+            'sentences_size': os.path.getsize(sentences_file) if os.path.exists(sentences_file) else None
+        }
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        按目录mtime增量刷新清单
+
+        Args:
+            force: 忽略刷新间隔和已记录的mtime，完整重新扫描
+
+        Returns:
+            清单是否发生了变化
+        """
+        with self._lock:
+            now = time.monotonic()
+            if (not force and self._last_refresh is not None
+                    and now - self._last_refresh < self.refresh_interval):
+                return False
+            self._last_refresh = now
+
+            manifest = self._manifest
+            if force:
+                manifest = self._manifest = self._empty_manifest()
+            changed = False
+
+            # 股票代码列表
+            processed_mtime = _mtime_ns(self.processed_dir)
+            tickers = manifest['tickers']
+            if processed_mtime != manifest['processed_mtime_ns']:
+                names = set(_list_subdirs(self.processed_dir))
+                for name in list(tickers):
+                    if name not in names:
+                        del tickers[name]
+                for name in names:
+                    tickers.setdefault(name, {'mtime_ns': None, 'years': {}})
+                manifest['processed_mtime_ns'] = processed_mtime
+                changed = True
+
+            # 各股票代码的年份及各年份的章节文件
+            for name, ticker_entry in tickers.items():
+                ticker_dir = os.path.join(self.processed_dir, name)
+                years = ticker_entry['years']
+                ticker_mtime = _mtime_ns(ticker_dir)
+                if ticker_mtime != ticker_entry['mtime_ns']:
+                    year_names = set(_list_subdirs(ticker_dir))
+                    for year in list(years):
+                        if year not in year_names:
+                            del years[year]
+                    for year in year_names:
+                        years.setdefault(year, None)
+                    ticker_entry['mtime_ns'] = ticker_mtime
+                    changed = True
+
+                for year, report in list(years.items()):
+                    report_dir = os.path.join(ticker_dir, year)
+                    report_mtime = _mtime_ns(report_dir)
+                    if report_mtime is None:
+                        del years[year]
+                        changed = True
+                    elif report is None or report['mtime_ns'] != report_mtime:
+                        years[year] = self._scan_report_dir(report_dir, report_mtime)
+                        changed = True
+
+            # 已有分析结果的报告
+            results_mtime = _mtime_ns(self.results_dir)
+            if results_mtime != manifest['results_mtime_ns']:
+                try:
+                    file_names = os.listdir(self.results_dir)
+                except FileNotFoundError:
+                    file_names = []
+                analyzed = set()
+                for name in file_names:
+                    if name.endswith(RESULT_FILE_SUFFIX):
+                        analyzed.add(name[:-len(RESULT_FILE_SUFFIX)])
+                    elif name.endswith(RESULT_DIR_SUFFIX):
+                        analyzed.add(name[:-len(RESULT_DIR_SUFFIX)])
+                manifest['analyzed'] = sorted(analyzed)
+                manifest['results_mtime_ns'] = results_mtime
+                changed = True
+
+            if changed:
+                self._save_manifest()
+            return changed
+
+    def mark_analyzed(self, ticker: str, date: str):
+        """记录新保存了分析结果的报告（无需等待结果目录的mtime刷新）"""
+        report_key = f"{ticker}_{date}"
+        with self._lock:
+            if report_key not in self._manifest['analyzed']:
+                self._manifest['analyzed'] = sorted(self._manifest['analyzed'] + [report_key])
+
+    def tickers(self) -> List[str]:
+        """返回所有股票代码"""
+        with self._lock:
+            return sorted(self._manifest['tickers'])
+
+    def reports(self, ticker: Optional[str] = None, year: Optional[str] = None) -> List[Dict]:
+        """
+        返回报告列表，按股票代码和年份排序
+
+        Args:
+            ticker: 可选的股票代码筛选
+            year: 可选的年份筛选
+
+        Returns:
+            报告列表，每项包含 ticker、date、sections（章节名 -> 文件大小）、
+            sentences_size（句子文件大小，不存在时为None）、analyzed、path
+        """
+        reports = []
+        with self._lock:
+            analyzed = set(self._manifest['analyzed'])
+            for ticker_name in sorted(self._manifest['tickers']):
+                if ticker and ticker_name != ticker:
+                    continue
+                years = self._manifest['tickers'][ticker_name]['years']
+                for year_value in sorted(years):
+                    if year and year_value != year:
+                        continue
+                    report = years[year_value]
+                    if report is None:
+                        continue
+                    reports.append({
+                        'ticker': ticker_name,
+                        'date': year_value,
+                        'sections': dict(report['sections']),
+                        'sentences_size': report['sentences_size'],
+                        'analyzed': f"{ticker_name}_{year_value}" in analyzed,
+                        'path': os.path.join(self.processed_dir, ticker_name, year_value)
+                    })
+        return reports
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    from preprocess.config import PROCESSED_DATA_DIR, RESULTS_DIR, CATALOG_MANIFEST_PATH
+
+    catalog = ReportCatalog(PROCESSED_DATA_DIR, RESULTS_DIR, CATALOG_MANIFEST_PATH)
+    catalog.refresh(force=True)
+    reports = catalog.reports()
+    print(f"目录清单已重建：{len(catalog.tickers())} 个股票代码，{len(reports)} 个报告，"
+          f"{sum(1 for report in reports if report['analyzed'])} 个已有分析结果")
@@ -1,16 +1,24 @@
 import os
 import re
 import sys
+import csv
 import glob
-from bs4 import BeautifulSoup
-import nltk
+import html
+import json
+import time
+from functools import partial, lru_cache
+from html.parser import HTMLParser
 from tqdm import tqdm
 import logging
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 # 添加项目根目录到路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
+from catalog import touch_report_dir
+from submission import SubmissionReader
+from sections import locate_items
+from segmentation import segment_text, sentences_from_spans, normalize_sentence, save_segments
 
 # 配置日志
 logging.basicConfig(
@@ -22,17 +30,146 @@ logging.basicConfig(
     ]
 )
 
-# 下载必要的NLTK资源
-nltk.download('punkt', quiet=True)
+# 支持的HTML解析器
+HTML_PARSERS = ('lxml', 'html.parser')
 
-def extract_text_from_html(html_content):
-    """从HTML内容中提取纯文本"""
+
+@lru_cache(maxsize=1)
+def _lxml_available():
     try:
-        soup = BeautifulSoup(html_content, 'html.parser')
-        # 移除脚本和样式元素
-        for element in soup(["script", "style"]):
-            element.extract()
-        text = soup.get_text()
+        import lxml.html  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def resolve_html_parser(parser):
+    """确定实际使用的HTML解析器，lxml未安装时回退到html.parser"""
+    if parser not in HTML_PARSERS:
+        raise ValueError(f"不支持的HTML解析器: {parser}，可选: {', '.join(HTML_PARSERS)}")
+    if parser == 'lxml' and not _lxml_available():
+        logging.warning("未安装lxml，使用html.parser解析HTML（pip install lxml 可加快预处理）")
+        return 'html.parser'
+    return parser
+
+
+# 不提取文本的元素
+_SKIPPED_ELEMENTS = ('script', 'style')
+
+# lxml与html.parser处理方式不同的结构：结束标签之后的内容会被lxml丢弃，CDATA段在HTML模式下不保留
+_CLOSING_DOCUMENT_TAGS = re.compile(r'</(?:body|html)\s*>', re.IGNORECASE)
+_CDATA_SECTION = re.compile(r'<!\[CDATA\[(.*?)\]\]>', re.DOTALL)
+
+
+class _TextCollector:
+    """收集文本片段，跳过脚本和样式元素中的内容"""
+
+    def __init__(self):
+        self.parts = []
+        self.skip_depth = 0
+
+    def start(self, tag, attrib=None):
+        if tag in _SKIPPED_ELEMENTS:
+            self.skip_depth += 1
+
+    def end(self, tag):
+        if tag in _SKIPPED_ELEMENTS and self.skip_depth:
+            self.skip_depth -= 1
+
+    def data(self, data):
+        if not self.skip_depth:
+            self.parts.append(data)
+
+    def comment(self, text):
+        pass
+
+    def close(self):
+        return ''.join(self.parts)
+
+
+class _HTMLParserTextExtractor(HTMLParser):
+    """基于标准库html.parser的增量文本提取（BeautifulSoup的html.parser后端也基于它）"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._collector = _TextCollector()
+
+    def handle_starttag(self, tag, attrs):
+        self._collector.start(tag)
+
+    def handle_endtag(self, tag):
+        self._collector.end(tag)
+
+    def handle_data(self, data):
+        self._collector.data(data)
+
+    def unknown_decl(self, data):
+        # 与BeautifulSoup一致，CDATA段的内容作为文本保留
+        if data.upper().startswith('CDATA['):
+            self._collector.data(data[len('CDATA['):])
+
+    def close(self):
+        super().close()
+        return self._collector.close()
+
+
+class _LxmlTextExtractor:
+    """基于lxml解析器事件（不构建文档树）的增量文本提取"""
+
+    def __init__(self):
+        from lxml import etree
+
+        self._collector = _TextCollector()
+        # 以字节解析，避免带编码声明的XML头（内联XBRL文档常见）导致解析失败
+        self._parser = etree.HTMLParser(target=self._collector, encoding='utf-8', huge_tree=True)
+        self._fed = False
+        # 上一段末尾未完整的标签或CDATA段，与下一段拼接后再处理
+        self._pending = ''
+
+    def feed(self, chunk):
+        chunk = self._pending + chunk
+        # 结束标签和CDATA段可能跨两段，正则替换只作用于完整的结构：
+        # 末尾未闭合的CDATA段或不完整的标签留到下一段
+        cut = len(chunk)
+        cdata = chunk.rfind('<![CDATA[')
+        if cdata >= 0 and chunk.find(']]>', cdata) < 0:
+            cut = cdata
+        else:
+            tag = chunk.rfind('<')
+            if tag >= 0 and chunk.find('>', tag) < 0:
+                cut = tag
+        self._pending = chunk[cut:]
+        self._feed(chunk[:cut])
+
+    def _feed(self, chunk):
+        chunk = _CLOSING_DOCUMENT_TAGS.sub('', chunk)
+        if '<![CDATA[' in chunk:
+            chunk = _CDATA_SECTION.sub(lambda m: html.escape(m.group(1), quote=False), chunk)
+        if chunk:
+            self._parser.feed(chunk.encode('utf-8'))
+            self._fed = True
+
+    def close(self):
+        pending, self._pending = self._pending, ''
+        self._feed(pending)
+        if not self._fed:
+            return ""
+        return self._parser.close()
+
+
+def extract_text_from_chunks(chunks, parser=config.HTML_PARSER):
+    """
+    从逐段产出的HTML内容中增量提取纯文本，不需要把整个HTML文档保存在内存中
+    
+    Args:
+        chunks: HTML内容片段的迭代器
+        parser: HTML解析器，'lxml' 或 'html.parser'，两者提取的文本一致
+    """
+    try:
+        extractor = _LxmlTextExtractor() if parser == 'lxml' and _lxml_available() else _HTMLParserTextExtractor()
+        for chunk in chunks:
+            extractor.feed(chunk)
+        text = extractor.close()
         # 处理多余空白
         lines = (line.strip() for line in text.splitlines() if line.strip())
         text = '\n'.join(lines)
@@ -41,18 +178,23 @@ def extract_text_from_html(html_content):
         logging.error(f"HTML解析出错: {str(e)}")
         return ""
 
-def clean_10k_report(file_path):
-    """清理10-K报告文件"""
+
+def extract_text_from_html(html_content, parser=config.HTML_PARSER):
+    """从HTML内容中提取纯文本"""
+    return extract_text_from_chunks([html_content], parser)
+
+def clean_10k_report(file_path, parser=config.HTML_PARSER, reader=None):
+    """
+    清理10-K报告文件
+    
+    只流式读取主文档的HTML部分并增量提取文本，附件和内嵌的二进制文档不会被载入内存
+    """
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='replace') as file:
-            content = file.read()
-        
-        # 提取HTML部分
-        html_match = re.search(r'<DOCUMENT>.*?<TEXT>(.*?)</TEXT>', content, re.DOTALL)
-        html_content = html_match.group(1) if html_match else content
+        if reader is None:
+            reader = SubmissionReader(file_path)
         
         # 提取纯文本
-        cleaned_text = extract_text_from_html(html_content)
+        cleaned_text = extract_text_from_chunks(reader.iter_primary_text(), parser)
         if not cleaned_text:
             raise ValueError("无法提取有效文本")
         
@@ -67,13 +209,12 @@ def clean_10k_report(file_path):
         logging.error(f"清理文件 {file_path} 时出错: {str(e)}")
         return ""
 
-def extract_year(file_path, content):
-    """从文件内容或路径中提取年份"""
+def extract_year(file_path, period_of_report=None):
+    """从SEC头部的报告期或文件路径中提取年份"""
     try:
-        # 优先从文件内容提取
-        year_match = re.search(r'CONFORMED PERIOD OF REPORT:\s*(\d{4})', content[:5000])
-        if year_match:
-            return year_match.group(1)
+        # 优先使用SEC头部中的报告期
+        if period_of_report:
+            return period_of_report[:4]
         # 从路径提取日期
         date_match = re.search(r'(\d{8})', file_path)
         if date_match:
@@ -85,40 +226,17 @@ def extract_year(file_path, content):
         logging.error(f"提取年份出错: {str(e)}")
         return "2000"
 
-def extract_items(text):
-    """提取10-K报告中的重要Item章节"""
-    items = {}
-    item_patterns = {
-        'Item_1': r'Item\s+1[\.\-\s:]*Business(?:\s+Overview)?',
-        'Item_1A': r'Item\s+1A[\.\-\s:]*Risk\s+Factors',
-        'Item_7': r'Item\s+7[\.\-\s:]*Management[\'’]?s\s+Discussion(?:\s+and\s+Analysis)?',
-        'Item_7A': r'Item\s+7A[\.\-\s:]*Quantitative\s+and\s+Qualitative(?:\s+Disclosures)?'
-    }
-    
-    # 记录所有Item标题位置
-    item_positions = []
-    for item_key, pattern in item_patterns.items():
-        for match in re.finditer(pattern, text, re.IGNORECASE):
-            item_positions.append((match.start(), match.group(0), item_key))
-    
-    # 按位置排序
-    item_positions.sort(key=lambda x: x[0])
-    
-    # 提取章节内容
-    for i, (pos, title, item_key) in enumerate(item_positions):
-        end_pos = item_positions[i+1][0] if i < len(item_positions) - 1 else len(text)
-        content = text[pos:end_pos].strip()
-        # 清理内容，移除下一个Item标题之前的内容
-        next_item = re.search(r'Item\s+\d+[A-Z]?[\.\-\s:]', content[len(title):], re.IGNORECASE)
-        if next_item:
-            content = content[:len(title) + next_item.start()]
-        items[item_key] = content
+def save_cleaned_text(ticker, year, text, items, sections=None):
+    """
+    保存清理后的文本到processed目录
     
-    logging.info(f"提取到的章节: {list(items.keys())}")
-    return items
-
-def save_cleaned_text(ticker, year, text, items):
-    """保存清理后的文本到processed目录"""
+    Args:
+        ticker: 股票代码
+        year: 年份
+        text: 清理后的全文
+        items: 章节名到章节内容的映射
+        sections: 可选的章节位置（locate_items的结果），写入items.json
+    """
     processed_dir = os.path.join(config.PROCESSED_DATA_DIR, ticker, str(year))
     os.makedirs(processed_dir, exist_ok=True)
     
@@ -132,53 +250,139 @@ def save_cleaned_text(ticker, year, text, items):
             with open(os.path.join(processed_dir, f'{item_name}.txt'), 'w', encoding='utf-8') as f:
                 f.write(item_text)
         
-        # 提取并保存句子
+        # 保存各章节在full_text.txt中的字符位置
+        if sections is not None:
+            with open(os.path.join(processed_dir, 'items.json'), 'w', encoding='utf-8') as f:
+                json.dump({item_name: section._asdict() for item_name, section in sections.items()},
+                          f, ensure_ascii=False, indent=2)
+        
+        # 各章节分句，保存句子在章节文本中的位置（API和分析器直接使用，不再重复分句）
+        segments = {item_name: segment_text(item_text) for item_name, item_text in items.items()}
+        save_segments(processed_dir, items, segments)
+        
+        # 按同一分句结果生成句子文件
         sentences = []
         for item_name in ['Item_7', 'Item_1A', 'Item_1', 'Item_7A']:
             if item_name in items:
-                sentences.extend(nltk.sent_tokenize(items[item_name]))
+                sentences.extend(sentences_from_spans(items[item_name], segments[item_name]))
         if not sentences:
-            sentences = nltk.sent_tokenize(text)
+            sentences = sentences_from_spans(text, segment_text(text))
         
         with open(os.path.join(processed_dir, 'sentences.txt'), 'w', encoding='utf-8') as f:
             for sentence in sentences:
-                clean_sentence = re.sub(r'\s+', ' ', sentence).strip()
-                if len(clean_sentence) >= 10 and len(clean_sentence.split()) >= 5:
-                    f.write(clean_sentence + '\n')
+                f.write(normalize_sentence(sentence) + '\n')
+        
+        # 原地覆盖文件不会改变目录mtime，手动更新以便目录清单重新扫描该报告
+        touch_report_dir(processed_dir)
     except Exception as e:
         logging.error(f"保存文件 {ticker}/{year} 时出错: {str(e)}")
 
-def process_file(file_path):
-    """处理单个10-K报告文件"""
+def process_file(file_path, parser=config.HTML_PARSER):
+    """
+    处理单个10-K报告文件
+    
+    Returns:
+        处理记录：文件、股票代码、年份、状态以及各阶段耗时（秒）
+    """
+    record = {'file': file_path, 'ticker': None, 'year': None, 'status': 'failed',
+              'read': 0.0, 'clean': 0.0, 'extract': 0.0, 'save': 0.0, 'total': 0.0}
+    start = time.perf_counter()
     try:
         ticker = file_path.split(os.sep)[-4]
-        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
-            content = f.read()
-        year = extract_year(file_path, content)
+        record['ticker'] = ticker
+        # 只读取SEC头部，正文在清理阶段流式读取
+        reader = SubmissionReader(file_path)
+        year = extract_year(file_path, reader.period_of_report)
+        record['year'] = year
+        record['read'] = time.perf_counter() - start
         
         logging.info(f"开始处理 {ticker} 的 {year} 年报告")
-        cleaned_text = clean_10k_report(file_path)
+        stage_start = time.perf_counter()
+        cleaned_text = clean_10k_report(file_path, parser, reader)
+        record['clean'] = time.perf_counter() - stage_start
         if not cleaned_text:
             raise ValueError("清理后的文本为空")
         
-        items = extract_items(cleaned_text)
-        save_cleaned_text(ticker, year, cleaned_text, items)
+        stage_start = time.perf_counter()
+        sections = locate_items(cleaned_text)
+        items = {item_name: cleaned_text[section.start:section.end] for item_name, section in sections.items()}
+        logging.info(f"提取到的章节: {list(items.keys())}")
+        record['extract'] = time.perf_counter() - stage_start
+        
+        stage_start = time.perf_counter()
+        save_cleaned_text(ticker, year, cleaned_text, items, sections)
+        record['save'] = time.perf_counter() - stage_start
+        record['status'] = 'ok'
         logging.info(f"成功处理 {ticker} 的 {year} 年报告，提取 {len(items)} 个章节")
     except Exception as e:
         logging.error(f"处理 {file_path} 时出错: {str(e)}")
+    record['total'] = time.perf_counter() - start
+    logging.info(f"耗时 {record['total']:.2f}s (读取 {record['read']:.2f}s, 清理 {record['clean']:.2f}s, "
+                 f"章节 {record['extract']:.2f}s, 保存 {record['save']:.2f}s): {file_path}")
+    return record
+
+def write_timings(records, timings_path):
+    """把每个文件的处理耗时写入CSV"""
+    fields = ['file', 'ticker', 'year', 'status', 'read', 'clean', 'extract', 'save', 'total']
+    with open(timings_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(records)
 
-def process_all_reports():
-    """处理所有下载的10-K报告"""
+def process_all_reports(workers=config.CLEAN_WORKERS, executor=config.CLEAN_EXECUTOR, parser=config.HTML_PARSER,
+                        timings_path=None):
+    """
+    处理所有下载的10-K报告
+    
+    Args:
+        workers: 并行数，None表示CPU核数
+        executor: 'process'（多进程，HTML解析和正则处理是纯Python的CPU密集型工作，不受GIL限制）或 'thread'
+        parser: HTML解析器，'lxml'（更快）或 'html.parser'
+        timings_path: 可选的CSV路径，写入每个文件的各阶段耗时
+    """
     raw_data_pattern = os.path.join(config.RAW_DATA_DIR, 'sec-edgar-filings', '*', '10-K', '*', 'full-submission.txt')
     report_files = glob.glob(raw_data_pattern)
     
     if not report_files:
         logging.warning(f"未找到任何10-K报告文件: {raw_data_pattern}")
-        return
+        return []
+    
+    parser = resolve_html_parser(parser)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(report_files)))
+    executor_class = ProcessPoolExecutor if executor == 'process' else ThreadPoolExecutor
+    
+    logging.info(f"找到 {len(report_files)} 个10-K报告文件，开始处理 "
+                 f"({workers} 个{'进程' if executor == 'process' else '线程'}, 解析器 {parser})...")
+    start = time.perf_counter()
+    with executor_class(max_workers=workers) as pool:
+        # 多进程时按块分发，减少进程间通信次数
+        chunksize = max(1, len(report_files) // (workers * 8)) if executor == 'process' else 1
+        records = list(tqdm(pool.map(partial(process_file, parser=parser), report_files, chunksize=chunksize),
+                            total=len(report_files)))
+    elapsed = time.perf_counter() - start
     
-    logging.info(f"找到 {len(report_files)} 个10-K报告文件，开始处理...")
-    with ThreadPoolExecutor(max_workers=4) as executor:
-        list(tqdm(executor.map(process_file, report_files), total=len(report_files)))
+    succeeded = sum(1 for record in records if record['status'] == 'ok')
+    logging.info(f"处理完成: 成功 {succeeded}/{len(records)} 个文件，总耗时 {elapsed:.1f}s，"
+                 f"吞吐 {len(records) / elapsed:.2f} 文件/秒")
+    for record in sorted(records, key=lambda r: r['total'], reverse=True)[:5]:
+        logging.info(f"最慢: {record['total']:.2f}s {record['file']}")
+    
+    if timings_path:
+        write_timings(records, timings_path)
+        logging.info(f"每个文件的处理耗时已写入 {timings_path}")
+    return records
 
 if __name__ == "__main__":
-    process_all_reports()
\ No newline at end of file
+    import argparse
+    
+    arg_parser = argparse.ArgumentParser(description="清洗10-K报告并提取关键章节")
+    arg_parser.add_argument("--workers", type=int, default=config.CLEAN_WORKERS, help="并行数（默认CPU核数）")
+    arg_parser.add_argument("--executor", type=str, choices=['process', 'thread'], default=config.CLEAN_EXECUTOR,
+                            help="并行方式")
+    arg_parser.add_argument("--parser", type=str, choices=HTML_PARSERS, default=config.HTML_PARSER,
+                            help="HTML解析器")
+    arg_parser.add_argument("--timings", type=str, default=None, help="写入每个文件处理耗时的CSV路径")
+    
+    args = arg_parser.parse_args()
+    process_all_reports(workers=args.workers, executor=args.executor, parser=args.parser,
+                        timings_path=args.timings)
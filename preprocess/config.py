@@ -18,9 +18,89 @@ END_DATE = '2023-12-31'
 # 结果目录
 RESULTS_DIR = os.path.join(ROOT_DIR, 'results')
 
-# NLTK数据目录
+# 报告情感摘要索引（SQLite）文件名，位于结果目录中
+SUMMARY_INDEX_FILENAME = 'summary_index.sqlite'
+
+# 报告分析结果的存储格式：'json'（默认，{ticker}_{date}_analysis.json）或
+# 'columnar'（{ticker}_{date}_analysis/ 目录，概率/标签为类型化数组，文本为带偏移索引的文本块；
+# 章节句子的分页/筛选更快，但不再生成 *_analysis.json，依赖该文件的外部程序需改用API读取）
+RESULT_STORAGE_FORMAT = 'json'
+
+# 缓存目录
+CACHE_DIR = os.path.join(ROOT_DIR, 'cache')
+
+# 句子级情感分析结果缓存（SQLite）及其最大条目数
+SENTENCE_CACHE_PATH = os.path.join(CACHE_DIR, 'sentence_results.sqlite')
+SENTENCE_CACHE_MAX_ENTRIES = 1000000
+
+# 句子解释（逐token遮挡归因）：缓存（SQLite）及其最大条目数、句子截断的最大token数
+# （每个token生成一个遮挡变体，推理量与句子长度成正比）和批量解释一次最多的句子数
+EXPLANATION_CACHE_PATH = os.path.join(CACHE_DIR, 'sentence_explanations.sqlite')
+EXPLANATION_CACHE_MAX_ENTRIES = 100000
+EXPLANATION_MAX_LENGTH = 128
+EXPLANATION_MAX_TOP_K = 50
+
+# 推理后端（'torch'、'torch-int8'、'onnx'）及ONNX导出缓存目录
+INFERENCE_BACKEND = 'torch'
+ONNX_EXPORT_DIR = os.path.join(CACHE_DIR, 'onnx')
+
+# 处理后报告的目录清单文件，以及API两次检查目录mtime之间的最短间隔（秒）
+CATALOG_MANIFEST_PATH = os.path.join(CACHE_DIR, 'report_catalog.json')
+CATALOG_REFRESH_INTERVAL = 2
+
+# 章节级长文档分析：滑动窗口重叠token数和窗口结果聚合方式（'mean' 或 'length_weighted'）
+LONG_DOC_WINDOW_OVERLAP = 128
+LONG_DOC_AGGREGATION = 'length_weighted'
+
+# /api/analyze-text 微批调度：每批最多请求数和凑批最长等待时间（毫秒）
+INFERENCE_MAX_BATCH_SIZE = 32
+INFERENCE_MAX_WAIT_MS = 10
+
+# API进程内已解析报告结果缓存：最多缓存的报告数和总大小（MB，按结果文件大小计）
+REPORT_CACHE_MAX_ENTRIES = 64
+REPORT_CACHE_MAX_MB = 256
+
+# 后台报告分析任务的并发数
+ANALYSIS_JOB_WORKERS = 2
+
+# 按请求开启的性能剖析（请求头 X-Profile: 1 或查询参数 profile=true，predict.py --profile）：
+# 是否允许、结果目录、最多保留的剖析目录数和调用栈采样间隔（毫秒）
+PROFILING_ENABLED = True
+PROFILE_DIR = os.path.join(ROOT_DIR, 'profiles')
+PROFILE_MAX_SESSIONS = 20
+PROFILE_SAMPLE_INTERVAL_MS = 5
+
+# 10-K清洗：并行方式（'process' 多进程或 'thread' 多线程）、并行数（None表示CPU核数）
+# 以及HTML解析器（'lxml' 更快，未安装时回退到 'html.parser'）
+CLEAN_EXECUTOR = 'process'
+CLEAN_WORKERS = None
+HTML_PARSER = 'lxml'
+
+# NLTK数据目录（分句模型优先从这里查找，本地没有时下载到这里）
 NLTK_DATA_DIR = os.path.join(ROOT_DIR, 'resources', 'nltk_data')
 
+# 本地模型目录，模型保存在 <MODEL_DIR>/<模型名，'/'替换为'--'> 下，存在时直接从本地加载
+# （python -m sentiment_analysis.resources 预先下载模型和NLTK数据）
+MODEL_DIR = os.path.join(ROOT_DIR, 'resources', 'models')
+
+# API使用的模型名称（同时是结果指纹和句子缓存中的模型标识）
+FINBERT_MODEL_NAME = 'ProsusAI/finbert'
+
+# API可选择的模型（请求参数 model=<名称>）：名称 -> Hugging Face模型名或本地模型目录；
+# FINETUNED_MODELS_DIR 下含 config.json 的子目录（微调模型）也可按目录名选择。
+# 默认模型的结果保存在 RESULTS_DIR，其他模型的结果保存在 RESULTS_DIR/models/<名称>/
+SERVED_MODELS = {'finbert': FINBERT_MODEL_NAME}
+DEFAULT_SERVED_MODEL = 'finbert'
+FINETUNED_MODELS_DIR = os.path.join(ROOT_DIR, 'models')
+
+# 同时加载的模型的内存预算（MB），超出时卸载最久未使用的模型（默认模型常驻）
+MODEL_MEMORY_BUDGET_MB = 4096
+
+# API启动后在后台加载模型并用这段文本做一次预热推理，完成后才标记为就绪；
+# 加载期间需要模型的接口返回503，Retry-After 响应头为建议的重试间隔（秒）
+MODEL_WARMUP_TEXT = "The company reported strong revenue growth and improved operating margins this year."
+MODEL_LOADING_RETRY_AFTER = 5
+
 # 10-K报告重要章节的关键词和标记
 SECTIONS = {
     "md_and_a": [
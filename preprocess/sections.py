@@ -0,0 +1,81 @@
+import re
+from typing import Dict, List, NamedTuple
+
+# 需要提取的Item章节及其标题
+ITEM_TITLES = {
+    'Item_1': r'1[\.\-\s:]*Business(?:\s+Overview)?',
+    'Item_1A': r'1A[\.\-\s:]*Risk\s+Factors',
+    'Item_7': r'7[\.\-\s:]*Management[\'’]?s\s+Discussion(?:\s+and\s+Analysis)?',
+    'Item_7A': r'7A[\.\-\s:]*Quantitative\s+and\s+Qualitative(?:\s+Disclosures)?'
+}
+
+# 所有Item标题的组合模式：需要提取的章节各占一个命名分组，其余Item（2–15、1B、9A等）只作为章节边界
+_ITEM_HEADING = re.compile(
+    r'Item\s+(?:' + '|'.join(f'(?P<{key}>{pattern})' for key, pattern in ITEM_TITLES.items())
+    + r'|\d+[A-Z]?[\.\-\s:])',
+    re.IGNORECASE
+)
+
+
+class ItemSection(NamedTuple):
+    """章节在清理后全文中的位置，text[start:end] 即章节内容"""
+    start: int
+    end: int
+    title: str
+
+
+def find_item_candidates(text: str) -> Dict[str, List[ItemSection]]:
+    """
+    一次扫描找出每个章节的所有候选位置
+
+    章节从标题开始，到下一个任意Item标题（或全文末尾）为止，去掉末尾空白。
+    目录中的条目和正文中的引用也会成为候选。
+
+    Args:
+        text: 清理后的全文
+
+    Returns:
+        章节名到候选位置列表（按出现顺序）的映射
+    """
+    headings = [(match.start(), match.lastgroup, match.group(0)) for match in _ITEM_HEADING.finditer(text)]
+    candidates = {}
+    for i, (start, key, title) in enumerate(headings):
+        if key not in ITEM_TITLES:
+            continue
+        end = headings[i + 1][0] if i + 1 < len(headings) else len(text)
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        candidates.setdefault(key, []).append(ItemSection(start, end, title))
+    return candidates
+
+
+def locate_items(text: str) -> Dict[str, ItemSection]:
+    """
+    确定每个章节在全文中的位置
+
+    同一章节出现多次时（目录、正文、交叉引用），目录条目只有标题和页码，
+    取内容最长的一次作为正文；长度相同时取靠后的一次。
+
+    Args:
+        text: 清理后的全文
+
+    Returns:
+        章节名到位置的映射，按章节在全文中的位置排序
+    """
+    items = {}
+    for key, sections in find_item_candidates(text).items():
+        items[key] = max(reversed(sections), key=lambda section: section.end - section.start)
+    return dict(sorted(items.items(), key=lambda item: item[1].start))
+
+
+def extract_items(text: str) -> Dict[str, str]:
+    """
+    提取10-K报告中的重要Item章节
+
+    Args:
+        text: 清理后的全文
+
+    Returns:
+        章节名到章节内容的映射
+    """
+    return {key: text[section.start:section.end] for key, section in locate_items(text).items()}
@@ -0,0 +1,206 @@
+import io
+import os
+import re
+import hashlib
+import logging
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from preprocess.config import NLTK_DATA_DIR
+
+# 分句结果文件（每个报告目录一个），保存各章节句子在章节文本中的字符位置
+SEGMENTS_FILENAME = 'segments.npz'
+
+# 有效句子的最少单词数和最少字符数（空白规整后），预处理、API和批量分析共用同一规则
+MIN_SENTENCE_WORDS = 5
+MIN_SENTENCE_CHARS = 10
+
+# 分句规则版本，规则变化时旧的分句结果文件会被忽略
+SEGMENTATION_VERSION = 1
+
+_WHITESPACE = re.compile(r'\s+')
+
+# 分句数据的查找和下载在进程内串行进行
+_DOWNLOAD_LOCK = threading.Lock()
+
+
+def normalize_sentence(sentence: str) -> str:
+    """规整句子中的空白（换行、连续空格）"""
+    return _WHITESPACE.sub(' ', sentence).strip()
+
+
+def is_valid_sentence(sentence: str) -> bool:
+    """句子是否满足最少单词数和最少字符数"""
+    return len(sentence.split()) >= MIN_SENTENCE_WORDS and len(normalize_sentence(sentence)) >= MIN_SENTENCE_CHARS
+
+
+def _punkt_resource():
+    """当前nltk版本使用的Punkt数据名称和分句器类（nltk >= 3.8.2 使用 punkt_tab 格式，旧版本为None）"""
+    try:
+        from nltk.tokenize import PunktTokenizer
+        return 'punkt_tab', PunktTokenizer
+    except ImportError:
+        return 'punkt', None
+
+
+def ensure_sentence_tokenizer_data(download: bool = True) -> str:
+    """
+    确认Punkt分句模型的数据在本地可用，先查找 NLTK_DATA_DIR，再查找nltk的默认路径
+
+    多个线程同时调用时只下载一次。
+
+    Args:
+        download: 本地没有时是否下载到 NLTK_DATA_DIR
+
+    Returns:
+        数据所在的本地路径
+
+    Raises:
+        LookupError: 本地没有数据且不允许下载或下载失败
+    """
+    import nltk
+
+    if NLTK_DATA_DIR not in nltk.data.path:
+        nltk.data.path.insert(0, NLTK_DATA_DIR)
+    resource, _ = _punkt_resource()
+    with _DOWNLOAD_LOCK:
+        try:
+            return str(nltk.data.find(f'tokenizers/{resource}'))
+        except LookupError:
+            if not download:
+                raise
+        os.makedirs(NLTK_DATA_DIR, exist_ok=True)
+        if not nltk.download(resource, download_dir=NLTK_DATA_DIR, quiet=True):
+            raise LookupError(f"NLTK数据 {resource} 下载失败")
+        return str(nltk.data.find(f'tokenizers/{resource}'))
+
+
+@lru_cache(maxsize=None)
+def get_sentence_tokenizer(language: str = 'english'):
+    """
+    加载Punkt分句模型（每个进程只加载一次），本地没有时下载到 NLTK_DATA_DIR
+
+    Returns:
+        具有 span_tokenize 方法的分句器
+    """
+    import nltk
+
+    ensure_sentence_tokenizer_data()
+    _, PunktTokenizer = _punkt_resource()
+    if PunktTokenizer is not None:
+        return PunktTokenizer(language)
+    return nltk.data.load(f'tokenizers/punkt/{language}.pickle')
+
+
+def segment_text(text: str) -> List[Tuple[int, int]]:
+    """
+    对文本分句并过滤过短的句子
+
+    Args:
+        text: 章节文本
+
+    Returns:
+        有效句子的 (起始位置, 结束位置) 列表，text[start:end] 与 nltk.sent_tokenize 的结果一致
+    """
+    if not text or len(text.strip()) < MIN_SENTENCE_CHARS:
+        return []
+    spans = get_sentence_tokenizer().span_tokenize(text)
+    return [(start, end) for start, end in spans if is_valid_sentence(text[start:end])]
+
+
+def sentences_from_spans(text: str, spans: Iterable[Tuple[int, int]]) -> List[str]:
+    """按字符位置取出句子文本"""
+    return [text[start:end] for start, end in spans]
+
+
+def text_hash(text: str) -> str:
+    """章节文本的SHA-256，用于确认分句结果与章节文件对应"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def save_segments(report_dir: str, sections: Dict[str, str], segments: Dict[str, List[Tuple[int, int]]]):
+    """
+    把各章节的分句位置写入报告目录中的 segments.npz
+
+    所有章节的起止位置分别拼接成两个整数数组，counts 记录每个章节的句子数，
+    hashes 记录分句时的章节文本指纹。句子文本本身不保存，由位置从章节文件中取出。
+
+    Args:
+        report_dir: 处理后报告目录
+        sections: 章节名到章节文本的映射
+        segments: 章节名到分句位置列表的映射
+    """
+    names = [name for name in sections if name in segments]
+    spans = [span for name in names for span in segments[name]]
+    longest = max((len(sections[name]) for name in names), default=0)
+    dtype = np.int32 if longest < 2 ** 31 else np.int64
+    offsets = np.array(spans, dtype=dtype).reshape(-1, 2)
+
+    buffer = io.BytesIO()
+    np.savez_compressed(
+        buffer,
+        version=np.array(SEGMENTATION_VERSION),
+        sections=np.array(names, dtype=str),
+        hashes=np.array([text_hash(sections[name]) for name in names], dtype=str),
+        counts=np.array([len(segments[name]) for name in names], dtype=np.int64),
+        starts=offsets[:, 0],
+        ends=offsets[:, 1]
+    )
+    path = os.path.join(report_dir, SEGMENTS_FILENAME)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(buffer.getvalue())
+    os.replace(tmp_path, path)
+
+
+def load_segments(report_dir: str, sections: Optional[Dict[str, str]] = None) -> Dict[str, List[Tuple[int, int]]]:
+    """
+    读取报告目录中的分句位置
+
+    Args:
+        report_dir: 处理后报告目录
+        sections: 可选的章节名到章节文本的映射，提供时只返回与当前章节文本对应的分句结果
+
+    Returns:
+        章节名到分句位置列表的映射；文件不存在、版本不符或损坏时返回空字典
+    """
+    path = os.path.join(report_dir, SEGMENTS_FILENAME)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['version']) != SEGMENTATION_VERSION:
+                return {}
+            names = [str(name) for name in data['sections']]
+            hashes = [str(value) for value in data['hashes']]
+            bounds = np.concatenate([[0], np.cumsum(data['counts'])])
+            starts = data['starts'].tolist()
+            ends = data['ends'].tolist()
+    except Exception as e:
+        logging.warning(f"读取分句结果 {path} 出错: {e}")
+        return {}
+
+    segments = {}
+    for i, name in enumerate(names):
+        if sections is not None and (name not in sections or text_hash(sections[name]) != hashes[i]):
+            continue
+        segments[name] = list(zip(starts[bounds[i]:bounds[i + 1]], ends[bounds[i]:bounds[i + 1]]))
+    return segments
+
+
+def segment_sections(sections: Dict[str, str], report_dir: Optional[str] = None) -> Dict[str, List[Tuple[int, int]]]:
+    """
+    获取各章节的分句位置：优先使用预处理保存的结果，缺失或过期的章节现场分句
+
+    Args:
+        sections: 章节名到章节文本的映射
+        report_dir: 可选的处理后报告目录
+
+    Returns:
+        章节名到分句位置列表的映射（包含所有章节，没有有效句子的章节为空列表）
+    """
+    stored = load_segments(report_dir, sections) if report_dir else {}
+    return {name: stored[name] if name in stored else segment_text(text) for name, text in sections.items()}
@@ -0,0 +1,184 @@
+import re
+import logging
+from typing import Callable, Iterator, Optional, Tuple
+
+# 按行读取时单次读取的最大字符数，超长的行（整篇HTML写在一行中的情况）会被切分，保证内存占用有上限
+READ_CHUNK_SIZE = 1 << 20
+
+# 主文档的类型（10-K、10-K405、10-K/A 等）
+PRIMARY_DOCUMENT_TYPES = ('10-K',)
+
+_PERIOD_OF_REPORT = re.compile(r'CONFORMED PERIOD OF REPORT:\s*(\d{4,8})')
+
+# 文档正文的结束标签（不区分大小写，与开始标签的匹配方式一致）
+_TEXT_END = '</TEXT>'
+_TEXT_END_PATTERN = re.compile(re.escape(_TEXT_END), re.IGNORECASE)
+
+
+def _read_pieces(f, chunk_size: int) -> Iterator[Tuple[str, bool]]:
+    """
+    逐行读取文件，超过chunk_size的行被切分成多段
+
+    Returns:
+        (片段, 该片段是否位于行首) 的迭代器
+    """
+    at_line_start = True
+    while True:
+        piece = f.readline(chunk_size)
+        if not piece:
+            return
+        yield piece, at_line_start
+        at_line_start = piece.endswith('\n')
+
+
+def _tag_value(piece: str, tag: str) -> Optional[str]:
+    """行首为指定SGML标签时返回标签之后的内容，否则返回None"""
+    stripped = piece.lstrip()
+    if stripped[:len(tag)].upper() == tag:
+        return stripped[len(tag):]
+    return None
+
+
+def _split_text_end(text: str) -> Tuple[str, str, bool]:
+    """
+    在正文片段中查找 </TEXT>
+
+    超长的行被切成多段读取，结束标签可能跨两段，因此未找到时保留末尾 len('</TEXT>')-1 个字符，
+    与下一段拼接后再查找。
+
+    Returns:
+        (可以产出的内容, 保留到下一段的尾部, 是否找到结束标签)
+    """
+    match = _TEXT_END_PATTERN.search(text)
+    if match:
+        return text[:match.start()], '', True
+    keep = len(_TEXT_END) - 1
+    if len(text) <= keep:
+        return '', text, False
+    return text[:-keep], text[-keep:], False
+
+
+def is_primary_document(document_type: Optional[str]) -> bool:
+    """文档类型是否为10-K主文档"""
+    return bool(document_type) and document_type.strip().upper().startswith(PRIMARY_DOCUMENT_TYPES)
+
+
+class SubmissionReader:
+    """
+    流式读取EDGAR的 full-submission.txt
+
+    完整提交文件由SEC头部和若干 <DOCUMENT> 块组成，10-K正文之后通常还有附件、
+    XBRL以及uuencode编码的图片，体积可达数百MB。读取器逐行扫描文件，
+    只从头部取出报告期，并只产出主文档 <TEXT> 中的内容，其余文档块读过即丢弃，
+    内存占用与文件大小无关。
+    """
+
+    def __init__(self, path: str, chunk_size: int = READ_CHUNK_SIZE):
+        """
+        扫描SEC头部
+
+        Args:
+            path: full-submission.txt 路径
+            chunk_size: 单次读取的最大字符数
+        """
+        self.path = path
+        self.chunk_size = chunk_size
+        # 头部中的 CONFORMED PERIOD OF REPORT，没有时为None
+        self.period_of_report = None
+        # 实际产出内容的文档类型
+        self.document_type = None
+        self._documents_offset = None
+        self._scan_header()
+
+    def _open(self):
+        return open(self.path, 'r', encoding='utf-8', errors='replace')
+
+    def _scan_header(self):
+        """读取第一个 <DOCUMENT> 之前的头部，记录报告期和文档块的起始位置"""
+        with self._open() as f:
+            offset = 0
+            for piece, at_line_start in _read_pieces(f, self.chunk_size):
+                if at_line_start and _tag_value(piece, '<DOCUMENT>') is not None:
+                    self._documents_offset = offset
+                    return
+                if self.period_of_report is None:
+                    match = _PERIOD_OF_REPORT.search(piece)
+                    if match:
+                        self.period_of_report = match.group(1)
+                offset = f.tell()
+
+    def _iter_document_text(self, select: Callable[[int, Optional[str]], bool]) -> Iterator[str]:
+        """
+        逐段产出第一个被选中文档块的 <TEXT> 内容，读到 </TEXT> 即停止
+
+        Args:
+            select: 根据文档序号和 <TYPE> 判断是否选中该文档块
+        """
+        with self._open() as f:
+            f.seek(self._documents_offset)
+            state = 'between'
+            index = -1
+            document_type = None
+            tail = ''
+            for piece, at_line_start in _read_pieces(f, self.chunk_size):
+                if state == 'text':
+                    content, tail, found = _split_text_end(tail + piece)
+                    if content:
+                        yield content
+                    if found:
+                        return
+                    continue
+                if not at_line_start:
+                    continue
+
+                if _tag_value(piece, '<DOCUMENT>') is not None:
+                    state = 'document'
+                    index += 1
+                    document_type = None
+                elif state == 'document':
+                    value = _tag_value(piece, '<TYPE>')
+                    if value is not None and document_type is None:
+                        document_type = value.strip()
+                        continue
+                    value = _tag_value(piece, '<TEXT>')
+                    if value is not None:
+                        if not select(index, document_type):
+                            state = 'skip'
+                            continue
+                        self.document_type = document_type
+                        state = 'text'
+                        content, tail, found = _split_text_end(value)
+                        if content:
+                            yield content
+                        if found:
+                            return
+                    elif _tag_value(piece, '</DOCUMENT>') is not None:
+                        state = 'between'
+                elif state == 'skip' and _tag_value(piece, '</DOCUMENT>') is not None:
+                    state = 'between'
+            # 文件在 </TEXT> 之前结束
+            if state == 'text' and tail:
+                yield tail
+
+    def iter_primary_text(self) -> Iterator[str]:
+        """
+        逐段产出主文档的内容（通常是10-K的HTML）
+
+        选择第一个类型为10-K的文档块；没有时退回第一个文档块；
+        文件不是SGML格式（没有 <DOCUMENT>）时产出整个文件的内容。
+        """
+        if self._documents_offset is None:
+            with self._open() as f:
+                for piece, _ in _read_pieces(f, self.chunk_size):
+                    yield piece
+            return
+
+        found = False
+        for piece in self._iter_document_text(lambda index, document_type: is_primary_document(document_type)):
+            found = True
+            yield piece
+        if found or is_primary_document(self.document_type):
+            return
+
+        logging.warning(f"{self.path} 中没有类型为10-K的文档，使用第一个文档")
+        yield from self._iter_document_text(lambda index, document_type: index == 0)
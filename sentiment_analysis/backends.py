@@ -0,0 +1,170 @@
+import os
+import re
+import inspect
+import hashlib
+import numpy as np
+import torch
+from torch import nn
+from typing import Dict, List, Optional
+
+from preprocess.config import ONNX_EXPORT_DIR
+
+# 支持的推理后端
+BACKENDS = ('torch', 'torch-int8', 'onnx')
+
+
+class TorchBackend:
+    """PyTorch eager 推理"""
+
+    name = 'torch'
+    # 模型权重可在fork后的子进程中直接复用
+    fork_safe = True
+
+    def __init__(self, model: nn.Module):
+        self.model = model
+        self.model.eval()
+
+    def __call__(self, inputs: Dict[str, torch.Tensor]) -> torch.Tensor:
+        """对一批已填充的输入做前向推理，返回logits"""
+        with torch.no_grad():
+            return self.model(**inputs).logits
+
+
+class QuantizedTorchBackend(TorchBackend):
+    """PyTorch 动态int8量化推理（仅CPU）"""
+
+    name = 'torch-int8'
+
+    def __init__(self, model: nn.Module):
+        if next(model.parameters()).device.type != 'cpu':
+            raise ValueError("torch-int8 后端仅支持CPU设备")
+        # quantize_dynamic返回量化后的副本，原eager模型保持不变
+        quantized = torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+        super().__init__(quantized)
+
+
+class _LogitsWrapper(nn.Module):
+    """导出ONNX用的包装模块：按位置接收输入，只输出logits"""
+
+    def __init__(self, model: nn.Module, input_names: List[str]):
+        super().__init__()
+        self.model = model
+        self.input_names = input_names
+
+    def forward(self, *args):
+        return self.model(**dict(zip(self.input_names, args))).logits
+
+
+def export_onnx_model(model: nn.Module, tokenizer, model_id: str, export_dir: str = ONNX_EXPORT_DIR) -> str:
+    """
+    将序列分类模型导出为ONNX图，已导出的文件直接复用
+
+    Args:
+        model: eager PyTorch模型
+        tokenizer: 对应的分词器
+        model_id: 模型标识，与torch/transformers版本一起决定导出文件名
+        export_dir: 导出目录
+
+    Returns:
+        ONNX文件路径
+    """
+    import transformers
+
+    fingerprint = hashlib.sha256(
+        f"{model_id}|{torch.__version__}|{transformers.__version__}".encode('utf-8')
+    ).hexdigest()[:16]
+    safe_name = re.sub(r'[^A-Za-z0-9_.-]+', '_', model_id).strip('_')[-64:]
+    onnx_path = os.path.join(export_dir, f"{safe_name}-{fingerprint}.onnx")
+
+    if os.path.exists(onnx_path):
+        return onnx_path
+
+    os.makedirs(export_dir, exist_ok=True)
+    print(f"导出ONNX模型到 {onnx_path} ...")
+
+    dummy = tokenizer(["Net sales increased compared to the prior fiscal year."], return_tensors="pt")
+    input_names = [name for name in tokenizer.model_input_names if name in dummy]
+    args = tuple(dummy[name].to(next(model.parameters()).device) for name in input_names)
+
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+    dynamic_axes['logits'] = {0: 'batch'}
+
+    export_kwargs = {}
+    # 新版本torch默认使用dynamo导出，这里固定使用TorchScript导出以支持dynamic_axes
+    if 'dynamo' in inspect.signature(torch.onnx.export).parameters:
+        export_kwargs['dynamo'] = False
+
+    # 先写入临时文件再重命名，避免并发进程读到不完整的文件
+    tmp_path = f"{onnx_path}.{os.getpid()}.tmp"
+    wrapper = _LogitsWrapper(model, input_names).eval()
+    with torch.no_grad():
+        torch.onnx.export(
+            wrapper,
+            args,
+            tmp_path,
+            input_names=input_names,
+            output_names=['logits'],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+            **export_kwargs
+        )
+    os.replace(tmp_path, onnx_path)
+
+    return onnx_path
+
+
+class OnnxBackend:
+    """导出的ONNX图 + ONNX Runtime CPU推理"""
+
+    name = 'onnx'
+    # ONNX Runtime会话的线程池在fork后不可用，子进程需重新创建
+    fork_safe = False
+
+    def __init__(self, model: nn.Module, tokenizer, model_id: str, export_dir: str = ONNX_EXPORT_DIR):
+        try:
+            import onnxruntime
+        except ImportError:
+            raise ImportError("使用onnx后端需要安装onnxruntime: pip install onnxruntime")
+
+        self.onnx_path = export_onnx_model(model, tokenizer, model_id, export_dir)
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = torch.get_num_threads()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(self.onnx_path, options, providers=['CPUExecutionProvider'])
+        self.input_names = [item.name for item in self.session.get_inputs()]
+
+    def __call__(self, inputs: Dict[str, torch.Tensor]) -> torch.Tensor:
+        """对一批已填充的输入做前向推理，返回logits"""
+        feeds = {}
+        for name in self.input_names:
+            if name in inputs:
+                feeds[name] = inputs[name].cpu().numpy().astype(np.int64)
+            else:
+                # 分词结果缺少的输入（如token_type_ids）按全零补齐
+                feeds[name] = np.zeros_like(inputs['input_ids'].cpu().numpy(), dtype=np.int64)
+        logits = self.session.run(['logits'], feeds)[0]
+        return torch.from_numpy(logits)
+
+
+def create_backend(name: str, model: nn.Module, tokenizer, model_id: str, export_dir: Optional[str] = None):
+    """
+    创建推理后端
+
+    Args:
+        name: 后端名称，可选 'torch'、'torch-int8'、'onnx'
+        model: 已加载的eager模型
+        tokenizer: 对应的分词器
+        model_id: 模型标识（用于ONNX导出缓存）
+        export_dir: ONNX导出目录，None则使用配置中的默认目录
+
+    Returns:
+        可调用的后端对象，输入填充后的张量字典，返回logits
+    """
+    if name == 'torch':
+        return TorchBackend(model)
+    if name == 'torch-int8':
+        return QuantizedTorchBackend(model)
+    if name == 'onnx':
+        return OnnxBackend(model, tokenizer, model_id, export_dir or ONNX_EXPORT_DIR)
+    raise ValueError(f"不支持的推理后端: {name}，可选: {', '.join(BACKENDS)}")
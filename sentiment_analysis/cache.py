@@ -0,0 +1,210 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import List, Dict, Iterable
+
+# 缓存默认最多保留的句子条数
+DEFAULT_MAX_ENTRIES = 1000000
+
+# 单条SQL中IN查询的最大参数个数（SQLite默认上限为999）
+_QUERY_CHUNK_SIZE = 500
+
+# fork出的子进程中丢弃的继承连接：既不能使用也不能关闭（关闭会操作父进程的SQLite文件锁和WAL状态），
+# 保留引用使其不被回收，直到子进程退出
+_ABANDONED_CONNECTIONS = []
+
+
+def normalize_sentence(text: str) -> str:
+    """规范化句子文本：合并连续空白并去除首尾空白"""
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+class SentenceResultCache:
+    """基于SQLite的句子级情感分析结果缓存，可跨报告、跨进程运行复用"""
+
+    # 表名和值列名，子类可替换以缓存其他按句子计算的结果
+    table = 'sentence_results'
+    value_column = 'probabilities'
+
+    def __init__(self, path: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        初始化句子结果缓存
+
+        Args:
+            path: SQLite数据库文件路径
+            max_entries: 最多保留的条目数，超出后按最近访问时间淘汰
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "key TEXT PRIMARY KEY, "
+            f"{self.value_column} TEXT NOT NULL, "
+            "last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{self.table}_access ON {self.table}(last_access)"
+        )
+        self._conn.commit()
+        self._entries = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    @staticmethod
+    def make_key(text: str, model_id: str) -> str:
+        """根据模型标识和规范化后的句子文本生成缓存键"""
+        payload = f"{model_id}\n{normalize_sentence(text)}"
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, List[float]]:
+        """
+        批量查询缓存
+
+        Args:
+            keys: 缓存键列表（可包含重复键）
+
+        Returns:
+            命中的缓存键到概率列表的映射
+        """
+        keys = list(keys)
+        unique_keys = list(dict.fromkeys(keys))
+        found = {}
+
+        with self._lock:
+            for i in range(0, len(unique_keys), _QUERY_CHUNK_SIZE):
+                chunk = unique_keys[i:i + _QUERY_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, {self.value_column} FROM {self.table} WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, value in rows:
+                    found[key] = json.loads(value)
+
+            # 更新命中条目的访问时间，供淘汰使用
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    f"UPDATE {self.table} SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                self._conn.commit()
+
+            hit_count = sum(1 for key in keys if key in found)
+            self.hits += hit_count
+            self.misses += len(keys) - hit_count
+
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]):
+        """
+        批量写入缓存，写入后超出容量时淘汰最久未访问的条目
+
+        Args:
+            items: 缓存键到概率列表的映射
+        """
+        if not items:
+            return
+
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, {self.value_column}, last_access) VALUES (?, ?, ?)",
+                [(key, self._encode(value), now) for key, value in items.items()]
+            )
+            self._conn.commit()
+            self._entries += cursor.rowcount if cursor.rowcount > 0 else len(items)
+
+            if self._entries > self.max_entries:
+                self._evict()
+
+    @staticmethod
+    def _encode(probabilities) -> str:
+        return json.dumps([float(p) for p in probabilities])
+
+    def _evict(self):
+        """淘汰最久未访问的条目，使条目数回到上限以内（调用方需持有锁）"""
+        # 其他进程可能也在写入，淘汰前重新统计实际条目数
+        self._entries = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        overflow = self._entries - self.max_entries
+        if overflow <= 0:
+            return
+
+        self._conn.execute(
+            f"DELETE FROM {self.table} WHERE key IN ("
+            f"SELECT key FROM {self.table} ORDER BY last_access LIMIT ?)",
+            (overflow,)
+        )
+        self._conn.commit()
+        self._entries -= overflow
+
+    def merge_stats(self, hits: int, misses: int):
+        """计入其他进程（并行分析的工作进程）使用同一缓存文件时的命中统计"""
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def stats(self) -> Dict:
+        """返回缓存命中统计"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total > 0 else 0,
+            'entries': self._entries,
+            'max_entries': self.max_entries
+        }
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._conn.commit()
+            self._entries = 0
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+    def abandon_after_fork(self):
+        """
+        在fork出的子进程中丢弃从父进程继承的连接（不使用也不关闭），之后本对象不可再用
+
+        SQLite连接不能跨fork使用，子进程需要在fork之后用相同路径重新打开缓存。
+        """
+        _ABANDONED_CONNECTIONS.append(self._conn)
+        self._conn = None
+
+
+class ExplanationCache(SentenceResultCache):
+    """
+    句子解释（逐token归因）的缓存，键为句子文本和模型标识（含解释方法）的哈希
+
+    值为可JSON序列化的字典，存取方式与句子结果缓存相同。
+    """
+
+    table = 'sentence_explanations'
+    value_column = 'explanation'
+
+    @staticmethod
+    def make_key(text: str, model_id: str) -> str:
+        """根据模型标识和原始句子文本生成缓存键（归因中的字符偏移对应原始文本，不做规范化）"""
+        payload = f"{model_id}\n{text}"
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _encode(explanation: Dict) -> str:
+        return json.dumps(explanation, ensure_ascii=False)
@@ -0,0 +1,60 @@
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+
+def fingerprint_text(text: str) -> str:
+    """计算文本内容的指纹（SHA-256）"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def build_fingerprint(model_id: str, kind: str, files: Dict[str, str], options: Optional[Dict] = None) -> Dict:
+    """
+    构建一次分析的输入指纹，随分析结果一起保存
+
+    Args:
+        model_id: 分析器的模型标识（模型名/路径及推理后端）
+        kind: 结果格式，'sections'（API逐章节分句）或 'items'（predict.py）
+        files: 输入名称（章节名或 'sentences'）到文本内容的映射
+        options: 影响结果的分析参数
+
+    Returns:
+        指纹字典
+    """
+    return {
+        'model_id': model_id,
+        'kind': kind,
+        'options': options or {},
+        'files': {name: fingerprint_text(text) for name, text in files.items()}
+    }
+
+
+def plan_reanalysis(previous: Optional[Dict], current: Dict, force: bool = False) -> Tuple[List[str], List[str]]:
+    """
+    比较新旧指纹，确定哪些输入可以沿用上次的结果
+
+    模型、结果格式或分析参数不同时全部重新分析；否则只有内容变化的输入需要重新分析。
+
+    Args:
+        previous: 上次分析结果中保存的指纹，没有时为None
+        current: 本次输入的指纹
+        force: 强制全部重新分析
+
+    Returns:
+        (可沿用的输入名列表, 需要重新分析的输入名列表)
+    """
+    names = list(current['files'])
+    if force or not previous:
+        return [], names
+    if any(previous.get(key) != current[key] for key in ('model_id', 'kind', 'options')):
+        return [], names
+
+    previous_files = previous.get('files', {})
+    reuse = [name for name in names if previous_files.get(name) == current['files'][name]]
+    rerun = [name for name in names if previous_files.get(name) != current['files'][name]]
+    return reuse, rerun
+
+
+def is_unchanged(previous: Optional[Dict], current: Dict) -> bool:
+    """上次的结果是否与本次输入完全对应（无需重新分析也无需重新保存）"""
+    _, rerun = plan_reanalysis(previous, current)
+    return not rerun and previous is not None and set(previous.get('files', {})) == set(current['files'])
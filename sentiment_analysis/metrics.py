@@ -0,0 +1,263 @@
+import time
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# 延迟直方图的默认分桶（秒），覆盖从亚毫秒的后处理到数十秒的整份报告分析
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# 比例类直方图（批次填充率、填充浪费）的分桶
+RATIO_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 1.0)
+
+# Prometheus文本格式的Content-Type
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """指标的公共部分：名称、说明、标签名和按标签值保存的数据"""
+
+    type_name = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"指标 {self.name} 的标签应为 {self.labelnames}，实际为 {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Counter(_Metric):
+    """只增不减的计数器"""
+
+    type_name = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """可增可减的当前值"""
+
+    type_name = 'gauge'
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track_inprogress(self, **labels):
+        """在上下文期间把值加一"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    """累积分桶的直方图，输出 _bucket、_sum 和 _count 样本"""
+
+    type_name = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """记录上下文的耗时（秒）"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted((key, ([*state[0]], state[1], state[2])) for key, state in self._values.items())
+        names = self.labelnames + ('le',)
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket{_format_labels(names, key + (_format_value(bound),))} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {count}"
+
+
+class CallbackMetric(_Metric):
+    """
+    采集时由回调函数给出当前值的指标，用于暴露其他组件已有的统计（缓存命中数、任务数等）
+
+    回调返回 (标签值元组, 数值) 的列表，回调出错时该指标不输出样本。
+    """
+
+    def __init__(self, name: str, documentation: str, type_name: str, labelnames: Sequence[str],
+                 callback: Callable[[], Iterable[Tuple[Tuple[str, ...], float]]]):
+        super().__init__(name, documentation, labelnames)
+        self.type_name = type_name
+        self.callback = callback
+
+    def samples(self) -> Iterable[str]:
+        try:
+            values = list(self.callback())
+        except Exception:
+            return
+        for key, value in values:
+            if value is not None:
+                yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class MetricsRegistry:
+    """指标注册表，按注册顺序输出Prometheus文本格式"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        """注册指标；同名指标已存在时返回已有的（模块重复导入时不会重复注册）"""
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None and not isinstance(metric, CallbackMetric):
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name: str, documentation: str, type_name: str, labelnames: Sequence[str],
+                 callback: Callable[[], Iterable[Tuple[Tuple[str, ...], float]]]) -> CallbackMetric:
+        """注册采集时计算的指标（同名时替换回调）"""
+        return self.register(CallbackMetric(name, documentation, type_name, labelnames, callback))
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """输出全部指标的Prometheus文本格式"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+# 进程内的全局注册表
+REGISTRY = MetricsRegistry()
+
+# 推理各阶段耗时：分词、组批填充、前向推理、softmax及结果构建
+INFERENCE_STAGE_SECONDS = REGISTRY.histogram(
+    'finbert_inference_stage_seconds', '推理各阶段的耗时（秒）', ['stage'])
+
+# 送入模型的批次：填充率（按固定句子数分批时为 句子数/批大小，按token预算分批时为 填充后token数/预算）
+INFERENCE_BATCH_FILL_RATIO = REGISTRY.histogram(
+    'finbert_inference_batch_fill_ratio', '批次填充率', ['mode'], buckets=RATIO_BUCKETS)
+
+# 批次中填充token占填充后token总数的比例
+INFERENCE_PADDING_RATIO = REGISTRY.histogram(
+    'finbert_inference_padding_ratio', '批次中填充token的比例', buckets=RATIO_BUCKETS)
+
+INFERENCE_TOKENS = REGISTRY.counter(
+    'finbert_inference_tokens_total', '送入模型的token数（real为有效token，padding为填充token）', ['kind'])
+
+INFERENCE_SENTENCES = REGISTRY.counter(
+    'finbert_inference_sentences_total', '送入模型推理的句子数（不含命中缓存的句子）')
+
+# 分析结果文件的存取：read/write为磁盘读写，parse/serialize为解析（JSON解析或列式解码）和JSON编码；
+# 列式格式的写入包含编码，只记录为write
+RESULT_STORE_SECONDS = REGISTRY.histogram(
+    'finbert_result_store_seconds', '分析结果文件的读写和编解码耗时（秒）', ['operation', 'format'])
+
+# 接口响应的JSON编码
+RESPONSE_SERIALIZE_SECONDS = REGISTRY.histogram(
+    'finbert_response_serialize_seconds', '接口响应JSON编码的耗时（秒）', ['endpoint'])
+
+
+def record_batch(attention_mask, capacity: Optional[int] = None, mode: str = 'fixed'):
+    """
+    记录一批输入的填充情况
+
+    Args:
+        attention_mask: 批次的注意力掩码（numpy数组或torch张量，形状为 (句子数, 长度)）
+        capacity: 批次容量，按固定句子数分批时为批大小，按token预算分批时为预算；None则不记录填充率
+        mode: 'fixed' 或 'token_budget'
+    """
+    rows, width = attention_mask.shape
+    padded = rows * width
+    real = int(attention_mask.sum())
+    INFERENCE_SENTENCES.inc(rows)
+    INFERENCE_TOKENS.inc(real, kind='real')
+    INFERENCE_TOKENS.inc(padded - real, kind='padding')
+    if padded:
+        INFERENCE_PADDING_RATIO.observe((padded - real) / padded)
+    if capacity:
+        used = rows if mode == 'fixed' else padded
+        INFERENCE_BATCH_FILL_RATIO.observe(min(1.0, used / capacity), mode=mode)
@@ -1,28 +1,102 @@
+import os
+import threading
 import torch
 from torch import nn
 from transformers import AutoModel, AutoTokenizer, AutoModelForSequenceClassification
 import numpy as np
-from typing import List, Dict, Tuple, Union
+from typing import List, Dict, Tuple, Union, Optional, Iterator, Callable
+
+from sentiment_analysis.cache import SentenceResultCache, ExplanationCache
+from sentiment_analysis.metrics import INFERENCE_STAGE_SECONDS, record_batch
+from sentiment_analysis.backends import TorchBackend, create_backend
+from sentiment_analysis.pretokenize import TokenizedSentences, tokenizer_key as compute_tokenizer_key
+from sentiment_analysis.resources import resolve_model_path
+from preprocess.segmentation import segment_text, sentences_from_spans
+
+# 长度分桶批处理的默认token预算（每批 句子数 × 填充后长度 的上限）
+DEFAULT_MAX_TOKENS_PER_BATCH = 4096
+
+# 长文档滑动窗口的默认重叠token数和窗口结果聚合方式
+DEFAULT_WINDOW_OVERLAP = 128
+WINDOW_AGGREGATIONS = ('mean', 'length_weighted')
+
+
+def make_length_buckets(lengths: List[int], max_tokens: int) -> List[List[int]]:
+    """
+    按token长度排序后切分批次，使每批填充后的token总数不超过预算
+    
+    Args:
+        lengths: 每个样本分词后的长度
+        max_tokens: 每批的token预算（句子数 × 批内最大长度）
+        
+    Returns:
+        批次列表，每个批次为原始样本下标的列表
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    
+    batches = []
+    current = []
+    current_max = 0
+    for idx in order:
+        length = lengths[idx]
+        # 加入当前样本后超出预算则先结束当前批次（单个超长样本独占一批）
+        if current and max(current_max, length) * (len(current) + 1) > max_tokens:
+            batches.append(current)
+            current = []
+            current_max = 0
+        current.append(idx)
+        current_max = max(current_max, length)
+    
+    if current:
+        batches.append(current)
+    
+    return batches
+
+
+def _state_bytes(module: nn.Module) -> int:
+    """模块 state_dict 中全部张量的字节数（量化层的打包权重以元组形式出现）"""
+    def tensor_bytes(value) -> int:
+        if isinstance(value, torch.Tensor):
+            return value.numel() * value.element_size()
+        if isinstance(value, (tuple, list)):
+            return sum(tensor_bytes(item) for item in value)
+        return 0
+    return sum(tensor_bytes(value) for value in module.state_dict().values())
+
 
 class FinBertSentimentAnalyzer:
     """使用FinBERT模型进行金融文本情感分析"""
     
-    def __init__(self, model_name: str = "ProsusAI/finbert", device: str = None):
+    def __init__(self, model_name: str = "ProsusAI/finbert", device: str = None,
+                 max_tokens_per_batch: Optional[int] = DEFAULT_MAX_TOKENS_PER_BATCH,
+                 cache: Optional[SentenceResultCache] = None, backend: str = 'torch'):
         """
         初始化FinBERT情感分析器
         
         Args:
             model_name: 预训练模型名称，默认为'ProsusAI/finbert'
             device: 运行设备，None则自动选择
+            max_tokens_per_batch: 批量分析时每批的token预算，None或0表示按固定句子数分批
+            cache: 可选的句子结果缓存，命中的句子不再送入模型
+            backend: 推理后端，可选 'torch'、'torch-int8'、'onnx'
         """
         self.model_name = model_name
+        # 不同后端的输出存在微小差异，缓存按后端区分
+        self.model_id = model_name if backend == 'torch' else f"{model_name}#{backend}"
         self.device = device if device else ('cuda' if torch.cuda.is_available() else 'cpu')
+        self.max_tokens_per_batch = max_tokens_per_batch
+        self.cache = cache
+        # fast分词器每次调用都会改写内部的截断/填充设置，多个线程（单文本调度器、分析任务等）并发调用会
+        # 报 "Already borrowed"，所有分词器调用都持有这把锁
+        self._tokenizer_lock = threading.Lock()
         
-        print(f"加载模型 {model_name} 到 {self.device} 设备...")
+        # 本地模型目录中已保存该模型时从本地加载，不访问网络
+        model_path = resolve_model_path(model_name)
+        print(f"加载模型 {model_name} 到 {self.device} 设备（{model_path}）...")
         
         # 加载模型和分词器
-        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-        self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path)
+        self.model = AutoModelForSequenceClassification.from_pretrained(model_path)
         self.model.to(self.device)
         
         # FinBERT标签映射
@@ -34,8 +108,23 @@ class FinBertSentimentAnalyzer:
         
         self.label2id = {v: k for k, v in self.id2label.items()}
         
+        self._setup_backend(backend)
+        
         print("模型加载完成")
     
+    @property
+    def tokenizer_key(self) -> str:
+        """分词器标识，用于查找预处理阶段保存的预分词结果"""
+        if getattr(self, '_tokenizer_key', None) is None:
+            with self._tokenizer_lock:
+                self._tokenizer_key = compute_tokenizer_key(self.tokenizer)
+        return self._tokenizer_key
+    
+    def _tokenize(self, *args, **kwargs):
+        """持有分词器锁调用分词器"""
+        with self._tokenizer_lock:
+            return self.tokenizer(*args, **kwargs)
+    
     def analyze_text(self, text: str) -> Dict:
         """
         分析单个文本的情感
@@ -64,75 +153,408 @@ class FinBertSentimentAnalyzer:
             print(f"警告: 文本过长，将被截断至 {max_length} 个token")
         
         # 分词和推理
-        inputs = self.tokenizer(text, return_tensors="pt", truncation=True, padding=True).to(self.device)
+        with INFERENCE_STAGE_SECONDS.time(stage='tokenize'):
+            inputs = self._tokenize(text, return_tensors="pt", truncation=True, padding=True).to(self.device)
+        record_batch(inputs["attention_mask"])
         
-        with torch.no_grad():
-            outputs = self.model(**inputs)
-            logits = outputs.logits
-            probabilities = torch.nn.functional.softmax(logits, dim=1).squeeze().cpu().numpy()
+        probabilities = self._forward(inputs)[0]
         
-        # 找出最高概率的类别
-        predicted_class_id = np.argmax(probabilities)
-        predicted_label = self.id2label[predicted_class_id]
+        with INFERENCE_STAGE_SECONDS.time(stage='postprocess'):
+            return self._build_result(probabilities, text)
+    
+    def analyze_long_text(self, text: str, overlap: int = DEFAULT_WINDOW_OVERLAP, aggregation: str = 'mean',
+                          max_tokens: Optional[int] = None) -> Dict:
+        """
+        使用滑动窗口分析长文本（如整个Item章节），不再截断到模型最大长度
         
-        # 构建结果字典
-        result = {
-            "label": predicted_label,
-            "confidence": {
-                "negative": float(probabilities[0]),
-                "neutral": float(probabilities[1]),
-                "positive": float(probabilities[2])
-            },
-            "text": text
-        }
+        文本只分词一次，按模型最大长度切成相互重叠的窗口，
+        所有窗口按长度分桶批量推理后聚合为整体结果。需要fast分词器。
+        
+        Args:
+            text: 要分析的文本
+            overlap: 相邻窗口重叠的token数
+            aggregation: 窗口结果聚合方式，'mean'为算术平均，'length_weighted'按窗口token数加权
+            max_tokens: 每批token预算，None则使用实例的默认设置
+            
+        Returns:
+            包含情感标签、置信度和窗口数的字典
+        """
+        if aggregation not in WINDOW_AGGREGATIONS:
+            raise ValueError(f"不支持的聚合方式: {aggregation}，可选: {', '.join(WINDOW_AGGREGATIONS)}")
+        
+        # 处理空文本
+        if not text or len(text.strip()) < 5:
+            result = self.analyze_text(text)
+            result["num_windows"] = 0
+            return result
+        
+        if not self.tokenizer.is_fast:
+            # 慢速分词器不支持按窗口返回溢出token，退回截断分析
+            print("警告: 当前分词器不支持滑动窗口，章节将被截断分析")
+            result = self.analyze_text(text)
+            result["num_windows"] = 1
+            return result
+        
+        max_tokens = max_tokens or self.max_tokens_per_batch or DEFAULT_MAX_TOKENS_PER_BATCH
+        max_length = min(self.tokenizer.model_max_length,
+                         getattr(self.model.config, "max_position_embeddings", self.tokenizer.model_max_length))
+        
+        with self._tokenizer_lock:
+            num_special = self.tokenizer.num_special_tokens_to_add()
+        # 重叠部分不超过窗口内容长度的一半
+        overlap = min(overlap, (max_length - num_special) // 2)
+        
+        # 整段文本只分词一次，由分词器切成相互重叠的窗口（每个窗口带特殊token）
+        with INFERENCE_STAGE_SECONDS.time(stage='tokenize'):
+            windows = self._tokenize(text, truncation=True, max_length=max_length, stride=overlap,
+                                     return_overflowing_tokens=True)
+        encodings = {key: windows[key] for key in self.tokenizer.model_input_names if key in windows}
+        window_lengths = [max(1, len(ids) - num_special) for ids in encodings["input_ids"]]
+        
+        probabilities = self._predict_encoded(encodings, max_tokens)
+        
+        # 聚合窗口结果
+        if aggregation == 'length_weighted':
+            weights = np.asarray(window_lengths, dtype=np.float32)
+            document_probs = (probabilities * weights[:, None]).sum(axis=0) / weights.sum()
+        else:
+            document_probs = probabilities.mean(axis=0)
+        
+        result = self._build_result(document_probs, text)
+        result["num_windows"] = len(window_lengths)
+        result["aggregation"] = aggregation
         
         return result
     
-    def analyze_batch(self, texts: List[str], batch_size: int = 8) -> List[Dict]:
+    def analyze_batch(self, texts: List[str], batch_size: int = 8, max_tokens: Optional[int] = None,
+                      tokens: Optional[TokenizedSentences] = None) -> List[Dict]:
         """
         批量分析多个文本的情感
         
+        设置了token预算时，先对全部文本分词一次，再按长度分桶组批，
+        每批只填充到桶内最长句子，结果仍按输入顺序返回。
+        配置了句子缓存时，只有未命中缓存的句子会送入模型。
+        
         Args:
             texts: 文本列表
-            batch_size: 批处理大小
+            batch_size: 批处理大小（仅在未设置token预算时使用）
+            max_tokens: 每批token预算，None则使用实例的max_tokens_per_batch
+            tokens: 可选的预分词结果（与texts一一对应），提供时直接组批，不再调用分词器
             
         Returns:
             情感分析结果列表
         """
         if not texts:
             return []
-            
-        results = []
         
+        if max_tokens is None:
+            max_tokens = self.max_tokens_per_batch
+        if tokens is not None and len(tokens) != len(texts):
+            tokens = None
+        
+        if self.cache is not None:
+            probabilities = self._predict_texts_cached(texts, batch_size, max_tokens, tokens)
+        else:
+            probabilities = self._predict_texts(texts, batch_size, max_tokens, tokens)
+        
+        with INFERENCE_STAGE_SECONDS.time(stage='postprocess'):
+            return [self._build_result(probs, text) for probs, text in zip(probabilities, texts)]
+    
+    def _predict_texts(self, texts: List[str], batch_size: int, max_tokens: Optional[int],
+                       tokens: Optional[TokenizedSentences] = None) -> np.ndarray:
+        """对文本列表推理，返回按输入顺序排列的概率矩阵"""
+        if tokens is not None:
+            return self._predict_tokenized(tokens, batch_size, max_tokens)
+        
+        if max_tokens:
+            # 长度分桶批处理
+            with INFERENCE_STAGE_SECONDS.time(stage='tokenize'):
+                encodings = self._tokenize(texts, truncation=True)
+            return self._predict_encoded(encodings, max_tokens)
+        
+        # 按到达顺序固定数量分批
+        batch_probabilities = []
         for i in range(0, len(texts), batch_size):
             batch_texts = texts[i:i + batch_size]
+            with INFERENCE_STAGE_SECONDS.time(stage='tokenize'):
+                inputs = self._tokenize(batch_texts, return_tensors="pt", padding=True, truncation=True).to(self.device)
+            record_batch(inputs["attention_mask"], batch_size, 'fixed')
+            batch_probabilities.append(self._forward(inputs))
+        return np.concatenate(batch_probabilities)
+    
+    def _predict_texts_cached(self, texts: List[str], batch_size: int, max_tokens: Optional[int],
+                              tokens: Optional[TokenizedSentences] = None) -> np.ndarray:
+        """先查询句子缓存，只对未命中（且去重后）的句子推理并写回缓存"""
+        keys = [self.cache.make_key(text, self.model_id) for text in texts]
+        known = self.cache.get_many(keys)
+        
+        # 未命中的键 -> 首次出现的位置
+        pending = {}
+        for i, key in enumerate(keys):
+            if key not in known and key not in pending:
+                pending[key] = i
+        
+        if pending:
+            miss_keys = list(pending)
+            miss_indices = [pending[key] for key in miss_keys]
+            miss_probabilities = self._predict_texts([texts[i] for i in miss_indices], batch_size, max_tokens,
+                                                     tokens.select(miss_indices) if tokens is not None else None)
+            computed = {key: probs.tolist() for key, probs in zip(miss_keys, miss_probabilities)}
+            self.cache.put_many(computed)
+            known.update(computed)
+        
+        return np.array([known[key] for key in keys], dtype=np.float32)
+    
+    def _setup_backend(self, backend: str):
+        """创建推理后端（eager模型self.model保留，用于一致性校验）"""
+        self.backend_name = backend
+        self.backend = create_backend(backend, self.model, self.tokenizer, self.model_id)
+    
+    def memory_bytes(self) -> int:
+        """
+        模型占用内存的估计值（字节）：eager模型的权重，加上量化副本的权重或导出的ONNX图的大小
+        """
+        total = _state_bytes(self.model)
+        backend_model = getattr(self.backend, 'model', None)
+        if backend_model is not None and backend_model is not self.model:
+            total += _state_bytes(backend_model)
+        onnx_path = getattr(self.backend, 'onnx_path', None)
+        if onnx_path and os.path.exists(onnx_path):
+            total += os.path.getsize(onnx_path)
+        return total
+    
+    def _forward(self, inputs, backend=None) -> np.ndarray:
+        """对已分词并填充的一批输入做前向推理，返回softmax概率"""
+        with INFERENCE_STAGE_SECONDS.time(stage='forward'):
+            logits = (backend or self.backend)(inputs)
+            if isinstance(logits, torch.Tensor) and logits.is_cuda:
+                # CUDA异步执行，同步后耗时才计入前向推理
+                torch.cuda.synchronize()
+        with INFERENCE_STAGE_SECONDS.time(stage='postprocess'), torch.no_grad():
+            probabilities = torch.nn.functional.softmax(logits, dim=1).cpu().numpy()
+        return probabilities
+    
+    def check_backend_agreement(self, texts: List[str], max_tokens: Optional[int] = None) -> Dict:
+        """
+        校验当前推理后端与eager PyTorch模型的一致性
+        
+        Args:
+            texts: 用于校验的文本列表
+            max_tokens: 每批token预算，None则使用实例的默认设置
             
-            # 分词
-            inputs = self.tokenizer(batch_texts, return_tensors="pt", padding=True, truncation=True).to(self.device)
+        Returns:
+            包含标签一致率和最大概率差的字典
+        """
+        if not texts:
+            return {'backend': self.backend_name, 'samples': 0, 'label_agreement': 1.0,
+                    'max_prob_delta': 0.0, 'mean_prob_delta': 0.0}
+        
+        max_tokens = max_tokens or self.max_tokens_per_batch or DEFAULT_MAX_TOKENS_PER_BATCH
+        reference = TorchBackend(self.model)
+        
+        encodings = self._tokenize(texts, truncation=True)
+        lengths = [len(ids) for ids in encodings["input_ids"]]
+        candidate_probs = []
+        reference_probs = []
+        
+        # 两个后端使用完全相同的批次输入
+        for batch_indices in make_length_buckets(lengths, max_tokens):
+            features = [{key: encodings[key][i] for key in encodings.keys()} for i in batch_indices]
+            inputs = self.tokenizer.pad(features, return_tensors="pt").to(self.device)
+            candidate_probs.append(self._forward(inputs))
+            reference_probs.append(self._forward(inputs, backend=reference))
+        
+        candidate_probs = np.concatenate(candidate_probs)
+        reference_probs = np.concatenate(reference_probs)
+        deltas = np.abs(candidate_probs - reference_probs)
+        
+        return {
+            'backend': self.backend_name,
+            'samples': len(texts),
+            'label_agreement': float(np.mean(candidate_probs.argmax(axis=1) == reference_probs.argmax(axis=1))),
+            'max_prob_delta': float(deltas.max()),
+            'mean_prob_delta': float(deltas.mean())
+        }
+    
+    def explain_batch(self, texts: List[str], target: Optional[str] = None, max_tokens: Optional[int] = None,
+                      max_length: Optional[int] = None,
+                      cache: Optional[ExplanationCache] = None) -> List[Dict]:
+        """
+        用遮挡法（occlusion）计算每个句子逐token的归因
+
+        每个token的归因为：原句目标类别的概率减去把该token替换为[MASK]后的概率，
+        正值表示该token支持目标类别。所有句子的原句和全部遮挡变体合在一起，
+        按长度分桶做一次批量推理（只需前向，任何推理后端都可用）。
+        配置了缓存时，命中的句子不再推理；缓存中保存全部类别的归因，目标类别只在返回时选择。
+
+        Args:
+            texts: 句子列表
+            target: 解释的类别（模型 label2id 中的标签名），None表示每个句子的预测类别
+            max_tokens: 每批token预算，None则使用实例的默认设置
+            max_length: 句子截断的最大token数（遮挡变体数与句子长度成正比），None表示模型最大长度
+            cache: 可选的解释缓存，按句子文本、模型和截断长度索引
+
+        Returns:
+            与输入顺序一致的结果列表，每项包含标签、置信度、目标类别和逐token归因
+            （token、在原句中的字符偏移 start/end、attribution）
+        """
+        if target is not None and target not in self.label2id:
+            raise ValueError(f"不支持的类别: {target}，可选: {', '.join(map(str, self.label2id))}")
+        if not texts:
+            return []
+
+        cache_model_id = f"{self.model_id}|occlusion|{max_length or 'max'}"
+        keys = [ExplanationCache.make_key(text, cache_model_id) for text in texts]
+        known = cache.get_many(keys) if cache is not None else {}
+
+        # 未命中的键 -> 首次出现的位置
+        pending = {}
+        for i, key in enumerate(keys):
+            if key not in known and key not in pending:
+                pending[key] = i
+
+        if pending:
+            miss_keys = list(pending)
+            explanations = self._occlusion([texts[pending[key]] for key in miss_keys],
+                                           max_tokens or self.max_tokens_per_batch or DEFAULT_MAX_TOKENS_PER_BATCH,
+                                           max_length)
+            computed = dict(zip(miss_keys, explanations))
+            if cache is not None:
+                cache.put_many(computed)
+            known.update(computed)
+
+        results = []
+        for text, key in zip(texts, keys):
+            explanation = known[key]
+            result = self._build_result(np.asarray(explanation['probabilities']), text)
+            # 按模型的标签映射确定归因列（微调模型的 id2label 来自模型配置）
+            result['target'] = target or result['label']
+            label_id = self.label2id[result['target']]
+            result['method'] = 'occlusion'
+            result['tokens'] = [
+                {'token': token, 'start': start, 'end': end, 'attribution': attribution[label_id]}
+                for token, (start, end), attribution in zip(explanation['tokens'], explanation['offsets'],
+                                                            explanation['attributions'])
+            ]
+            results.append(result)
+        return results
+
+    def _occlusion(self, texts: List[str], max_tokens: int, max_length: Optional[int]) -> List[Dict]:
+        """对句子列表做遮挡推理，返回每个句子的概率、token、字符偏移和全部类别的归因（可直接写入缓存）"""
+        mask_id = self.tokenizer.mask_token_id
+        if mask_id is None:
+            mask_id = self.tokenizer.unk_token_id
+
+        with INFERENCE_STAGE_SECONDS.time(stage='tokenize'):
+            encoded = self._tokenize(texts, truncation=True, max_length=max_length,
+                                     return_special_tokens_mask=True,
+                                     return_offsets_mapping=self.tokenizer.is_fast)
+        input_keys = [key for key in self.tokenizer.model_input_names if key in encoded]
+
+        # 每个句子依次排列原句和逐个遮挡非特殊token的变体
+        encodings = {key: [] for key in input_keys}
+        positions = []
+        for i in range(len(texts)):
+            ids = encoded['input_ids'][i]
+            sentence_positions = [p for p, special in enumerate(encoded['special_tokens_mask'][i]) if not special]
+            positions.append(sentence_positions)
+            for key in input_keys:
+                if key != 'input_ids':
+                    encodings[key].extend([encoded[key][i]] * (len(sentence_positions) + 1))
+            encodings['input_ids'].append(ids)
+            encodings['input_ids'].extend(ids[:p] + [mask_id] + ids[p + 1:] for p in sentence_positions)
+
+        probabilities = self._predict_encoded(encodings, max_tokens)
+
+        explanations = []
+        start = 0
+        for i, sentence_positions in enumerate(positions):
+            original = probabilities[start]
+            attributions = original[None, :] - probabilities[start + 1:start + 1 + len(sentence_positions)]
+            start += len(sentence_positions) + 1
+            ids = encoded['input_ids'][i]
+            offsets = encoded['offset_mapping'][i] if 'offset_mapping' in encoded else None
+            with self._tokenizer_lock:
+                tokens = self.tokenizer.convert_ids_to_tokens([ids[p] for p in sentence_positions])
+            explanations.append({
+                'probabilities': [float(p) for p in original],
+                'tokens': tokens,
+                'offsets': [list(offsets[p]) if offsets is not None else [None, None] for p in sentence_positions],
+                'attributions': [[round(float(value), 6) for value in row] for row in attributions]
+            })
+        return explanations
+
+    def _predict_encoded(self, encodings, max_tokens: int) -> np.ndarray:
+        """
+        对已分词（未填充）的样本按长度分桶推理
+        
+        Args:
+            encodings: 分词结果，键为input_ids/attention_mask等，值为每个样本的id列表
+            max_tokens: 每批token预算
             
-            # 推理
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                logits = outputs.logits
-                probabilities = torch.nn.functional.softmax(logits, dim=1).cpu().numpy()
+        Returns:
+            按输入顺序排列的概率矩阵
+        """
+        input_ids = encodings["input_ids"]
+        lengths = [len(ids) for ids in input_ids]
+        probabilities = np.zeros((len(input_ids), self.model.config.num_labels), dtype=np.float32)
+        
+        for batch_indices in make_length_buckets(lengths, max_tokens):
+            with INFERENCE_STAGE_SECONDS.time(stage='collate'):
+                features = [{key: encodings[key][i] for key in encodings.keys()} for i in batch_indices]
+                inputs = self.tokenizer.pad(features, return_tensors="pt").to(self.device)
+            record_batch(inputs["attention_mask"], max_tokens, 'token_budget')
+            probabilities[batch_indices] = self._forward(inputs)
+        
+        return probabilities
+    
+    def _predict_tokenized(self, tokens: TokenizedSentences, batch_size: int, max_tokens: Optional[int]) -> np.ndarray:
+        """
+        直接用预分词的token id组批推理（不调用分词器）
+        
+        Args:
+            tokens: 预分词结果
+            batch_size: 批处理大小（仅在未设置token预算时使用）
+            max_tokens: 每批token预算，设置时按长度分桶
             
-            # 处理每个文本的结果
-            for j, probs in enumerate(probabilities):
-                predicted_class_id = np.argmax(probs)
-                predicted_label = self.id2label[predicted_class_id]
-                
-                result = {
-                    "label": predicted_label,
-                    "confidence": {
-                        "negative": float(probs[0]),
-                        "neutral": float(probs[1]),
-                        "positive": float(probs[2])
-                    },
-                    "text": batch_texts[j]
-                }
-                results.append(result)
+        Returns:
+            按输入顺序排列的概率矩阵
+        """
+        if max_tokens:
+            batches = make_length_buckets(tokens.lengths.tolist(), max_tokens)
+        else:
+            batches = [list(range(i, min(i + batch_size, len(tokens)))) for i in range(0, len(tokens), batch_size)]
+        
+        left = self.tokenizer.padding_side == 'left'
+        probabilities = np.zeros((len(tokens), self.model.config.num_labels), dtype=np.float32)
+        for batch_indices in batches:
+            with INFERENCE_STAGE_SECONDS.time(stage='collate'):
+                input_ids, attention_mask = tokens.pad(batch_indices, self.tokenizer.pad_token_id, left)
+                inputs = {'input_ids': torch.from_numpy(input_ids), 'attention_mask': torch.from_numpy(attention_mask)}
+                if 'token_type_ids' in self.tokenizer.model_input_names:
+                    inputs['token_type_ids'] = torch.zeros_like(inputs['input_ids'])
+                inputs = {key: value.to(self.device) for key, value in inputs.items()}
+            record_batch(attention_mask, max_tokens if max_tokens else batch_size,
+                         'token_budget' if max_tokens else 'fixed')
+            probabilities[batch_indices] = self._forward(inputs)
+        
+        return probabilities
+    
+    def _build_result(self, probabilities: np.ndarray, text: str) -> Dict:
+        """根据概率向量构建结果字典"""
+        # 找出最高概率的类别
+        predicted_class_id = int(np.argmax(probabilities))
+        predicted_label = self.id2label[predicted_class_id]
         
-        return results
+        return {
+            "label": predicted_label,
+            "confidence": {
+                "negative": float(probabilities[0]),
+                "neutral": float(probabilities[1]),
+                "positive": float(probabilities[2])
+            },
+            "text": text
+        }
     
     def analyze_sentences(self, sentences: List[str]) -> List[Dict]:
         """分析句子列表"""
@@ -149,19 +571,9 @@ class FinBertSentimentAnalyzer:
         Returns:
             文档级别和句子级别的情感分析结果
         """
-        import nltk
-        
-        # 确保已下载分句模型
-        try:
-            nltk.data.find('tokenizers/punkt')
-        except LookupError:
-            nltk.download('punkt')
-        
-        # 分句分析
+        # 分句分析（与预处理相同的分句和过滤规则）
         if split_sentences:
-            sentences = nltk.sent_tokenize(document)
-            # 过滤掉过短的句子
-            valid_sentences = [sent for sent in sentences if len(sent.split()) > 5]
+            valid_sentences = sentences_from_spans(document, segment_text(document))
             
             sentence_results = self.analyze_batch(valid_sentences)
         else:
@@ -175,83 +587,126 @@ class FinBertSentimentAnalyzer:
             "sentences": sentence_results
         }
     
-    def analyze_report_sections(self, sections: Dict[str, str]) -> Dict:
+    def analyze_report_sections(self, sections: Dict[str, str],
+                                progress_callback: Optional[Callable[[int, int], None]] = None,
+                                segments: Optional[Dict[str, List[Tuple[int, int]]]] = None,
+                                tokens: Optional[Dict[str, TokenizedSentences]] = None) -> Dict:
         """
         分析报告的多个章节
         
         Args:
             sections: 章节名称到文本内容的映射
+            progress_callback: 可选的进度回调，参数为 (已完成句子数, 句子总数)
+            segments: 可选的预处理分句结果（章节名称到句子起止位置列表的映射）
+            tokens: 可选的预分词结果（章节名称到该章节句子的token id）
             
         Returns:
             每个章节的分析结果
         """
-        import nltk
+        results = {}
+        for section_name, section_result in self.iter_report_sections(sections, progress_callback, segments, tokens):
+            results[section_name] = section_result
         
-        # 确保已下载分句模型
-        try:
-            nltk.data.find('tokenizers/punkt')
-        except LookupError:
-            nltk.download('punkt')
+        return {
+            'sections': results,
+            'summary': self.summarize_sections(results)
+        }
+    
+    def iter_report_sections(self, sections: Dict[str, str],
+                             progress_callback: Optional[Callable[[int, int], None]] = None,
+                             segments: Optional[Dict[str, List[Tuple[int, int]]]] = None,
+                             tokens: Optional[Dict[str, TokenizedSentences]] = None
+                             ) -> Iterator[Tuple[str, Dict]]:
+        """
+        逐章节分析报告，每完成一个章节就产出其结果
+        
+        Args:
+            sections: 章节名称到文本内容的映射
+            progress_callback: 可选的进度回调，参数为 (已完成句子数, 句子总数)
+            segments: 可选的预处理分句结果（章节名称到句子起止位置列表的映射），
+                其中没有的章节现场分句
+            tokens: 可选的预分词结果（章节名称到该章节句子的token id），其中没有的章节现场分词
             
-        results = {}
-        all_sentences = []
+        Yields:
+            (章节名称, 章节分析结果) 元组
+        """
+        segments = segments or {}
+        tokens = tokens or {}
         
-        # 对每个章节进行分析
+        # 先取出所有章节的句子，以便得到句子总数用于进度汇报
+        section_sentences = {}
         for section_name, section_text in sections.items():
-            if not section_text or len(section_text.strip()) < 10:
-                continue
-                
-            # 分句
-            sentences = nltk.sent_tokenize(section_text)
-            valid_sentences = [s for s in sentences if len(s.split()) >= 5]
+            spans = segments[section_name] if section_name in segments else segment_text(section_text)
+            valid_sentences = sentences_from_spans(section_text, spans)
             
-            if not valid_sentences:
-                continue
-                
-            # 分析句子情感
-            sentence_results = self.analyze_batch(valid_sentences)
-            
-            # 整理句子级结果
-            formatted_sentences = [
-                {
-                    "text": sent,
-                    "label": result["label"],
-                    "confidence": result["confidence"]
-                }
-                for sent, result in zip(valid_sentences, sentence_results)
-            ]
-            
-            # 计算章节摘要
-            positive = sum(1 for s in sentence_results if s['label'] == 'positive')
-            neutral = sum(1 for s in sentence_results if s['label'] == 'neutral')
-            negative = sum(1 for s in sentence_results if s['label'] == 'negative')
-            total = len(sentence_results)
-            
-            # 保存章节结果
-            results[section_name] = {
-                'sentences': formatted_sentences,
-                'summary': {
-                    'positive': positive / total if total > 0 else 0,
-                    'neutral': neutral / total if total > 0 else 0,
-                    'negative': negative / total if total > 0 else 0
-                },
-                'counts': {
-                    'positive': positive,
-                    'neutral': neutral,
-                    'negative': negative
-                }
+            if valid_sentences:
+                section_sentences[section_name] = valid_sentences
+        
+        total = sum(len(sentences) for sentences in section_sentences.values())
+        done = 0
+        if progress_callback:
+            progress_callback(done, total)
+        
+        # 对每个章节进行分析
+        for section_name, valid_sentences in section_sentences.items():
+            section_result = self._analyze_section_sentences(valid_sentences, tokens.get(section_name))
+            done += len(valid_sentences)
+            if progress_callback:
+                progress_callback(done, total)
+            yield section_name, section_result
+    
+    def _analyze_section_sentences(self, sentences: List[str], tokens: Optional[TokenizedSentences] = None) -> Dict:
+        """分析一个章节的句子并计算章节摘要"""
+        # 分析句子情感
+        sentence_results = self.analyze_batch(sentences, tokens=tokens)
+        
+        # 整理句子级结果
+        formatted_sentences = [
+            {
+                "text": sent,
+                "label": result["label"],
+                "confidence": result["confidence"]
             }
-            
-            # 收集所有句子用于整体摘要
-            all_sentences.extend(formatted_sentences)
+            for sent, result in zip(sentences, sentence_results)
+        ]
+        
+        # 计算章节摘要
+        positive = sum(1 for s in sentence_results if s['label'] == 'positive')
+        neutral = sum(1 for s in sentence_results if s['label'] == 'neutral')
+        negative = sum(1 for s in sentence_results if s['label'] == 'negative')
+        total = len(sentence_results)
         
-        # 计算整体摘要
-        positive = sum(1 for s in all_sentences if s['label'] == 'positive')
-        neutral = sum(1 for s in all_sentences if s['label'] == 'neutral')
-        negative = sum(1 for s in all_sentences if s['label'] == 'negative')
-        total = len(all_sentences)
+        return {
+            'sentences': formatted_sentences,
+            'summary': {
+                'positive': positive / total if total > 0 else 0,
+                'neutral': neutral / total if total > 0 else 0,
+                'negative': negative / total if total > 0 else 0
+            },
+            'counts': {
+                'positive': positive,
+                'neutral': neutral,
+                'negative': negative
+            }
+        }
+    
+    @staticmethod
+    def summarize_sections(section_results: Dict[str, Dict]) -> Dict:
+        """
+        根据各章节结果计算报告整体摘要
         
-        summary = {
+        Args:
+            section_results: 章节名称到章节分析结果的映射
+            
+        Returns:
+            整体摘要字典
+        """
+        positive = sum(result['counts']['positive'] for result in section_results.values())
+        neutral = sum(result['counts']['neutral'] for result in section_results.values())
+        negative = sum(result['counts']['negative'] for result in section_results.values())
+        total = positive + neutral + negative
+        
+        return {
             'positive_count': positive,
             'neutral_count': neutral,
             'negative_count': negative,
@@ -260,25 +715,33 @@ class FinBertSentimentAnalyzer:
             'negative_ratio': negative / total if total > 0 else 0,
             'total_sentences': total
         }
-        
-        return {
-            'sections': results,
-            'summary': summary
-        }
 
 # 扩展模型 - 使用自定义的金融领域微调模型
 class CustomFinancialSentimentAnalyzer(FinBertSentimentAnalyzer):
     """使用自定义微调的金融情感分析模型"""
     
-    def __init__(self, model_path: str, device: str = None):
+    def __init__(self, model_path: str, device: str = None,
+                 max_tokens_per_batch: Optional[int] = DEFAULT_MAX_TOKENS_PER_BATCH,
+                 cache: Optional[SentenceResultCache] = None, backend: str = 'torch'):
         """
         初始化自定义金融情感分析器
         
         Args:
             model_path: 微调模型的路径
             device: 运行设备
+            max_tokens_per_batch: 批量分析时每批的token预算
+            cache: 可选的句子结果缓存
+            backend: 推理后端，可选 'torch'、'torch-int8'、'onnx'
         """
+        self.model_name = model_path
+        model_id = os.path.abspath(model_path)
+        self.model_id = model_id if backend == 'torch' else f"{model_id}#{backend}"
         self.device = device if device else ('cuda' if torch.cuda.is_available() else 'cpu')
+        self.max_tokens_per_batch = max_tokens_per_batch
+        self.cache = cache
+        # fast分词器每次调用都会改写内部的截断/填充设置，多个线程（单文本调度器、分析任务等）并发调用会
+        # 报 "Already borrowed"，所有分词器调用都持有这把锁
+        self._tokenizer_lock = threading.Lock()
         
         print(f"从 {model_path} 加载自定义模型...")
         
@@ -299,4 +762,6 @@ class CustomFinancialSentimentAnalyzer(FinBertSentimentAnalyzer):
         
         self.label2id = {v: k for k, v in self.id2label.items()}
         
+        self._setup_backend(backend)
+        
         print("自定义模型加载完成") 
\ No newline at end of file
@@ -1,17 +1,27 @@
 import os
 import json
-import glob
-from typing import List, Dict, Optional, Tuple
+from typing import Iterable, List, Dict, Optional, Tuple
 import pandas as pd
 import numpy as np
 from tqdm import tqdm
 
-from sentiment_analysis.model import FinBertSentimentAnalyzer
+from sentiment_analysis.model import DEFAULT_MAX_TOKENS_PER_BATCH, WINDOW_AGGREGATIONS
+from sentiment_analysis.cache import SentenceResultCache
+from sentiment_analysis.backends import BACKENDS
+from sentiment_analysis.storage import atomic_write_json
+from sentiment_analysis.summary_index import SummaryIndex
+from sentiment_analysis.result_store import ResultStore, RESULT_FORMATS, META_FILENAME
+from sentiment_analysis.fingerprint import build_fingerprint, plan_reanalysis, is_unchanged
+from sentiment_analysis.pretokenize import load_tokenized_inputs
+from sentiment_analysis.profiling import ProfileSession
+from sentiment_analysis.served_models import (scan_finetuned_models, served_models, resolve_served_model,
+                                              model_results_dir, create_analyzer)
 
 # 导入项目配置
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from preprocess.config import *
+from preprocess.catalog import ReportCatalog
 
 def load_processed_files(ticker: Optional[str] = None, year: Optional[str] = None) -> Dict[str, Dict]:
     """
@@ -26,136 +36,338 @@ def load_processed_files(ticker: Optional[str] = None, year: Optional[str] = Non
     """
     files_dict = {}
     
-    # 扫描processed目录寻找所有公司文件夹
-    company_dirs = glob.glob(os.path.join(PROCESSED_DATA_DIR, "*"))
-    company_dirs = [d for d in company_dirs if os.path.isdir(d)]
-    
-    # 如果指定了股票代码，只处理对应公司
-    if ticker:
-        company_dirs = [d for d in company_dirs if os.path.basename(d) == ticker]
-    
-    for company_dir in company_dirs:
-        ticker_name = os.path.basename(company_dir)
-        # 获取该公司的所有年份目录
-        year_dirs = glob.glob(os.path.join(company_dir, "*"))
-        year_dirs = [d for d in year_dirs if os.path.isdir(d)]
-        
-        # 如果指定了年份，只处理对应年份
-        if year:
-            year_dirs = [d for d in year_dirs if os.path.basename(d) == year]
-        
-        for year_dir in year_dirs:
-            year_value = os.path.basename(year_dir)
-            report_key = f"{ticker_name}_{year_value}"
-            
-            # 查找Items文件
-            items = {}
-            sentences_file = os.path.join(year_dir, "sentences.txt")
-            
-            # 加载Item文件内容
-            for item_name in ["Item_1", "Item_1A", "Item_7", "Item_7A"]:
-                item_file = os.path.join(year_dir, f"{item_name}.txt")
-                if os.path.exists(item_file):
-                    try:
-                        with open(item_file, 'r', encoding='utf-8', errors='replace') as f:
-                            items[item_name] = f.read()
-                    except Exception as e:
-                        print(f"读取文件 {item_file} 出错: {e}")
-            
-            # 加载sentences文件
-            sentences = []
-            if os.path.exists(sentences_file):
-                try:
-                    with open(sentences_file, 'r', encoding='utf-8', errors='replace') as f:
-                        sentences = [line.strip() for line in f if line.strip()]
-                except Exception as e:
-                    print(f"读取文件 {sentences_file} 出错: {e}")
-            
-            files_dict[report_key] = {
-                'items': items,
-                'sentences': sentences
-            }
+    # 从目录清单获取报告列表（按目录mtime增量刷新）
+    catalog = ReportCatalog(PROCESSED_DATA_DIR, RESULTS_DIR, CATALOG_MANIFEST_PATH)
+    catalog.refresh()
+    
+    for report in catalog.reports(ticker, year):
+        year_dir = report['path']
+        report_key = f"{report['ticker']}_{report['date']}"
+        
+        # 查找Items文件
+        items = {}
+        sentences_file = os.path.join(year_dir, "sentences.txt")
+        
+        # 加载Item文件内容
+        for item_name in report['sections']:
+            item_file = os.path.join(year_dir, f"{item_name}.txt")
+            try:
+                with open(item_file, 'r', encoding='utf-8', errors='replace') as f:
+                    items[item_name] = f.read()
+            except Exception as e:
+                print(f"读取文件 {item_file} 出错: {e}")
+        
+        # 加载sentences文件
+        sentences = []
+        if report['sentences_size'] is not None:
+            try:
+                with open(sentences_file, 'r', encoding='utf-8', errors='replace') as f:
+                    sentences = [line.strip() for line in f if line.strip()]
+            except Exception as e:
+                print(f"读取文件 {sentences_file} 出错: {e}")
+        
+        files_dict[report_key] = {
+            'items': items,
+            'sentences': sentences,
+            'path': year_dir
+        }
     
     return files_dict
-def analyze_reports(analyzer, ticker: Optional[str] = None, year: Optional[str] = None, batch_size: int = 8) -> Dict:
+def report_fingerprint(analyzer, report_data: Dict, aggregation: str = LONG_DOC_AGGREGATION) -> Dict:
+    """计算单个报告输入（句子文件和各Item文件）的内容指纹"""
+    files = {'sentences': '\n'.join(report_data['sentences'])}
+    files.update(report_data['items'])
+    options = {'aggregation': aggregation, 'window_overlap': LONG_DOC_WINDOW_OVERLAP}
+    return build_fingerprint(analyzer.model_id, 'items', files, options)
+
+
+def analyze_report(analyzer, report_data: Dict, batch_size: int = 8, max_tokens: Optional[int] = None,
+                   aggregation: str = LONG_DOC_AGGREGATION, previous: Optional[Dict] = None,
+                   reuse: Optional[List[str]] = None) -> Dict:
+    """
+    分析单个报告的情感
+    
+    Args:
+        analyzer: 情感分析器实例
+        report_data: load_processed_files返回的单个报告数据
+        batch_size: 批处理大小
+        max_tokens: 每批token预算，None则使用分析器的默认设置
+        aggregation: 章节级滑动窗口结果的聚合方式
+        previous: 该报告上次的分析结果
+        reuse: 内容未变化、直接沿用上次结果的输入名（'sentences' 或 Item名）
+        
+    Returns:
+        该报告的分析结果
+    """
+    reuse = set(reuse or []) if previous is not None else set()
+    report_results = {
+        'summary': {'positive': 0, 'neutral': 0, 'negative': 0},
+        'items': {},
+        'fingerprint': report_fingerprint(analyzer, report_data, aggregation)
+    }
+    
+    total_sentences = 0
+    
+    # 首先分析句子文件（内容未变化时沿用上次的结果）
+    sentences = report_data['sentences']
+    if sentences:
+        if 'sentences' in reuse and 'sentences' in previous:
+            sentence_results = previous['sentences']
+        else:
+            # 有当前分词器的预分词结果时直接使用token id
+            tokens = {}
+            if report_data.get('path'):
+                tokens = load_tokenized_inputs(report_data['path'], analyzer.tokenizer_key, {'sentences': sentences})
+            sentence_results = analyzer.analyze_batch(sentences, batch_size, max_tokens=max_tokens,
+                                                      tokens=tokens.get('sentences'))
+        
+        # 保存句子分析结果
+        report_results['sentences'] = sentence_results
+        
+        # 更新总结
+        for result in sentence_results:
+            label = result['label']
+            # 微调模型可能使用其他标签，计数照常保留，比例只计算三类标准标签
+            report_results['summary'][label] = report_results['summary'].get(label, 0) + 1
+            total_sentences += 1
+    
+    # 分析各个Item章节
+    for item_name, item_text in report_data['items'].items():
+        if not item_text.strip():
+            continue
+        
+        if item_name in reuse and item_name in previous.get('items', {}):
+            report_results['items'][item_name] = previous['items'][item_name]
+            continue
+        
+        # 滑动窗口分析整个章节
+        item_result = analyzer.analyze_long_text(item_text, overlap=LONG_DOC_WINDOW_OVERLAP,
+                                                 aggregation=aggregation, max_tokens=max_tokens)
+        
+        # 保存章节结果
+        report_results['items'][item_name] = item_result
+    
+    # 计算整体比例
+    if total_sentences > 0:
+        for label in ['positive', 'neutral', 'negative']:
+            report_results['summary'][label + '_ratio'] = report_results['summary'][label] / total_sentences
+    else:
+        for label in ['positive', 'neutral', 'negative']:
+            report_results['summary'][label + '_ratio'] = 0
+    
+    return report_results
+
+
+# 工作进程中使用的分析器：fork模式下直接继承父进程已加载的模型（写时复制共享权重），
+# spawn模式下在进程初始化时各自加载
+_worker_analyzer = None
+
+
+def _init_worker(torch_threads: int, spawn_config: Optional[Dict] = None):
+    """工作进程初始化：固定torch线程数，准备分析器和句子缓存"""
+    global _worker_analyzer
+    import torch
+    
+    # 每个进程使用固定的线程数，避免多进程下线程超订
+    torch.set_num_threads(torch_threads)
+    
+    if spawn_config is not None:
+        cache = None
+        if spawn_config['cache_path']:
+            cache = SentenceResultCache(spawn_config['cache_path'], spawn_config['cache_max_entries'])
+        _worker_analyzer = spawn_config['analyzer_class'](
+            spawn_config['model_name'],
+            device=spawn_config['device'],
+            max_tokens_per_batch=spawn_config['max_tokens_per_batch'],
+            cache=cache,
+            backend=spawn_config['backend']
+        )
+    else:
+        if _worker_analyzer.cache is not None:
+            # SQLite连接不能跨fork使用：丢弃继承的连接（不使用、不关闭），在子进程中重新打开同一个缓存文件
+            parent_cache = _worker_analyzer.cache
+            parent_cache.abandon_after_fork()
+            _worker_analyzer.cache = SentenceResultCache(parent_cache.path, parent_cache.max_entries)
+        if not _worker_analyzer.backend.fork_safe:
+            # 推理会话不能跨fork使用，按子进程的线程数重新创建
+            _worker_analyzer._setup_backend(_worker_analyzer.backend_name)
+
+
+def _analyze_report_profiled(analyzer, report_key: str, report_data: Dict, options: Dict, profile: bool) -> Dict:
+    """分析单个报告，profile为True时把调用栈采样和torch.profiler trace写入剖析目录"""
+    if not profile:
+        return analyze_report(analyzer, report_data, **options)
+    with ProfileSession(f"predict_{report_key}", PROFILE_DIR, keep=PROFILE_MAX_SESSIONS,
+                        interval=PROFILE_SAMPLE_INTERVAL_MS / 1000) as session:
+        result = analyze_report(analyzer, report_data, **options)
+    if session.directory is not None:
+        print(f"报告 {report_key} 的性能剖析已保存: {session.directory}")
+    return result
+
+
+def _analyze_report_task(task: Tuple) -> Tuple[str, Dict, Tuple[int, int]]:
+    """工作进程中分析单个报告，同时返回本次分析的句子缓存命中/未命中数（父进程的缓存统计看不到子进程的查询）"""
+    report_key, report_data, options, profile = task
+    cache = _worker_analyzer.cache
+    hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+    result = _analyze_report_profiled(_worker_analyzer, report_key, report_data, options, profile)
+    if cache is not None:
+        hits, misses = cache.hits - hits, cache.misses - misses
+    return report_key, result, (hits, misses)
+
+
+def _analyze_reports_parallel(analyzer, tasks: List[Tuple], workers: int, torch_threads: Optional[int]) -> Dict:
+    """使用进程池并行分析多个报告，结果顺序与顺序执行一致"""
+    global _worker_analyzer
+    import multiprocessing
+    
+    if not torch_threads:
+        torch_threads = max(1, (os.cpu_count() or 1) // workers)
+    
+    if 'fork' in multiprocessing.get_all_start_methods():
+        # 子进程fork时继承父进程的模型
+        context = multiprocessing.get_context('fork')
+        _worker_analyzer = analyzer
+        spawn_config = None
+    else:
+        # 不支持fork的平台（如Windows），由每个子进程自行加载模型
+        context = multiprocessing.get_context('spawn')
+        spawn_config = {
+            'analyzer_class': type(analyzer),
+            'model_name': analyzer.model_name,
+            'device': analyzer.device,
+            'max_tokens_per_batch': analyzer.max_tokens_per_batch,
+            'backend': analyzer.backend_name,
+            'cache_path': analyzer.cache.path if analyzer.cache is not None else None,
+            'cache_max_entries': analyzer.cache.max_entries if analyzer.cache is not None else None
+        }
+    
+    results = {}
+    
+    try:
+        with context.Pool(workers, initializer=_init_worker, initargs=(torch_threads, spawn_config)) as pool:
+            # imap保持任务提交顺序，结果与顺序执行时的报告顺序一致
+            for report_key, report_results, (hits, misses) in tqdm(pool.imap(_analyze_report_task, tasks),
+                                                                   total=len(tasks),
+                                                                   desc=f"分析报告 ({workers} 进程)"):
+                results[report_key] = report_results
+                # 子进程的缓存查询计入父进程的统计，分析结束后的命中率覆盖所有进程
+                if analyzer.cache is not None:
+                    analyzer.cache.merge_stats(hits, misses)
+    finally:
+        _worker_analyzer = None
+    
+    return results
+
+
+def analyze_reports(analyzer, ticker: Optional[str] = None, year: Optional[str] = None, batch_size: int = 8,
+                    max_tokens: Optional[int] = None, workers: int = 1, torch_threads: Optional[int] = None,
+                    aggregation: str = LONG_DOC_AGGREGATION, force: bool = False,
+                    results_dir: str = RESULTS_DIR, stats: Optional[Dict] = None, profile: bool = False) -> Dict:
     """
     分析报告文本的情感
     
+    根据上次结果中保存的输入指纹和模型标识，只重新分析内容发生变化的句子文件/Item章节，
+    完全未变化的报告直接沿用上次的结果。
+    
     Args:
         analyzer: 情感分析器实例
         ticker: 可选的股票代码筛选
         year: 可选的年份筛选
         batch_size: 批处理大小
+        max_tokens: 每批token预算，None则使用分析器的默认设置
+        workers: 并行分析的进程数，1表示在当前进程中顺序分析
+        torch_threads: 每个工作进程的torch线程数，None则按CPU核数平均分配
+        aggregation: 章节级滑动窗口结果的聚合方式
+        force: 忽略上次的结果，全部重新分析
+        results_dir: 上次分析结果所在的目录
+        stats: 可选的统计字典，填入未变化的报告数（及其报告键 unchanged_reports）、沿用和重新分析的章节数
+        profile: 对每个重新分析的报告做性能剖析（结果写入 PROFILE_DIR）
         
     Returns:
         分析结果字典
     """
     # 加载文本文件
     files_dict = load_processed_files(ticker, year)
+    options = {'batch_size': batch_size, 'max_tokens': max_tokens, 'aggregation': aggregation}
+    store = ResultStore(results_dir)
+    if stats is None:
+        stats = {}
+    stats.update({'reports_unchanged': 0, 'unchanged_reports': [], 'sections_skipped': 0, 'sections_rerun': 0})
     
+    # 比较输入指纹，确定每个报告需要重新分析的部分
     results = {}
-    
-    # 对每个报告进行分析
-    for report_key, report_data in tqdm(files_dict.items(), desc="分析报告"):
-        report_results = {
-            'summary': {'positive': 0, 'neutral': 0, 'negative': 0},
-            'items': {}
-        }
+    tasks = []
+    for report_key, report_data in files_dict.items():
+        fingerprint = report_fingerprint(analyzer, report_data, aggregation)
+        previous_summary = None
+        if not force:
+            try:
+                # 列式格式只读取元数据即可拿到上次的指纹
+                previous_summary = store.load_summary(report_key)
+            except Exception as e:
+                print(f"读取报告 {report_key} 的上次分析结果出错，将全部重新分析: {e}")
+        previous_fingerprint = previous_summary.get('fingerprint') if previous_summary else None
         
-        total_sentences = 0
-        
-        # 首先分析句子文件
-        sentences = report_data['sentences']
-        if sentences:
-            sentence_results = analyzer.analyze_batch(sentences, batch_size)
-            
-            # 保存句子分析结果
-            report_results['sentences'] = sentence_results
-            
-            # 更新总结
-            for result in sentence_results:
-                label = result['label']
-                report_results['summary'][label] += 1
-                total_sentences += 1
-        
-        # 分析各个Item章节
-        for item_name, item_text in report_data['items'].items():
-            if not item_text.strip():
-                continue
-            
-            # 直接分析整个章节
-            item_result = analyzer.analyze_text(item_text)
-            
-            # 保存章节结果
-            report_results['items'][item_name] = item_result
-        
-        # 计算整体比例
-        if total_sentences > 0:
-            for label in ['positive', 'neutral', 'negative']:
-                report_results['summary'][label + '_ratio'] = report_results['summary'][label] / total_sentences
-        else:
-            for label in ['positive', 'neutral', 'negative']:
-                report_results['summary'][label + '_ratio'] = 0
+        reuse, rerun = plan_reanalysis(previous_fingerprint, fingerprint, force)
+        stats['sections_skipped'] += len(reuse)
+        stats['sections_rerun'] += len(rerun)
+        
+        if is_unchanged(previous_fingerprint, fingerprint):
+            results[report_key] = store.load(report_key)
+            stats['reports_unchanged'] += 1
+            stats['unchanged_reports'].append(report_key)
+            continue
         
-        results[report_key] = report_results
+        previous = store.load(report_key) if reuse else None
+        tasks.append((report_key, report_data, {**options, 'previous': previous, 'reuse': reuse}, profile))
     
-    return results
+    if workers > 1 and len(tasks) > 1:
+        analyzed = _analyze_reports_parallel(analyzer, tasks, min(workers, len(tasks)), torch_threads)
+    else:
+        analyzed = {}
+        # 对每个报告进行分析
+        for report_key, report_data, task_options, task_profile in tqdm(tasks, desc="分析报告"):
+            analyzed[report_key] = _analyze_report_profiled(analyzer, report_key, report_data, task_options,
+                                                            task_profile)
+    
+    # 保持报告的原有顺序
+    results.update(analyzed)
+    return {report_key: results[report_key] for report_key in files_dict}
 
-def save_analysis_results(results: Dict, output_dir: str = RESULTS_DIR):
-    """保存分析结果到JSON文件"""
+def save_analysis_results(results: Dict, output_dir: str = RESULTS_DIR, storage_format: str = RESULT_STORAGE_FORMAT,
+                          unchanged: Optional[Iterable[str]] = None):
+    """
+    保存分析结果（每个报告一份，JSON或列式格式）
+    
+    unchanged 中的报告（输入和模型均未变化、没有重新分析）已按同一格式保存时不再重写，
+    结果文件的修改时间不变，API的结果缓存和摘要索引不会因此失效。
+    """
     os.makedirs(output_dir, exist_ok=True)
     
-    # 保存整体结果
-    with open(os.path.join(output_dir, 'analysis_results.json'), 'w', encoding='utf-8') as f:
-        json.dump(results, f, ensure_ascii=False, indent=2)
+    # 保存整体结果（仅JSON格式；列式格式下每个报告已单独保存，不再重复写一份）
+    if storage_format == 'json':
+        atomic_write_json(os.path.join(output_dir, 'analysis_results.json'), results)
     
-    # 为每个报告保存单独的JSON文件
+    # 为每个报告单独保存结果，并更新摘要索引
+    store = ResultStore(output_dir, storage_format)
+    summary_index = SummaryIndex(os.path.join(output_dir, SUMMARY_INDEX_FILENAME))
+    if summary_index.created and unchanged:
+        # 新建的索引中没有未重写的报告，先从已有结果重建
+        summary_index.rebuild(output_dir)
+    unchanged = set(unchanged or ())
+    skipped = 0
     for report_key, report_data in results.items():
-        output_file = os.path.join(output_dir, f"{report_key}_analysis.json")
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(report_data, f, ensure_ascii=False, indent=2)
+        if report_key in unchanged:
+            existing = store.result_path(report_key)
+            if existing is not None and (os.path.basename(existing) == META_FILENAME) == (storage_format == 'columnar'):
+                skipped += 1
+                continue
+        store.save(report_key, report_data)
+        summary_index.upsert_result(report_data, report_key)
+    summary_index.close()
     
-    print(f"分析结果已保存到 {output_dir}")
+    print(f"分析结果已保存到 {output_dir}（{skipped} 个未变化的报告未重写）")
 
 
 def generate_summary_csv(results: Dict, output_dir: str = RESULTS_DIR):
@@ -203,17 +415,48 @@ def generate_summary_csv(results: Dict, output_dir: str = RESULTS_DIR):
         df.to_csv(output_file, index=False)
         print(f"摘要CSV已保存到 {output_file}")
 
-def main(ticker: Optional[str] = None, year: Optional[str] = None, model_name: str = 'ProsusAI/finbert'):
-    """主函数"""
-    print(f"初始化FinBERT情感分析器 (模型: {model_name})...")
-    analyzer = FinBertSentimentAnalyzer(model_name=model_name)
+def main(ticker: Optional[str] = None, year: Optional[str] = None, model_name: str = DEFAULT_SERVED_MODEL,
+         max_tokens: int = DEFAULT_MAX_TOKENS_PER_BATCH, use_cache: bool = True, workers: int = 1,
+         torch_threads: Optional[int] = None, backend: str = INFERENCE_BACKEND, check_agreement: int = 0,
+         aggregation: str = LONG_DOC_AGGREGATION, storage_format: str = RESULT_STORAGE_FORMAT, force: bool = False,
+         profile: bool = False):
+    """
+    主函数
+
+    model_name 与API的 model 参数一致：SERVED_MODELS 中的名称或 FINETUNED_MODELS_DIR 下的模型目录名
+    （也可以直接给出对应的模型名或目录），结果保存在该模型的结果目录，与API读取的位置相同。
+    """
+    name, spec = resolve_served_model(model_name, served_models(scan_finetuned_models(FINETUNED_MODELS_DIR)[0]))
+    results_dir = model_results_dir(name, RESULTS_DIR)
+    cache = SentenceResultCache(SENTENCE_CACHE_PATH, SENTENCE_CACHE_MAX_ENTRIES) if use_cache else None
+    
+    print(f"初始化情感分析器 (模型: {name} -> {spec}, 后端: {backend})...")
+    analyzer = create_analyzer(spec, max_tokens_per_batch=max_tokens, cache=cache, backend=backend)
     
     print("开始分析报告...")
-    results = analyze_reports(analyzer, ticker=ticker, year=year)
+    reanalysis_stats = {}
+    results = analyze_reports(analyzer, ticker=ticker, year=year, workers=workers, torch_threads=torch_threads,
+                              aggregation=aggregation, force=force, results_dir=results_dir,
+                              stats=reanalysis_stats, profile=profile)
+    print(f"增量分析: {reanalysis_stats['reports_unchanged']} 个报告未变化，"
+          f"跳过 {reanalysis_stats['sections_skipped']} 个未变化的章节，"
+          f"重新分析 {reanalysis_stats['sections_rerun']} 个章节")
+    
+    if cache is not None:
+        stats = cache.stats()
+        print(f"句子缓存: 命中 {stats['hits']}，未命中 {stats['misses']}，命中率 {stats['hit_rate']:.1%}")
+    
+    if check_agreement and backend != 'torch':
+        # 抽取已分析的句子，校验当前后端与eager模型的一致性
+        sample = [s['text'] for report in results.values() for s in report.get('sentences', [])][:check_agreement]
+        agreement = analyzer.check_backend_agreement(sample)
+        print(f"后端一致性 ({backend} vs torch, {agreement['samples']} 句): "
+              f"标签一致率 {agreement['label_agreement']:.2%}，最大概率差 {agreement['max_prob_delta']:.4f}")
     
     print("保存分析结果...")
-    save_analysis_results(results)
-    generate_summary_csv(results)
+    save_analysis_results(results, output_dir=results_dir, storage_format=storage_format,
+                          unchanged=reanalysis_stats['unchanged_reports'])
+    generate_summary_csv(results, output_dir=results_dir)
     
     print("分析完成!")
     return results
@@ -225,8 +468,28 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="分析10-K报告的情感")
     parser.add_argument("--ticker", type=str, help="股票代码筛选", default=None)
     parser.add_argument("--year", type=str, help="年份筛选", default=None)
-    parser.add_argument("--model", type=str, help="模型名称", default="ProsusAI/finbert")
+    parser.add_argument("--model", type=str, default=DEFAULT_SERVED_MODEL,
+                        help="模型名称（同API的 model 参数；非默认模型的结果保存在 results/models/<名称>/）")
+    parser.add_argument("--max-tokens", type=int, help="每批token预算（0表示按固定句子数分批）",
+                        default=DEFAULT_MAX_TOKENS_PER_BATCH)
+    parser.add_argument("--no-cache", action="store_true", help="不使用句子结果缓存")
+    parser.add_argument("--workers", type=int, help="并行分析的进程数", default=1)
+    parser.add_argument("--backend", type=str, choices=BACKENDS, help="推理后端", default=INFERENCE_BACKEND)
+    parser.add_argument("--check-agreement", type=int, metavar="N", default=0,
+                        help="分析结束后抽取N个句子，校验当前后端与eager模型的一致性")
+    parser.add_argument("--aggregation", type=str, choices=WINDOW_AGGREGATIONS, default=LONG_DOC_AGGREGATION,
+                        help="章节级滑动窗口结果的聚合方式")
+    parser.add_argument("--torch-threads", type=int, help="每个工作进程的torch线程数（默认按CPU核数平均分配）",
+                        default=None)
+    parser.add_argument("--force", action="store_true", help="忽略上次的结果，全部重新分析")
+    parser.add_argument("--storage-format", type=str, choices=RESULT_FORMATS, default=RESULT_STORAGE_FORMAT,
+                        help="结果存储格式")
+    parser.add_argument("--profile", action="store_true",
+                        help="对每个重新分析的报告做性能剖析（调用栈火焰图和torch.profiler trace，写入 profiles/）")
     
     args = parser.parse_args()
     
-    main(ticker=args.ticker, year=args.year, model_name=args.model)
\ No newline at end of file
+    main(ticker=args.ticker, year=args.year, model_name=args.model, max_tokens=args.max_tokens,
+         use_cache=not args.no_cache, workers=args.workers, torch_threads=args.torch_threads,
+         backend=args.backend, check_agreement=args.check_agreement, aggregation=args.aggregation,
+         storage_format=args.storage_format, force=args.force, profile=args.profile)
\ No newline at end of file
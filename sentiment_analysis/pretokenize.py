@@ -0,0 +1,267 @@
+import os
+import json
+import shutil
+import hashlib
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# 报告目录下保存预分词结果的子目录，每个分词器一个子目录
+TOKENS_DIRNAME = 'tokens'
+TOKEN_IDS_FILENAME = 'ids.npy'
+TOKEN_OFFSETS_FILENAME = 'offsets.npy'
+TOKEN_META_FILENAME = 'meta.json'
+
+# 预分词结果格式版本
+TOKENS_FORMAT_VERSION = 1
+
+
+def tokenizer_key(tokenizer) -> str:
+    """
+    根据分词器名称、transformers版本和分词器配置生成标识
+
+    词表、规范化规则或最大长度任一变化都会得到不同的标识，对应的预分词结果不再被使用。
+    """
+    import transformers
+
+    if getattr(tokenizer, 'is_fast', False):
+        # 截断和填充设置会随每次分词调用变化，不属于分词器本身的定义
+        definition = json.loads(tokenizer.backend_tokenizer.to_str())
+        definition.pop('truncation', None)
+        definition.pop('padding', None)
+        definition = json.dumps(definition, sort_keys=True, ensure_ascii=False)
+    else:
+        definition = json.dumps(sorted(tokenizer.get_vocab().items()), ensure_ascii=False)
+    payload = json.dumps({
+        'class': type(tokenizer).__name__,
+        'transformers': transformers.__version__,
+        'model_max_length': tokenizer.model_max_length,
+        'definition': hashlib.sha256(definition.encode('utf-8')).hexdigest()
+    }, sort_keys=True)
+    name = os.path.basename(os.path.normpath(tokenizer.name_or_path or 'tokenizer')) or 'tokenizer'
+    return f"{name}-{hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]}"
+
+
+def input_hash(sentences: Sequence[str]) -> str:
+    """一组句子的内容指纹"""
+    return hashlib.sha256('\n'.join(sentences).encode('utf-8')).hexdigest()
+
+
+class TokenizedSentences:
+    """
+    一组句子的预分词结果（含特殊token、已按模型最大长度截断，与分词器 truncation=True 的输出一致）
+
+    所有句子的token id拼接在一个一维数组中（通常是内存映射的文件），
+    starts/ends 为每个句子在其中的范围。
+    """
+
+    def __init__(self, ids: np.ndarray, starts: np.ndarray, ends: np.ndarray):
+        self.ids = ids
+        self.starts = starts
+        self.ends = ends
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @property
+    def lengths(self) -> np.ndarray:
+        """每个句子的token数"""
+        return self.ends - self.starts
+
+    def select(self, indices: Sequence[int]) -> 'TokenizedSentences':
+        """按下标取出部分句子（共享同一个id数组）"""
+        indices = np.asarray(indices, dtype=np.int64)
+        return TokenizedSentences(self.ids, self.starts[indices], self.ends[indices])
+
+    def pad(self, indices: Sequence[int], pad_id: int, left: bool = False):
+        """
+        把若干句子填充成一批
+
+        Args:
+            indices: 句子下标
+            pad_id: 填充token的id
+            left: 是否在左侧填充
+
+        Returns:
+            (input_ids, attention_mask) 两个形状为 (句子数, 批内最大长度) 的int64数组
+        """
+        lengths = self.lengths[indices]
+        width = int(lengths.max()) if len(indices) else 0
+        input_ids = np.full((len(indices), width), pad_id, dtype=np.int64)
+        attention_mask = np.zeros((len(indices), width), dtype=np.int64)
+        for row, (i, length) in enumerate(zip(indices, lengths)):
+            columns = slice(width - length, width) if left else slice(0, length)
+            input_ids[row, columns] = self.ids[self.starts[i]:self.ends[i]]
+            attention_mask[row, columns] = 1
+        return input_ids, attention_mask
+
+
+def tokens_dir(report_dir: str, key: str) -> str:
+    """报告目录中某个分词器的预分词结果目录"""
+    return os.path.join(report_dir, TOKENS_DIRNAME, key)
+
+
+def read_tokens_meta(report_dir: str, key: str) -> Optional[Dict]:
+    """读取预分词结果的元数据，不存在或格式不符时返回None"""
+    path = os.path.join(tokens_dir(report_dir, key), TOKEN_META_FILENAME)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    return meta if meta.get('version') == TOKENS_FORMAT_VERSION else None
+
+
+def save_tokenized_inputs(report_dir: str, tokenizer, inputs: Dict[str, List[str]], key: Optional[str] = None) -> str:
+    """
+    对报告的各个输入（章节句子、句子文件）分词，保存为可内存映射的numpy文件
+
+    Args:
+        report_dir: 处理后报告目录
+        tokenizer: HuggingFace分词器
+        inputs: 输入名（章节名或 'sentences'）到句子列表的映射
+        key: 分词器标识，None则根据分词器计算
+
+    Returns:
+        预分词结果目录
+    """
+    key = key or tokenizer_key(tokenizer)
+    lengths = []
+    chunks = []
+    entries = {}
+    for name, sentences in inputs.items():
+        first = len(lengths)
+        if sentences:
+            encoded = tokenizer(list(sentences), truncation=True)['input_ids']
+            lengths.extend(len(ids) for ids in encoded)
+            chunks.extend(encoded)
+        entries[name] = {'hash': input_hash(sentences), 'first': first, 'last': len(lengths)}
+
+    vocab_size = len(tokenizer)
+    dtype = np.uint16 if vocab_size <= np.iinfo(np.uint16).max + 1 else np.int32
+    ids = np.fromiter((token for ids in chunks for token in ids), dtype=dtype, count=sum(lengths))
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+
+    # 先写入临时目录再整体替换，读取方不会看到写了一半的结果
+    target = tokens_dir(report_dir, key)
+    tmp_dir = f"{target}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    np.save(os.path.join(tmp_dir, TOKEN_IDS_FILENAME), ids)
+    np.save(os.path.join(tmp_dir, TOKEN_OFFSETS_FILENAME), offsets)
+    with open(os.path.join(tmp_dir, TOKEN_META_FILENAME), 'w', encoding='utf-8') as f:
+        json.dump({
+            'version': TOKENS_FORMAT_VERSION,
+            'tokenizer': tokenizer.name_or_path,
+            'key': key,
+            'dtype': np.dtype(dtype).name,
+            'sentences': len(lengths),
+            'tokens': int(offsets[-1]),
+            'inputs': entries
+        }, f, ensure_ascii=False, indent=2)
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(tmp_dir, target)
+    return target
+
+
+def load_tokenized_inputs(report_dir: str, key: str, inputs: Dict[str, Sequence[str]]) -> Dict[str, TokenizedSentences]:
+    """
+    以内存映射方式读取报告的预分词结果
+
+    Args:
+        report_dir: 处理后报告目录
+        key: 分词器标识
+        inputs: 输入名到当前句子列表的映射，只返回内容与之对应的输入
+
+    Returns:
+        输入名到预分词句子的映射；没有对应的预分词结果时为空字典
+    """
+    meta = read_tokens_meta(report_dir, key)
+    if meta is None:
+        return {}
+    directory = tokens_dir(report_dir, key)
+    try:
+        ids = np.load(os.path.join(directory, TOKEN_IDS_FILENAME), mmap_mode='r')
+        offsets = np.load(os.path.join(directory, TOKEN_OFFSETS_FILENAME), mmap_mode='r')
+    except (FileNotFoundError, ValueError):
+        return {}
+
+    tokenized = {}
+    for name, sentences in inputs.items():
+        entry = meta['inputs'].get(name)
+        if (entry is None or entry['last'] - entry['first'] != len(sentences)
+                or entry['hash'] != input_hash(sentences)):
+            continue
+        bounds = np.asarray(offsets[entry['first']:entry['last'] + 1])
+        tokenized[name] = TokenizedSentences(ids, bounds[:-1], bounds[1:])
+    return tokenized
+
+
+def pretokenize_reports(tokenizer, ticker: Optional[str] = None, year: Optional[str] = None,
+                        force: bool = False) -> Dict[str, int]:
+    """
+    对处理后的报告预分词：各章节的分句结果和句子文件
+
+    Args:
+        tokenizer: HuggingFace分词器
+        ticker: 可选的股票代码筛选
+        year: 可选的年份筛选
+        force: 内容未变化的报告也重新分词
+
+    Returns:
+        统计信息：处理、跳过的报告数和分词的句子数
+    """
+    from tqdm import tqdm
+    from preprocess.config import PROCESSED_DATA_DIR, RESULTS_DIR, CATALOG_MANIFEST_PATH
+    from preprocess.catalog import ReportCatalog
+    from preprocess.segmentation import segment_sections, sentences_from_spans
+
+    key = tokenizer_key(tokenizer)
+    catalog = ReportCatalog(PROCESSED_DATA_DIR, RESULTS_DIR, CATALOG_MANIFEST_PATH)
+    catalog.refresh()
+    stats = {'reports': 0, 'skipped': 0, 'sentences': 0}
+
+    for report in tqdm(catalog.reports(ticker, year), desc=f"预分词 ({key})"):
+        report_dir = report['path']
+        sections = {}
+        for item_name in report['sections']:
+            with open(os.path.join(report_dir, f"{item_name}.txt"), 'r', encoding='utf-8', errors='replace') as f:
+                sections[item_name] = f.read()
+        segments = segment_sections(sections, report_dir)
+        inputs = {name: sentences_from_spans(text, segments[name]) for name, text in sections.items()}
+        if report['sentences_size'] is not None:
+            with open(os.path.join(report_dir, 'sentences.txt'), 'r', encoding='utf-8', errors='replace') as f:
+                inputs['sentences'] = [line.strip() for line in f if line.strip()]
+
+        meta = read_tokens_meta(report_dir, key)
+        if (not force and meta is not None and set(meta['inputs']) == set(inputs)
+                and all(meta['inputs'][name]['hash'] == input_hash(sentences) for name, sentences in inputs.items())):
+            stats['skipped'] += 1
+            continue
+
+        save_tokenized_inputs(report_dir, tokenizer, inputs, key)
+        stats['reports'] += 1
+        stats['sentences'] += sum(len(sentences) for sentences in inputs.values())
+    return stats
+
+
+if __name__ == "__main__":
+    import sys
+    import argparse
+
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    from transformers import AutoTokenizer
+    from sentiment_analysis.resources import resolve_model_path
+
+    parser = argparse.ArgumentParser(description="对处理后的报告预分词，分析时直接读取token id")
+    parser.add_argument("--model", type=str, help="模型（分词器）名称或路径", default="ProsusAI/finbert")
+    parser.add_argument("--ticker", type=str, help="股票代码筛选", default=None)
+    parser.add_argument("--year", type=str, help="年份筛选", default=None)
+    parser.add_argument("--force", action="store_true", help="内容未变化的报告也重新分词")
+    args = parser.parse_args()
+
+    tokenizer = AutoTokenizer.from_pretrained(resolve_model_path(args.model))
+    stats = pretokenize_reports(tokenizer, args.ticker, args.year, args.force)
+    print(f"预分词完成: {stats['reports']} 个报告，{stats['sentences']} 个句子，"
+          f"跳过 {stats['skipped']} 个未变化的报告")
@@ -0,0 +1,205 @@
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import threading
+from collections import Counter
+from typing import Dict, Optional
+
+# 折叠栈、Chrome trace 和 torch 算子统计的文件名（每次剖析一个目录）
+COLLAPSED_FILENAME = 'stacks.collapsed'
+CHROME_TRACE_FILENAME = 'torch_trace.json'
+TORCH_SUMMARY_FILENAME = 'torch_ops.txt'
+PROFILE_META_FILENAME = 'meta.json'
+
+# 栈顶为这些函数的线程处于空闲等待（线程池、事件循环），不计入采样
+_IDLE_FUNCTIONS = {
+    ('threading.py', 'wait'),
+    ('selectors.py', 'select'),
+    ('queue.py', 'get'),
+    ('thread.py', '_worker'),
+}
+
+# 同一时间只允许一个剖析会话（torch.profiler 是进程级的）
+_SESSION_LOCK = threading.Lock()
+
+
+def _frame_label(code) -> str:
+    """栈帧标签：函数名和所在文件（保留最后两级路径）及函数起始行"""
+    filename = '/'.join(code.co_filename.replace('\\', '/').split('/')[-2:])
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    按固定间隔采样进程内所有线程的Python调用栈
+
+    结果汇总为折叠栈格式（每行 "线程;外层函数;...;内层函数 次数"），
+    可直接用 flamegraph.pl 生成火焰图或导入 speedscope。空闲等待的线程不计入。
+    """
+
+    def __init__(self, interval: float = 0.005):
+        """
+        Args:
+            interval: 采样间隔（秒）
+        """
+        self.interval = interval
+        self.samples = 0
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in _IDLE_FUNCTIONS:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f'thread-{ident}'))
+                self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def write_collapsed(self, path: str):
+        """写入折叠栈文件（按次数从多到少）"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def _start_torch_profiler():
+    """启动 torch.profiler（CPU，有GPU时同时记录CUDA），torch不可用时返回None"""
+    try:
+        import torch
+        from torch.profiler import profile, ProfilerActivity
+    except ImportError:
+        return None
+    activities = [ProfilerActivity.CPU]
+    if torch.cuda.is_available():
+        activities.append(ProfilerActivity.CUDA)
+    profiler = profile(activities=activities, record_shapes=True)
+    profiler.start()
+    return profiler
+
+
+def prune_profiles(output_dir: str, keep: int):
+    """只保留最新的 keep 个剖析目录"""
+    try:
+        entries = [os.path.join(output_dir, name) for name in os.listdir(output_dir)]
+    except FileNotFoundError:
+        return
+    sessions = sorted((path for path in entries if os.path.isdir(path)), key=os.path.getmtime, reverse=True)
+    for path in sessions[max(keep, 0):]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+class ProfileSession:
+    """
+    一次请求（或一个报告）的性能剖析
+
+    进入时启动调用栈采样和 torch.profiler，退出时在输出目录下新建一个子目录，写入：
+        stacks.collapsed  Python调用栈的折叠栈（火焰图）
+        torch_trace.json  torch.profiler 的 Chrome trace（chrome://tracing 或 Perfetto 打开）
+        torch_ops.txt     按自身CPU耗时排序的算子统计
+        meta.json         名称、耗时、采样数
+    然后删除超出保留数量的旧目录。已有会话在进行时不剖析（active 为 False）。
+
+    用法:
+        with ProfileSession('report_AAPL_2023', PROFILE_DIR) as session:
+            ...
+        print(session.directory)
+    """
+
+    def __init__(self, name: str, output_dir: str, keep: int = 20, interval: float = 0.005,
+                 torch_trace: bool = True):
+        """
+        Args:
+            name: 会话名称（用于目录名）
+            output_dir: 剖析结果的根目录
+            keep: 最多保留的剖析目录数
+            interval: 调用栈采样间隔（秒）
+            torch_trace: 是否同时记录 torch.profiler trace
+        """
+        self.name = re.sub(r'[^A-Za-z0-9_.-]+', '_', name)
+        self.output_dir = output_dir
+        self.keep = keep
+        self.torch_trace = torch_trace
+        self.sampler = StackSampler(interval)
+        self.active = False
+        self.directory = None
+        self._profiler = None
+        self._started = None
+
+    def __enter__(self) -> 'ProfileSession':
+        if not _SESSION_LOCK.acquire(blocking=False):
+            print(f"已有性能剖析在进行，跳过 {self.name}")
+            return self
+        self.active = True
+        self._started = time.time()
+        if self.torch_trace:
+            self._profiler = _start_torch_profiler()
+        self.sampler.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        if not self.active:
+            return False
+        try:
+            self.sampler.stop()
+            if self._profiler is not None:
+                self._profiler.stop()
+            elapsed = time.time() - self._started
+            self.directory = self._write(elapsed)
+            prune_profiles(self.output_dir, self.keep)
+        finally:
+            _SESSION_LOCK.release()
+        return False
+
+    def _write(self, elapsed: float) -> str:
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(self._started))
+        directory = os.path.join(self.output_dir, f"{stamp}-{int(self._started * 1000) % 1000:03d}-{self.name}")
+        os.makedirs(directory, exist_ok=True)
+
+        self.sampler.write_collapsed(os.path.join(directory, COLLAPSED_FILENAME))
+        files = {'collapsed_stacks': COLLAPSED_FILENAME}
+        if self._profiler is not None:
+            self._profiler.export_chrome_trace(os.path.join(directory, CHROME_TRACE_FILENAME))
+            with open(os.path.join(directory, TORCH_SUMMARY_FILENAME), 'w', encoding='utf-8') as f:
+                f.write(self._profiler.key_averages().table(sort_by='self_cpu_time_total', row_limit=40))
+            files['chrome_trace'] = CHROME_TRACE_FILENAME
+            files['torch_ops'] = TORCH_SUMMARY_FILENAME
+
+        meta: Dict = {
+            'name': self.name,
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self._started)),
+            'elapsed_s': round(elapsed, 6),
+            'samples': self.sampler.samples,
+            'interval_s': self.sampler.interval,
+            'files': files
+        }
+        with open(os.path.join(directory, PROFILE_META_FILENAME), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        return directory
+
+
+def profile_requested(flag: Optional[str]) -> bool:
+    """请求头或查询参数中的剖析开关（1/true/yes/on）"""
+    return flag is not None and flag.strip().lower() in ('1', 'true', 'yes', 'on')
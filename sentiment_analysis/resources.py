@@ -0,0 +1,61 @@
+"""
+模型和NLTK数据的本地路径
+
+API和批量分析优先从本地目录加载模型（MODEL_DIR 下按模型名保存）和分句数据（NLTK_DATA_DIR），
+本地存在时不访问网络。部署镜像或首次运行前预先下载:
+    python -m sentiment_analysis.resources --model ProsusAI/finbert
+"""
+import os
+import argparse
+
+from preprocess.config import MODEL_DIR, FINBERT_MODEL_NAME
+
+
+def local_model_dir(model_name: str, model_dir: str = MODEL_DIR) -> str:
+    """模型在本地模型目录中的保存位置（'ProsusAI/finbert' -> <model_dir>/ProsusAI--finbert）"""
+    return os.path.join(model_dir, model_name.replace('/', '--'))
+
+
+def resolve_model_path(model_name: str, model_dir: str = MODEL_DIR) -> str:
+    """
+    确定加载模型的位置
+
+    Args:
+        model_name: 模型名称或本地路径
+        model_dir: 本地模型目录
+
+    Returns:
+        model_name 本身是目录时原样返回；本地模型目录中已保存该模型时返回其路径；
+        否则返回 model_name（由transformers从Hugging Face缓存或网络加载）
+    """
+    if os.path.isdir(model_name):
+        return model_name
+    local_dir = local_model_dir(model_name, model_dir)
+    if os.path.exists(os.path.join(local_dir, 'config.json')):
+        return local_dir
+    return model_name
+
+
+def download_model(model_name: str, model_dir: str = MODEL_DIR) -> str:
+    """下载模型和分词器并保存到本地模型目录，返回保存位置"""
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+    output_dir = local_model_dir(model_name, model_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(output_dir)
+    AutoModelForSequenceClassification.from_pretrained(model_name).save_pretrained(output_dir)
+    return output_dir
+
+
+if __name__ == "__main__":
+    from preprocess.segmentation import ensure_sentence_tokenizer_data
+
+    parser = argparse.ArgumentParser(description="下载模型和NLTK分句数据到本地目录")
+    parser.add_argument("--model", type=str, action="append", help="模型名称（可重复）")
+    parser.add_argument("--skip-nltk", action="store_true", help="不下载NLTK分句数据")
+    args = parser.parse_args()
+
+    for name in args.model or [FINBERT_MODEL_NAME]:
+        print(f"模型 {name} 已保存到 {download_model(name)}")
+    if not args.skip_nltk:
+        print(f"NLTK分句数据: {ensure_sentence_tokenizer_data()}")
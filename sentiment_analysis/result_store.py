@@ -0,0 +1,778 @@
+import io
+import os
+import re
+import json
+import glob
+import uuid
+import zlib
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from sentiment_analysis.metrics import RESULT_STORE_SECONDS
+from sentiment_analysis.storage import atomic_write_json, atomic_write_bytes, file_lock
+
+# 支持的结果存储格式
+RESULT_FORMATS = ('json', 'columnar')
+
+# 结果文件/目录命名：{report_key}_analysis.json 或 {report_key}_analysis/
+JSON_SUFFIX = '_analysis.json'
+COLUMNAR_SUFFIX = '_analysis'
+META_FILENAME = 'meta.json'
+
+# 列式目录中的锁文件，写入和清理旧数据文件期间持有（API和predict.py可能同时写同一报告）
+LOCK_FILENAME = '.lock'
+
+# 列式格式版本
+COLUMNAR_VERSION = 1
+
+# JSON结果的章节句子索引：{report_key}_analysis.index.npz，随JSON文件一同写入
+JSON_INDEX_SUFFIX = '_analysis.index.npz'
+JSON_INDEX_VERSION = 1
+
+# 概率列及标签编号的顺序（与模型的id2label一致）
+LABELS = ['negative', 'neutral', 'positive']
+_LABEL_IDS = {label: i for i, label in enumerate(LABELS)}
+
+# 句子查询可用的排序键：某一类别的概率，或预测标签的置信度（最大概率）
+SORT_KEYS = LABELS + ['confidence']
+
+# 文本按块压缩，每块包含的行数；按行读取时只需解压所在的块
+TEXT_BLOCK_ROWS = 256
+
+# 每个打开的结果最多保留的已解压文本块数
+_MAX_CACHED_BLOCKS = 8
+
+# 列式目录中的数据文件：文件名前缀 -> 扩展名，文件名中带有写入代号
+_COLUMN_FILES = {'probs': 'npy', 'labels': 'npy', 'offsets': 'npy', 'blocks': 'npy', 'text': 'bin'}
+
+
+class ColumnarFormatError(ValueError):
+    """结果无法按列式格式保存（如标签或概率类别不是 negative/neutral/positive 的自定义模型）"""
+
+
+def _is_record(value: Any) -> bool:
+    """是否为单条情感分析结果（含 text、label、confidence）"""
+    return (isinstance(value, dict) and 'text' in value and 'label' in value
+            and isinstance(value.get('confidence'), dict))
+
+
+def _split_records(data: Dict) -> Tuple[Dict, List[Dict]]:
+    """
+    把报告结果拆分为元数据和逐条结果
+
+    句子列表（顶层 sentences 和 sections.*.sentences）替换为 {'_rows': [起始行, 结束行]}，
+    单条结果（items.*）替换为其余字段加 '_row'，其他字段原样保留在元数据中。
+    """
+    rows = []
+
+    def take_rows(records: List[Dict]) -> Dict:
+        start = len(rows)
+        rows.extend(records)
+        return {'_rows': [start, len(rows)]}
+
+    meta = dict(data)
+    if isinstance(data.get('sentences'), list):
+        meta['sentences'] = take_rows(data['sentences'])
+
+    if isinstance(data.get('sections'), dict):
+        meta['sections'] = {}
+        for name, section in data['sections'].items():
+            if isinstance(section, dict) and isinstance(section.get('sentences'), list):
+                section = dict(section)
+                section['sentences'] = take_rows(section['sentences'])
+            meta['sections'][name] = section
+
+    if isinstance(data.get('items'), dict):
+        meta['items'] = {}
+        for name, item in data['items'].items():
+            if _is_record(item):
+                placeholder = {k: v for k, v in item.items() if k not in ('text', 'label', 'confidence')}
+                placeholder['_row'] = len(rows)
+                rows.append(item)
+                item = placeholder
+            meta['items'][name] = item
+
+    for row in rows:
+        if not _is_record(row) or row['label'] not in _LABEL_IDS or not set(row['confidence']) <= set(LABELS):
+            raise ColumnarFormatError(f"无法按列式格式保存的结果: {str(row)[:100]}")
+
+    return meta, rows
+
+
+def write_columnar(directory: str, data: Dict):
+    """
+    以列式格式保存报告结果
+
+    逐条结果的概率存为float64数组（与JSON中的数值一致，读回后无精度损失）、标签存为int8数组，文本拼接为UTF-8文本并用偏移数组索引，
+    按 TEXT_BLOCK_ROWS 行一块分块压缩；
+    其余字段（摘要、章节统计等）写入 meta.json，读取摘要无需触碰句子数据。
+    数据文件名带写入代号，meta.json 最后原子替换，读取方不会看到新旧混杂的文件；
+    写入和清理旧数据文件期间持有该报告的文件锁，并发写入同一报告时不会删除对方正在写入或已发布的文件。
+
+    Args:
+        directory: 结果目录（{report_key}_analysis/）
+        data: 报告结果（API格式或predict格式）
+    """
+    meta, rows = _split_records(data)
+    os.makedirs(directory, exist_ok=True)
+    with file_lock(os.path.join(directory, LOCK_FILENAME)):
+        _write_columnar_locked(directory, meta, rows)
+
+
+def _write_columnar_locked(directory: str, meta: Dict, rows: List[Dict]):
+    """持有报告的文件锁时写入新代号的数据文件、发布 meta.json 并删除旧代号的数据文件"""
+    probs = np.array([[row['confidence'].get(label, 0.0) for label in LABELS] for row in rows],
+                     dtype=np.float64).reshape(len(rows), len(LABELS))
+    labels = np.array([_LABEL_IDS[row['label']] for row in rows], dtype=np.int8)
+    encoded = [row['text'].encode('utf-8') for row in rows]
+    offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    if encoded:
+        offsets[1:] = np.cumsum([len(text) for text in encoded])
+
+    compressed = [zlib.compress(b''.join(encoded[start:start + TEXT_BLOCK_ROWS]))
+                  for start in range(0, len(encoded), TEXT_BLOCK_ROWS)]
+    blocks = np.zeros(len(compressed) + 1, dtype=np.int64)
+    if compressed:
+        blocks[1:] = np.cumsum([len(block) for block in compressed])
+
+    generation = uuid.uuid4().hex[:12]
+    np.save(_column_path(directory, 'probs', generation), probs)
+    np.save(_column_path(directory, 'labels', generation), labels)
+    np.save(_column_path(directory, 'offsets', generation), offsets)
+    np.save(_column_path(directory, 'blocks', generation), blocks)
+    with open(_column_path(directory, 'text', generation), 'wb') as f:
+        f.write(b''.join(compressed))
+
+    meta['_columnar'] = {'version': COLUMNAR_VERSION, 'generation': generation, 'labels': LABELS,
+                         'num_rows': len(rows), 'text_block_rows': TEXT_BLOCK_ROWS}
+    atomic_write_json(os.path.join(directory, META_FILENAME), meta, indent=None)
+
+    # 删除旧代号的数据文件（已打开的内存映射在删除后仍然有效）
+    for name in os.listdir(directory):
+        if name not in (META_FILENAME, LOCK_FILENAME) and f".{generation}." not in name:
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+
+
+def _column_path(directory: str, column: str, generation: str) -> str:
+    return os.path.join(directory, f"{column}.{generation}.{_COLUMN_FILES[column]}")
+
+
+def read_meta(directory: str) -> Dict:
+    """读取列式结果的 meta.json"""
+    with open(os.path.join(directory, META_FILENAME), 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    version = meta.get('_columnar', {}).get('version')
+    if version != COLUMNAR_VERSION:
+        raise ValueError(f"不支持的列式结果版本: {version}")
+    return meta
+
+
+def summary_from_meta(meta: Dict) -> Dict:
+    """从元数据构建不含逐条结果的摘要数据（摘要、章节统计等）"""
+    data = {k: v for k, v in meta.items() if k not in ('_columnar', 'sentences')}
+    if isinstance(meta.get('sections'), dict):
+        data['sections'] = {
+            name: {k: v for k, v in section.items() if k != 'sentences'} if isinstance(section, dict) else section
+            for name, section in meta['sections'].items()
+        }
+    return data
+
+
+def _select_rows(probs: np.ndarray, labels: np.ndarray, row_range: Tuple[int, int], label: Optional[str],
+                 min_confidence: Optional[float], sort_by: Optional[str], descending: bool) -> np.ndarray:
+    """在行范围内按标签/置信度筛选并排序，返回行号数组（列式结果和JSON章节索引共用）"""
+    start, end = row_range
+    probs = np.asarray(probs[start:end])
+    rows = np.arange(start, end)
+
+    mask = np.ones(end - start, dtype=bool)
+    if label is not None:
+        mask &= np.asarray(labels[start:end]) == _LABEL_IDS[label]
+    if min_confidence is not None:
+        mask &= probs.max(axis=1) >= min_confidence
+    rows = rows[mask]
+
+    if sort_by is not None:
+        probs = probs[mask]
+        keys = probs.max(axis=1) if sort_by == 'confidence' else probs[:, _LABEL_IDS[sort_by]]
+        # 稳定排序，分数相同的句子保持原文顺序
+        rows = rows[np.argsort(-keys if descending else keys, kind='stable')]
+    return rows
+
+
+class ColumnarResult:
+    """
+    列式格式的单个报告结果
+
+    打开时只读取 meta.json 并内存映射各数据文件，句子按行号按需解码（只解压所在的文本块）。
+    """
+
+    def __init__(self, directory: str):
+        """
+        打开列式结果
+
+        Args:
+            directory: 结果目录（{report_key}_analysis/）
+        """
+        self.directory = directory
+        # 读取期间结果被改写时旧数据文件会被删除，重新读取一次 meta.json
+        for attempt in range(2):
+            try:
+                self._open()
+                break
+            except FileNotFoundError:
+                if attempt == 1:
+                    raise
+
+    def _open(self):
+        self.meta = read_meta(self.directory)
+        info = self.meta['_columnar']
+        generation = info['generation']
+        self.num_rows = info['num_rows']
+        self.block_rows = info['text_block_rows']
+        self._blocks_cache: "OrderedDict[int, bytes]" = OrderedDict()
+
+        self.probs = np.load(_column_path(self.directory, 'probs', generation), mmap_mode='r')
+        self.labels = np.load(_column_path(self.directory, 'labels', generation), mmap_mode='r')
+        self.offsets = np.load(_column_path(self.directory, 'offsets', generation), mmap_mode='r')
+        self.blocks = np.load(_column_path(self.directory, 'blocks', generation))
+        text_path = _column_path(self.directory, 'text', generation)
+        if os.path.getsize(text_path) > 0:
+            self.text = np.memmap(text_path, dtype=np.uint8, mode='r')
+        else:
+            self.text = np.zeros(0, dtype=np.uint8)
+
+    def row_range(self, section: Optional[str] = None) -> Optional[Tuple[int, int]]:
+        """
+        返回句子列表对应的行范围
+
+        Args:
+            section: 章节名，None表示顶层句子列表
+
+        Returns:
+            (起始行, 结束行)，不存在时返回None
+        """
+        container = self.meta.get('sections', {}).get(section) if section is not None else self.meta
+        placeholder = container.get('sentences') if isinstance(container, dict) else None
+        if not isinstance(placeholder, dict) or '_rows' not in placeholder:
+            return None
+        start, end = placeholder['_rows']
+        return start, end
+
+    def _block(self, index: int) -> bytes:
+        """返回解压后的文本块（保留最近使用的若干块）"""
+        block = self._blocks_cache.get(index)
+        if block is None:
+            block = zlib.decompress(bytes(self.text[self.blocks[index]:self.blocks[index + 1]]))
+            self._blocks_cache[index] = block
+            if len(self._blocks_cache) > _MAX_CACHED_BLOCKS:
+                self._blocks_cache.popitem(last=False)
+        else:
+            self._blocks_cache.move_to_end(index)
+        return block
+
+    def texts(self, rows: np.ndarray) -> List[str]:
+        """解码指定行的文本"""
+        texts = []
+        for row in np.asarray(rows, dtype=np.int64).tolist():
+            index = row // self.block_rows
+            base = int(self.offsets[index * self.block_rows])
+            block = self._block(index)
+            texts.append(block[int(self.offsets[row]) - base:int(self.offsets[row + 1]) - base].decode('utf-8'))
+        return texts
+
+    def all_texts(self) -> List[str]:
+        """按行顺序解码全部文本"""
+        blob = b''.join(zlib.decompress(bytes(self.text[self.blocks[i]:self.blocks[i + 1]]))
+                        for i in range(len(self.blocks) - 1))
+        offsets = np.asarray(self.offsets).tolist()
+        return [blob[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(self.num_rows)]
+
+    def records(self, rows: Optional[np.ndarray] = None) -> List[Dict]:
+        """
+        按行号构建结果字典（与分析器输出的格式一致）
+
+        Args:
+            rows: 行号数组，None表示全部行
+        """
+        if rows is None:
+            texts = self.all_texts()
+            probs = np.asarray(self.probs).tolist()
+            labels = np.asarray(self.labels).tolist()
+        else:
+            rows = np.asarray(rows, dtype=np.int64)
+            texts = self.texts(rows)
+            probs = np.asarray(self.probs[rows]).tolist()
+            labels = np.asarray(self.labels[rows]).tolist()
+        return [
+            {
+                'text': text,
+                'label': LABELS[label],
+                'confidence': {'negative': row_probs[0], 'neutral': row_probs[1], 'positive': row_probs[2]}
+            }
+            for text, label, row_probs in zip(texts, labels, probs)
+        ]
+
+    def query_rows(self, section: Optional[str] = None, label: Optional[str] = None,
+                   min_confidence: Optional[float] = None, sort_by: Optional[str] = None,
+                   descending: bool = True) -> Optional[np.ndarray]:
+        """
+        在句子列表的行范围内按标签/置信度筛选并排序，只读取标签和概率数组
+
+        Args:
+            section: 章节名，None表示顶层句子列表
+            label: 只保留该标签的句子
+            min_confidence: 预测标签置信度（最大概率）的下限
+            sort_by: 排序键（SORT_KEYS之一），None则保持原文顺序
+            descending: 是否降序
+
+        Returns:
+            满足条件的行号数组，句子列表不存在时返回None
+        """
+        row_range = self.row_range(section)
+        if row_range is None:
+            return None
+        return _select_rows(self.probs, self.labels, row_range, label, min_confidence, sort_by, descending)
+
+    def summary_dict(self) -> Dict:
+        """返回不含逐条结果的摘要数据，不读取句子数据"""
+        return summary_from_meta(self.meta)
+
+    def to_dict(self) -> Dict:
+        """还原为与JSON格式相同结构的完整结果"""
+        records = self.records()
+
+        def restore_rows(placeholder: Dict) -> List[Dict]:
+            start, end = placeholder['_rows']
+            return records[start:end]
+
+        data = {k: v for k, v in self.meta.items() if k != '_columnar'}
+        if isinstance(data.get('sentences'), dict):
+            data['sentences'] = restore_rows(data['sentences'])
+
+        if isinstance(data.get('sections'), dict):
+            sections = {}
+            for name, section in data['sections'].items():
+                if isinstance(section, dict) and isinstance(section.get('sentences'), dict):
+                    section = {**section, 'sentences': restore_rows(section['sentences'])}
+                sections[name] = section
+            data['sections'] = sections
+
+        if isinstance(data.get('items'), dict):
+            items = {}
+            for name, item in data['items'].items():
+                if isinstance(item, dict) and '_row' in item:
+                    extra = {k: v for k, v in item.items() if k != '_row'}
+                    item = {**records[item['_row']], **extra}
+                items[name] = item
+            data['items'] = items
+
+        return data
+
+
+_SENTENCES_MARKER = re.compile(r'"(@@sentences:[0-9a-f]{32}@@)"')
+
+
+def encode_json_indexed(data: Dict) -> Tuple[bytes, Optional[Dict]]:
+    """
+    按 indent=2 编码JSON结果，同时记录章节句子（sections.*.sentences）在编码结果中的字节范围
+
+    编码结果与 json.dumps(data, ensure_ascii=False, indent=2) 一致。
+
+    Args:
+        data: 报告结果
+
+    Returns:
+        (UTF-8编码的JSON, 章节索引)；没有章节、某个章节没有句子列表或句子标签不是
+        negative/neutral/positive 三类时（如自定义标签的微调模型）索引为None
+    """
+    sections = data.get('sections')
+    if (not isinstance(sections, dict) or not sections
+            or not all(isinstance(section, dict) and isinstance(section.get('sentences'), list)
+                       for section in sections.values())
+            or not all(_is_record(row) and row['label'] in _LABEL_IDS and set(row['confidence']) <= set(LABELS)
+                       for section in sections.values() for row in section['sentences'])):
+        return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8'), None
+
+    # 句子列表先替换为占位字符串整体编码，再把占位符替换为逐条编码的句子并记录字节范围
+    markers = {}
+    placeholders = {}
+    for name, section in sections.items():
+        marker = f"@@sentences:{uuid.uuid4().hex}@@"
+        markers[marker] = name
+        placeholders[name] = {**section, 'sentences': marker}
+    text = json.dumps({**data, 'sections': placeholders}, ensure_ascii=False, indent=2)
+
+    parts = []
+    size = 0
+    rows = []
+    starts = []
+    ends = []
+    section_rows = {}
+    position = 0
+    for match in _SENTENCES_MARKER.finditer(text):
+        name = markers.get(match.group(1))
+        if name is None:
+            continue
+        prefix = text[position:match.start()].encode('utf-8')
+        parts.append(prefix)
+        size += len(prefix)
+        position = match.end()
+
+        sentences = sections[name]['sentences']
+        section_rows[name] = [len(rows), len(rows) + len(sentences)]
+        if not sentences:
+            parts.append(b'[]')
+            size += 2
+            continue
+        # 与json.dumps相同的缩进：句子比 "sentences" 键多缩进一级
+        line = text[text.rfind('\n', 0, match.start()) + 1:match.start()]
+        key_indent = len(line) - len(line.lstrip(' '))
+        pad = ' ' * (key_indent + 2)
+        for i, sentence in enumerate(sentences):
+            head = (('[\n' if i == 0 else ',\n') + pad).encode('utf-8')
+            encoded = json.dumps(sentence, ensure_ascii=False, indent=2).replace('\n', '\n' + pad).encode('utf-8')
+            parts.append(head)
+            size += len(head)
+            starts.append(size)
+            parts.append(encoded)
+            size += len(encoded)
+            ends.append(size)
+            rows.append(sentence)
+        tail = ('\n' + ' ' * key_indent + ']').encode('utf-8')
+        parts.append(tail)
+        size += len(tail)
+    parts.append(text[position:].encode('utf-8'))
+
+    index = {
+        'sections': section_rows,
+        'section_meta': {name: {k: v for k, v in section.items() if k != 'sentences'}
+                         for name, section in sections.items()},
+        'starts': np.asarray(starts, dtype=np.int64),
+        'ends': np.asarray(ends, dtype=np.int64),
+        'probs': np.array([[row['confidence'].get(label, 0.0) for label in LABELS] for row in rows],
+                          dtype=np.float64).reshape(len(rows), len(LABELS)),
+        'labels': np.array([_LABEL_IDS[row['label']] for row in rows], dtype=np.int8)
+    }
+    return b''.join(parts), index
+
+
+def json_index_path(json_path: str) -> str:
+    """JSON结果文件对应的章节索引路径"""
+    return json_path[:-len(JSON_SUFFIX)] + JSON_INDEX_SUFFIX
+
+
+def write_json_index(json_path: str, index: Dict):
+    """
+    保存JSON结果的章节索引（在JSON文件写入之后调用）
+
+    索引记录JSON文件当前的大小和修改时间，JSON文件被改写后旧索引不再使用。
+    """
+    stat = os.stat(json_path)
+    meta = {
+        'version': JSON_INDEX_VERSION,
+        'json_size': stat.st_size,
+        'json_mtime_ns': stat.st_mtime_ns,
+        'sections': index['sections'],
+        'section_meta': index['section_meta']
+    }
+    buffer = io.BytesIO()
+    np.savez(buffer, meta=np.array(json.dumps(meta, ensure_ascii=False)), starts=index['starts'],
+             ends=index['ends'], probs=index['probs'], labels=index['labels'])
+    atomic_write_bytes(json_index_path(json_path), buffer.getvalue())
+
+
+class JsonSectionIndex:
+    """
+    JSON格式结果的章节句子索引
+
+    保存每条章节句子在JSON文件中的字节范围及其标签/概率数组：
+    筛选排序只使用数组，当前页的句子按字节范围从JSON文件中读取后逐条解析，不解析整个文件。
+    """
+
+    def __init__(self, json_path: str, meta: Dict, arrays: Dict[str, np.ndarray]):
+        self.json_path = json_path
+        self.meta = meta
+        self.starts = arrays['starts']
+        self.ends = arrays['ends']
+        self.probs = arrays['probs']
+        self.labels = arrays['labels']
+
+    @classmethod
+    def open(cls, json_path: str) -> Optional['JsonSectionIndex']:
+        """打开JSON结果的章节索引，索引不存在或与当前的JSON文件不对应时返回None"""
+        try:
+            stat = os.stat(json_path)
+            with np.load(json_index_path(json_path), allow_pickle=False) as npz:
+                meta = json.loads(str(npz['meta']))
+                arrays = {key: npz[key] for key in ('starts', 'ends', 'probs', 'labels')}
+        except (OSError, ValueError, KeyError):
+            return None
+        if not cls._matches(meta, stat) or meta.get('version') != JSON_INDEX_VERSION:
+            return None
+        return cls(json_path, meta, arrays)
+
+    @staticmethod
+    def _matches(meta: Dict, stat: os.stat_result) -> bool:
+        return meta.get('json_size') == stat.st_size and meta.get('json_mtime_ns') == stat.st_mtime_ns
+
+    def section_meta(self, section: str) -> Optional[Dict]:
+        """章节的统计数据（不含句子），章节不存在时返回None"""
+        return self.meta['section_meta'].get(section)
+
+    def query_rows(self, section: str, label: Optional[str] = None, min_confidence: Optional[float] = None,
+                   sort_by: Optional[str] = None, descending: bool = True) -> Optional[np.ndarray]:
+        """与 ColumnarResult.query_rows 相同，章节不存在时返回None"""
+        row_range = self.meta['sections'].get(section)
+        if row_range is None:
+            return None
+        return _select_rows(self.probs, self.labels, tuple(row_range), label, min_confidence, sort_by, descending)
+
+    def records(self, rows: np.ndarray) -> Optional[List[Dict]]:
+        """
+        从JSON文件中读取指定行的句子结果
+
+        Returns:
+            句子结果列表；打开索引之后JSON文件已被改写时返回None
+        """
+        with open(self.json_path, 'rb') as f:
+            if not self._matches(self.meta, os.fstat(f.fileno())):
+                return None
+            records = []
+            for row in np.asarray(rows, dtype=np.int64).tolist():
+                f.seek(int(self.starts[row]))
+                records.append(json.loads(f.read(int(self.ends[row] - self.starts[row])).decode('utf-8')))
+        return records
+
+
+def query_sentences(sentences: List[Dict], label: Optional[str] = None, min_confidence: Optional[float] = None,
+                    sort_by: Optional[str] = None, descending: bool = True) -> List[Dict]:
+    """
+    对已加载的句子结果列表筛选并排序（JSON格式结果使用，语义与 ColumnarResult.query_rows 一致）
+
+    Args:
+        sentences: 句子结果列表
+        label: 只保留该标签的句子
+        min_confidence: 预测标签置信度（最大概率）的下限
+        sort_by: 排序键（SORT_KEYS之一），None则保持原文顺序
+        descending: 是否降序
+
+    Returns:
+        满足条件的句子列表
+    """
+    def confidence(sentence: Dict) -> float:
+        return max(sentence['confidence'].values())
+
+    if label is not None:
+        sentences = [s for s in sentences if s['label'] == label]
+    if min_confidence is not None:
+        sentences = [s for s in sentences if confidence(s) >= min_confidence]
+    if sort_by is not None:
+        if sort_by == 'confidence':
+            key = confidence
+        else:
+            key = lambda s: s['confidence'].get(sort_by, 0)
+        sentences = sorted(sentences, key=key, reverse=descending)
+    return sentences
+
+
+class ResultStore:
+    """
+    报告分析结果的存储
+
+    支持 'json'（{report_key}_analysis.json）和 'columnar'（{report_key}_analysis/ 目录）两种格式，
+    保存时使用配置的格式，读取时两种格式都支持（同时存在时使用较新写入的一份）。
+    """
+
+    def __init__(self, results_dir: str, storage_format: str = 'json'):
+        """
+        初始化结果存储
+
+        Args:
+            results_dir: 结果目录
+            storage_format: 保存格式，'json' 或 'columnar'
+        """
+        if storage_format not in RESULT_FORMATS:
+            raise ValueError(f"不支持的结果存储格式: {storage_format}，可选: {', '.join(RESULT_FORMATS)}")
+        self.results_dir = results_dir
+        self.storage_format = storage_format
+
+    def json_path(self, report_key: str) -> str:
+        return os.path.join(self.results_dir, f"{report_key}{JSON_SUFFIX}")
+
+    def columnar_dir(self, report_key: str) -> str:
+        return os.path.join(self.results_dir, f"{report_key}{COLUMNAR_SUFFIX}")
+
+    def result_path(self, report_key: str) -> Optional[str]:
+        """
+        返回已保存结果的文件路径（列式格式为其 meta.json）
+
+        两种格式同时存在时（例如切换过存储格式）返回较新写入的一份，修改时间相同时优先配置的格式。
+
+        Args:
+            report_key: 报告键 {ticker}_{date}
+
+        Returns:
+            文件路径，没有结果时返回None
+        """
+        candidates = [os.path.join(self.columnar_dir(report_key), META_FILENAME), self.json_path(report_key)]
+        if self.storage_format == 'json':
+            candidates.reverse()
+        latest, latest_mtime = None, None
+        for path in candidates:
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except FileNotFoundError:
+                continue
+            if latest is None or mtime > latest_mtime:
+                latest, latest_mtime = path, mtime
+        return latest
+
+    @staticmethod
+    def load_path(path: str) -> Dict:
+        """读取 result_path 返回的结果文件，还原为完整结果（分别记录磁盘读取和解析的耗时）"""
+        if os.path.basename(path) == META_FILENAME:
+            with RESULT_STORE_SECONDS.time(operation='read', format='columnar'):
+                result = ColumnarResult(os.path.dirname(path))
+            with RESULT_STORE_SECONDS.time(operation='parse', format='columnar'):
+                return result.to_dict()
+        with RESULT_STORE_SECONDS.time(operation='read', format='json'):
+            with open(path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        with RESULT_STORE_SECONDS.time(operation='parse', format='json'):
+            return json.loads(content)
+
+    def load(self, report_key: str) -> Optional[Dict]:
+        """读取完整结果，没有结果时返回None"""
+        path = self.result_path(report_key)
+        return self.load_path(path) if path else None
+
+    def load_summary(self, report_key: str) -> Optional[Dict]:
+        """
+        读取不含逐条结果的摘要数据
+
+        列式格式只读取 meta.json；JSON格式需要解析整个文件。
+        """
+        path = self.result_path(report_key)
+        if path is None:
+            return None
+        if os.path.basename(path) == META_FILENAME:
+            return summary_from_meta(read_meta(os.path.dirname(path)))
+        return self.load_path(path)
+
+    def open_columnar(self, report_key: str) -> Optional[ColumnarResult]:
+        """打开列式结果（按需读取句子），结果不是列式格式时返回None"""
+        path = self.result_path(report_key)
+        if path is None or os.path.basename(path) != META_FILENAME:
+            return None
+        return ColumnarResult(os.path.dirname(path))
+
+    def save(self, report_key: str, data: Dict, storage_format: Optional[str] = None) -> str:
+        """
+        保存报告结果
+
+        列式格式只能保存 negative/neutral/positive 三类标签的结果，
+        其他标签（如自定义 id2label 的微调模型）的结果改为按JSON格式保存。
+        JSON格式同时写入章节句子索引（{report_key}_analysis.index.npz），章节查询无需解析整个文件。
+
+        Args:
+            report_key: 报告键 {ticker}_{date}
+            data: 报告结果
+            storage_format: 保存格式，None则使用配置的格式
+
+        Returns:
+            保存后的结果文件路径（与 result_path 的返回值一致）
+        """
+        storage_format = storage_format or self.storage_format
+        if storage_format == 'columnar':
+            directory = self.columnar_dir(report_key)
+            try:
+                with RESULT_STORE_SECONDS.time(operation='write', format='columnar'):
+                    write_columnar(directory, data)
+                return os.path.join(directory, META_FILENAME)
+            except ColumnarFormatError as e:
+                print(f"警告: {report_key} 改为按JSON格式保存（{str(e)}）")
+        path = self.json_path(report_key)
+        with RESULT_STORE_SECONDS.time(operation='serialize', format='json'):
+            content, index = encode_json_indexed(data)
+        with RESULT_STORE_SECONDS.time(operation='write', format='json'):
+            atomic_write_bytes(path, content)
+            if index is not None:
+                write_json_index(path, index)
+            else:
+                try:
+                    os.remove(json_index_path(path))
+                except FileNotFoundError:
+                    pass
+        return path
+
+    def keys(self) -> List[str]:
+        """返回所有已保存结果的报告键"""
+        keys = set()
+        for path in glob.glob(os.path.join(self.results_dir, f"*{JSON_SUFFIX}")):
+            keys.add(os.path.basename(path)[:-len(JSON_SUFFIX)])
+        for path in glob.glob(os.path.join(self.results_dir, f"*{COLUMNAR_SUFFIX}", META_FILENAME)):
+            keys.add(os.path.basename(os.path.dirname(path))[:-len(COLUMNAR_SUFFIX)])
+        return sorted(keys)
+
+
+def _disk_usage(path: str) -> int:
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    import time
+
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    from preprocess.config import RESULTS_DIR
+
+    parser = argparse.ArgumentParser(description="转换报告分析结果的存储格式")
+    parser.add_argument("--results-dir", type=str, help="结果目录", default=RESULTS_DIR)
+    parser.add_argument("--to", type=str, choices=RESULT_FORMATS, default='columnar', help="目标格式")
+    parser.add_argument("--reindex", action="store_true",
+                        help="为已有的JSON结果重新写入JSON文件和章节索引（早于章节索引保存的结果）")
+
+    args = parser.parse_args()
+
+    if args.reindex:
+        store = ResultStore(args.results_dir, 'json')
+        for report_key in store.keys():
+            path = store.result_path(report_key)
+            if os.path.basename(path) != META_FILENAME and JsonSectionIndex.open(path) is None:
+                store.save(report_key, store.load_path(path))
+                print(f"已建立章节索引 {report_key}")
+        sys.exit(0)
+
+    source_format = 'json' if args.to == 'columnar' else 'columnar'
+    source = ResultStore(args.results_dir, source_format)
+    target = ResultStore(args.results_dir, args.to)
+
+    source_bytes = target_bytes = 0
+    source_seconds = target_seconds = 0.0
+    for report_key in source.keys():
+        source_path = source.result_path(report_key)
+        if (os.path.basename(source_path) == META_FILENAME) != (source_format == 'columnar'):
+            continue
+        start = time.perf_counter()
+        data = source.load_path(source_path)
+        source_seconds += time.perf_counter() - start
+
+        target_path = target.save(report_key, data)
+        start = time.perf_counter()
+        target.load_path(target_path)
+        target_seconds += time.perf_counter() - start
+
+        source_bytes += _disk_usage(source_path if source_format == 'json' else os.path.dirname(source_path))
+        target_bytes += _disk_usage(target_path if args.to == 'json' else os.path.dirname(target_path))
+        print(f"已转换 {report_key}")
+
+    print(f"磁盘占用: {source_format} {source_bytes / 1024:.1f} KB -> {args.to} {target_bytes / 1024:.1f} KB")
+    print(f"完整读取耗时: {source_format} {source_seconds * 1000:.1f} ms -> {args.to} {target_seconds * 1000:.1f} ms")
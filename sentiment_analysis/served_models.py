@@ -0,0 +1,74 @@
+import os
+import re
+from typing import Dict, List, Tuple
+
+# 导入项目配置
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from preprocess.config import SERVED_MODELS, DEFAULT_SERVED_MODEL, RESULTS_DIR
+
+# 模型名称只允许用作目录名的字符（非默认模型的结果保存在以名称命名的子目录下）
+MODEL_NAME_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.-]*$')
+
+
+def scan_finetuned_models(models_dir: str) -> Tuple[Dict[str, str], List[str]]:
+    """
+    列出微调模型目录下的模型
+
+    Returns:
+        (含 config.json 的子目录：目录名到路径, 还没有 config.json 的子目录名)
+    """
+    models, incomplete = {}, []
+    if not os.path.isdir(models_dir):
+        return models, incomplete
+    for name in sorted(os.listdir(models_dir)):
+        path = os.path.join(models_dir, name)
+        if not MODEL_NAME_PATTERN.match(name) or not os.path.isdir(path):
+            continue
+        if os.path.exists(os.path.join(path, 'config.json')):
+            models[name] = path
+        else:
+            incomplete.append(name)
+    return models, incomplete
+
+
+def served_models(finetuned: Dict[str, str]) -> Dict[str, str]:
+    """可选择的模型：名称到模型名或本地目录的映射（微调模型目录按目录名加入，配置中的同名项优先）"""
+    models = dict(finetuned)
+    models.update(SERVED_MODELS)
+    return models
+
+
+def resolve_served_model(model: str, models: Dict[str, str]) -> Tuple[str, str]:
+    """
+    把模型名称、配置中的模型名或模型目录解析为 (名称, 模型名或目录)
+
+    名称决定结果目录，同一个模型无论按哪种方式指定，结果都保存在同一处。
+    """
+    if model in models:
+        return model, models[model]
+    for name, spec in models.items():
+        if spec == model or (os.path.isdir(model) and os.path.isdir(spec) and os.path.samefile(spec, model)):
+            return name, spec
+    raise ValueError(f"不支持的模型: {model}，可选: {', '.join(models)}")
+
+
+def model_results_dir(model: str, results_dir: str = RESULTS_DIR) -> str:
+    """模型的结果目录，默认模型使用 results_dir，其他模型使用 results_dir/models/<名称>/"""
+    if model == DEFAULT_SERVED_MODEL:
+        return results_dir
+    return os.path.join(results_dir, 'models', model)
+
+
+def create_analyzer(spec: str, **kwargs):
+    """
+    按模型名或本地目录创建分析器
+
+    本地目录使用微调模型的分析器（标签映射取自模型配置），其他按模型名加载FinBERT。
+    torch和transformers在这里才导入，API进程启动时不加载。
+    """
+    from sentiment_analysis.model import FinBertSentimentAnalyzer, CustomFinancialSentimentAnalyzer
+
+    if os.path.isdir(spec):
+        return CustomFinancialSentimentAnalyzer(spec, **kwargs)
+    return FinBertSentimentAnalyzer(model_name=spec, **kwargs)
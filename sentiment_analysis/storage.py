@@ -0,0 +1,97 @@
+import os
+import json
+import tempfile
+from contextlib import contextmanager
+from typing import IO, Any, Callable, Iterator
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+
+def _atomic_write(path: str, write: Callable[[IO], None], binary: bool = False):
+    """先写入同目录下的临时文件，再重命名覆盖目标文件"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with (os.fdopen(fd, 'wb') if binary else os.fdopen(fd, 'w', encoding='utf-8')) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp创建的文件仅所有者可读写，改为与普通文件一致的权限
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_write_json(path: str, data: Any, indent: int = 2):
+    """
+    原子地写入JSON文件：先写入同目录下的临时文件，再重命名覆盖目标文件，
+    读取方不会看到写了一半的文件，并发写入时以最后完成的为准
+
+    Args:
+        path: 目标文件路径
+        data: 要写入的数据
+        indent: JSON缩进
+    """
+    _atomic_write(path, lambda f: json.dump(data, f, ensure_ascii=False, indent=indent))
+
+
+def atomic_write_text(path: str, text: str):
+    """
+    原子地写入已编码好的文本（如JSON字符串），方式与 atomic_write_json 相同
+
+    Args:
+        path: 目标文件路径
+        text: 文件内容
+    """
+    _atomic_write(path, lambda f: f.write(text))
+
+
+def atomic_write_bytes(path: str, data: bytes):
+    """
+    原子地写入二进制内容（不做换行转换，文件内容与 data 逐字节一致），方式与 atomic_write_json 相同
+
+    Args:
+        path: 目标文件路径
+        data: 文件内容
+    """
+    _atomic_write(path, lambda f: f.write(data), binary=True)
+
+
+@contextmanager
+def file_lock(path: str) -> Iterator[None]:
+    """
+    跨进程的互斥锁（锁文件不存在时创建），同一进程的不同线程之间同样互斥
+
+    Args:
+        path: 锁文件路径
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'a+b') as f:
+        if os.name == 'nt':
+            f.seek(0)
+            # LK_LOCK 最多重试10秒，继续等待直到拿到锁
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,218 @@
+import os
+import csv
+import sqlite3
+import threading
+from typing import List, Dict, Optional
+
+from sentiment_analysis.result_store import ResultStore
+
+# 摘要行的字段顺序（与 /api/summary 返回值及 sentiment_summary.csv 一致）
+SUMMARY_FIELDS = [
+    'ticker', 'date', 'main_sentiment',
+    'positive_ratio', 'neutral_ratio', 'negative_ratio',
+    'positive_count', 'neutral_count', 'negative_count'
+]
+
+
+def main_sentiment(summary: Dict) -> str:
+    """根据各类比例确定主要情感（某类比例严格最大时才判为该类，否则为中性）"""
+    positive = summary.get('positive_ratio', 0)
+    neutral = summary.get('neutral_ratio', 0)
+    negative = summary.get('negative_ratio', 0)
+    if positive > neutral and positive > negative:
+        return "positive"
+    if negative > neutral and negative > positive:
+        return "negative"
+    return "neutral"
+
+
+def summary_row(data: Dict, report_key: Optional[str] = None) -> Optional[Dict]:
+    """
+    从报告分析结果中提取摘要行
+
+    兼容API保存的格式（含ticker/date，摘要计数为positive_count等）
+    和predict.py保存的格式（无ticker/date，摘要计数为positive等）。
+
+    Args:
+        data: 报告分析结果
+        report_key: 报告键 {ticker}_{date}，结果中没有ticker/date时使用
+
+    Returns:
+        摘要行字典，无法识别时返回None
+    """
+    if not isinstance(data, dict) or not isinstance(data.get('summary'), dict):
+        return None
+
+    ticker = data.get('ticker')
+    date = data.get('date')
+    if (not ticker or not date) and report_key and '_' in report_key:
+        ticker, date = report_key.rsplit('_', 1)
+    if not ticker or not date:
+        return None
+
+    summary = data['summary']
+    row = {
+        'ticker': ticker,
+        'date': date,
+        'main_sentiment': main_sentiment(summary)
+    }
+    for label in ['positive', 'neutral', 'negative']:
+        row[f'{label}_ratio'] = summary.get(f'{label}_ratio', 0)
+        row[f'{label}_count'] = summary.get(f'{label}_count', summary.get(label, 0))
+    return row
+
+
+class SummaryIndex:
+    """报告情感摘要索引（SQLite），在保存分析结果时增量更新"""
+
+    def __init__(self, path: str):
+        """
+        打开（必要时创建）摘要索引
+
+        Args:
+            path: SQLite数据库文件路径
+        """
+        self.path = path
+        self.created = not os.path.exists(path)
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS report_summary ("
+            "ticker TEXT NOT NULL, "
+            "date TEXT NOT NULL, "
+            "main_sentiment TEXT NOT NULL, "
+            "positive_ratio REAL NOT NULL, "
+            "neutral_ratio REAL NOT NULL, "
+            "negative_ratio REAL NOT NULL, "
+            "positive_count INTEGER NOT NULL, "
+            "neutral_count INTEGER NOT NULL, "
+            "negative_count INTEGER NOT NULL, "
+            "PRIMARY KEY (ticker, date))"
+        )
+        self._conn.commit()
+
+    def upsert(self, row: Dict):
+        """写入或更新一行摘要"""
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO report_summary ({', '.join(SUMMARY_FIELDS)}) "
+                f"VALUES ({', '.join('?' * len(SUMMARY_FIELDS))})",
+                [row[field] for field in SUMMARY_FIELDS]
+            )
+            self._conn.commit()
+
+    def upsert_result(self, data: Dict, report_key: Optional[str] = None) -> bool:
+        """
+        根据报告分析结果更新索引
+
+        Args:
+            data: 报告分析结果
+            report_key: 报告键 {ticker}_{date}
+
+        Returns:
+            是否写入了索引
+        """
+        row = summary_row(data, report_key)
+        if row is None:
+            return False
+        self.upsert(row)
+        return True
+
+    def query(self, ticker: Optional[str] = None) -> List[Dict]:
+        """
+        查询摘要，按股票代码和日期排序
+
+        Args:
+            ticker: 可选的股票代码筛选
+
+        Returns:
+            摘要行列表
+        """
+        sql = f"SELECT {', '.join(SUMMARY_FIELDS)} FROM report_summary"
+        params = []
+        if ticker:
+            sql += " WHERE ticker = ?"
+            params.append(ticker)
+        sql += " ORDER BY ticker, date"
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [dict(zip(SUMMARY_FIELDS, row)) for row in rows]
+
+    def rebuild(self, results_dir: str) -> int:
+        """
+        清空索引并从结果目录中的所有分析结果文件重建
+
+        Args:
+            results_dir: 结果目录
+
+        Returns:
+            写入索引的报告数
+        """
+        rows = []
+        store = ResultStore(results_dir)
+        for report_key in store.keys():
+            try:
+                # 列式格式只读取元数据，不触碰句子数据
+                data = store.load_summary(report_key)
+            except Exception as e:
+                print(f"读取报告 {report_key} 的分析结果出错: {e}")
+                continue
+            row = summary_row(data, report_key)
+            if row is not None:
+                rows.append(row)
+
+        with self._lock:
+            self._conn.execute("DELETE FROM report_summary")
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO report_summary ({', '.join(SUMMARY_FIELDS)}) "
+                f"VALUES ({', '.join('?' * len(SUMMARY_FIELDS))})",
+                [[row[field] for field in SUMMARY_FIELDS] for row in rows]
+            )
+            self._conn.commit()
+        return len(rows)
+
+    def export_csv(self, csv_path: str):
+        """把索引中的全部摘要导出为CSV文件"""
+        rows = self.query()
+        if not rows:
+            return
+        tmp_path = f"{csv_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+        os.replace(tmp_path, csv_path)
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    from preprocess.config import RESULTS_DIR, SUMMARY_INDEX_FILENAME
+
+    parser = argparse.ArgumentParser(description="重建报告情感摘要索引")
+    parser.add_argument("--results-dir", type=str, help="结果目录", default=RESULTS_DIR)
+    parser.add_argument("--rebuild", action="store_true", help="从结果目录中的全部分析结果重建索引")
+
+    args = parser.parse_args()
+
+    index = SummaryIndex(os.path.join(args.results_dir, SUMMARY_INDEX_FILENAME))
+    if args.rebuild or index.created:
+        count = index.rebuild(args.results_dir)
+        index.export_csv(os.path.join(args.results_dir, 'sentiment_summary.csv'))
+        print(f"摘要索引已重建，共 {count} 个报告")
+    else:
+        print(f"摘要索引共 {len(index.query())} 个报告（使用 --rebuild 重建）")